@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Region, Zone, Point, Infrastructure, EnergyStorage, RegionGrid ,WindTurbineType
+from .models import Region, Zone, Point, Infrastructure, EnergyStorage, RegionGrid ,WindTurbineType, PipelineJob, ZoneMetricHistory, RegionEnergyCache, GridMetricStore
 
 admin.site.register(Region)
 admin.site.register(Zone)
@@ -7,4 +7,8 @@ admin.site.register(Point)
 admin.site.register(Infrastructure)
 admin.site.register(EnergyStorage)
 admin.site.register(RegionGrid)
-admin.site.register(WindTurbineType)
\ No newline at end of file
+admin.site.register(WindTurbineType)
+admin.site.register(PipelineJob)
+admin.site.register(ZoneMetricHistory)
+admin.site.register(RegionEnergyCache)
+admin.site.register(GridMetricStore)
@@ -0,0 +1,106 @@
+"""
+climatology.py
+--------------
+
+Multi-year climatology from per-year zone metrics (ZoneMetricHistory rows).
+
+This module does NOT import Earth Engine. It only aggregates values that
+were already computed:
+
+    • history_row_values()  – atmosphere reduction properties → row fields
+    • summarize()           – per-year rows → climatological means
+    • history_payload()     – per-year rows + climatology for the API
+
+Every metric is a plain mean over the years, except the wind direction,
+which is rebuilt from the mean power-weighted components so it stays
+correct across the 0°/360° wrap.
+"""
+
+import math
+
+
+# ZoneMetricHistory fields filled from the atmosphere reduction
+HISTORY_FIELDS = ("avg_wind_speed", "weighted_x", "weighted_y", "air_density", "power_avg")
+
+
+def parse_years(value):
+    """
+    "2019,2020,2022" / "2019-2022" / [2019, 2020] → sorted list of ints.
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return sorted({int(y) for y in value})
+
+    years = set()
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(p) for p in part.split("-", 1))
+            years.update(range(start, end + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+
+def history_row_values(props) -> dict:
+    """Map one zone's atmosphere reduction properties to ZoneMetricHistory fields."""
+    return {
+        "avg_wind_speed": props.get("wind_speed"),
+        "weighted_x": props.get("weighted_x"),
+        "weighted_y": props.get("weighted_y"),
+        "air_density": props.get("air_density"),
+        "power_avg": props.get("power_density"),
+    }
+
+
+def direction_from_components(wx, wy) -> float:
+    """Power-weighted direction in degrees 0–360 (0.0 when unknown)."""
+    if wx is None or wy is None:
+        return 0.0
+    return round(math.degrees(math.atan2(wy, wx)) % 360, 1)
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(rows) -> dict:
+    """
+    Climatological means of a zone's ZoneMetricHistory rows.
+
+    Returns a dict with the Zone fields (avg_wind_speed, wind_direction,
+    air_density, power_avg), rounded like the single-year pipeline, plus
+    the list of years used.
+    """
+    rows = list(rows)
+    means = {f: _mean(getattr(r, f) for r in rows) for f in HISTORY_FIELDS}
+
+    return {
+        "years": sorted(r.year for r in rows),
+        "avg_wind_speed": round(means["avg_wind_speed"] or 0.0, 2),
+        "wind_direction": direction_from_components(means["weighted_x"], means["weighted_y"]),
+        "air_density": round(means["air_density"] or 0.0, 3),
+        "power_avg": round(means["power_avg"] or 0.0, 1),
+    }
+
+
+def history_payload(rows) -> dict:
+    """Per-year values and their climatology, as returned by the zone history endpoint."""
+    rows = sorted(rows, key=lambda r: r.year)
+    return {
+        "years": [
+            {
+                "year": r.year,
+                "avg_wind_speed": r.avg_wind_speed,
+                "wind_direction": direction_from_components(r.weighted_x, r.weighted_y),
+                "air_density": r.air_density,
+                "power_avg": r.power_avg,
+            }
+            for r in rows
+        ],
+        "climatology": summarize(rows) if rows else None,
+    }
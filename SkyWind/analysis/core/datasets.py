@@ -0,0 +1,37 @@
+"""
+datasets.py
+-----------
+
+Earth Engine dataset ids and their versions, shared by the reduction
+cache (gee_data.reduction_spec) and metric freshness (freshness.py).
+
+Kept free of Earth Engine imports so views can check freshness without
+loading the `ee` package.
+"""
+
+from analysis.core.reduction_cache import ReductionSpec
+
+
+ERA5_HOURLY = 'ECMWF/ERA5/HOURLY'
+ERA5_LAND_HOURLY = 'ECMWF/ERA5_LAND/HOURLY'
+COPERNICUS_DEM = 'COPERNICUS/DEM/GLO30'
+ESA_WORLDCOVER = 'ESA/WorldCover/v200'
+
+# Version of each dataset as seen by the reduction cache.
+# Bump a version when a dataset is reprocessed upstream (or a formula using
+# it changes) and run `manage.py gee_cache --purge-outdated`. Zone metrics
+# computed from it become stale and are refreshed on the next request.
+DATASET_VERSIONS = {
+    ERA5_HOURLY: '1',
+    ERA5_LAND_HOURLY: '1',
+    COPERNICUS_DEM: '1',
+    ESA_WORLDCOVER: '1',
+}
+
+
+def reduction_spec(datasets, **kwargs) -> ReductionSpec:
+    """ReductionSpec for `datasets` at their current DATASET_VERSIONS."""
+    return ReductionSpec(
+        datasets=tuple((d, DATASET_VERSIONS[d]) for d in datasets),
+        **kwargs,
+    )
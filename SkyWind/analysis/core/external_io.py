@@ -0,0 +1,247 @@
+"""
+external_io.py
+--------------
+
+Pluggable I/O layer for every call that leaves the process:
+Earth Engine (getInfo, getMapId, initialization) and Overpass.
+
+Three modes, chosen with settings.EXTERNAL_IO_MODE:
+
+    • live    – talk to Google / Overpass directly (default)
+    • record  – talk to them and save every response under EXTERNAL_IO_DIR
+    • replay  – never touch the network; serve saved responses back,
+                optionally sleeping EXTERNAL_IO_REPLAY_LATENCY_MS per call
+
+Earth Engine is hooked at the HTTP transport level (the `http_transport`
+argument of ee.Initialize), so discovery, algorithm listing, getInfo() and
+getMapId() are all captured without touching the call sites. Overpass calls
+go through post_json().
+
+Responses are stored one JSON file per request, named by the SHA-256 of
+(method, url, body), so a recording made on one machine replays on any
+other plain Linux box.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+# ---------------------------------------------------------
+# SETTINGS
+# ---------------------------------------------------------
+
+def get_mode() -> str:
+    mode = getattr(settings, "EXTERNAL_IO_MODE", MODE_LIVE) or MODE_LIVE
+    if mode not in (MODE_LIVE, MODE_RECORD, MODE_REPLAY):
+        raise ValueError(f"Unknown EXTERNAL_IO_MODE: {mode!r}")
+    return mode
+
+
+def get_cassette():
+    return Cassette(getattr(settings, "EXTERNAL_IO_DIR", "recordings"))
+
+
+def get_replay_latency() -> float:
+    """Injected delay per replayed response, in seconds."""
+    return float(getattr(settings, "EXTERNAL_IO_REPLAY_LATENCY_MS", 0) or 0) / 1000.0
+
+
+# ---------------------------------------------------------
+# CASSETTE (ON-DISK STORE)
+# ---------------------------------------------------------
+
+class Cassette:
+    """
+    Directory of recorded responses:
+
+        <root>/<kind>/<key[:2]>/<key>.json
+
+    kind is "ee" or "overpass"; key is request_key(method, url, body).
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def request_key(method, url, body) -> str:
+        if body is None:
+            body = b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        h = hashlib.sha256()
+        h.update(method.upper().encode("utf-8"))
+        h.update(b"\n")
+        h.update(url.encode("utf-8"))
+        h.update(b"\n")
+        h.update(body)
+        return h.hexdigest()
+
+    def _path(self, kind, key) -> Path:
+        return self.root / kind / key[:2] / f"{key}.json"
+
+    def load(self, kind, key) -> dict:
+        path = self._path(kind, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ReplayMissError(f"No {kind} recording for key {key} in {self.root}") from None
+
+    def save(self, kind, key, entry: dict):
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write-then-rename so concurrent recorders never leave half files
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+# EARTH ENGINE TRANSPORTS (httplib2.Http-compatible)
+# ---------------------------------------------------------
+
+# Token refreshes share the transport; never write credentials to disk
+AUTH_HOSTS = {"oauth2.googleapis.com", "accounts.google.com"}
+
+
+def _is_auth_request(uri) -> bool:
+    parsed = urlparse(uri)
+    return parsed.hostname in AUTH_HOSTS or "/oauth2/" in parsed.path
+
+
+def _encode_entry(uri, method, status, headers, content) -> dict:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return {
+        "uri": uri,
+        "method": method,
+        "status": int(status),
+        "headers": {k: str(v) for k, v in headers.items()},
+        "content_b64": base64.b64encode(content or b"").decode("ascii"),
+    }
+
+
+def _decode_entry(entry):
+    import httplib2
+
+    info = dict(entry["headers"])
+    info["status"] = str(entry["status"])
+    return httplib2.Response(info), base64.b64decode(entry["content_b64"])
+
+
+class RecordingHttp:
+    """Forward requests to a real httplib2.Http and save every response."""
+
+    def __init__(self, cassette, inner=None):
+        import httplib2
+
+        self.cassette = cassette
+        self.inner = inner or httplib2.Http()
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        resp, content = self.inner.request(uri, method, body=body, headers=headers, **kwargs)
+
+        # Only successful API responses are worth replaying
+        if resp.status < 400 and not _is_auth_request(uri):
+            key = Cassette.request_key(method, uri, body)
+            self.cassette.save("ee", key, _encode_entry(uri, method, resp.status, resp, content))
+
+        return resp, content
+
+    def close(self):
+        self.inner.close()
+
+    def __getattr__(self, name):
+        # connections, timeout, follow_redirects, ... (used by AuthorizedHttp)
+        return getattr(self.inner, name)
+
+
+class ReplayHttp:
+    """Serve saved responses; never opens a socket."""
+
+    def __init__(self, cassette, latency: float = 0.0):
+        self.cassette = cassette
+        self.latency = latency
+        self.connections = {}
+        self.timeout = None
+        self.follow_redirects = True
+        self.redirect_codes = frozenset()
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        entry = self.cassette.load("ee", Cassette.request_key(method, uri, body))
+        if self.latency:
+            time.sleep(self.latency)
+        return _decode_entry(entry)
+
+    def close(self):
+        pass
+
+
+def ee_initialize_kwargs() -> dict:
+    """
+    Extra keyword arguments for ee.Initialize() in the current mode.
+
+    Replay mode drops the credentials, so no Google account is needed.
+    """
+    mode = get_mode()
+
+    if mode == MODE_RECORD:
+        return {"http_transport": RecordingHttp(get_cassette())}
+
+    if mode == MODE_REPLAY:
+        return {
+            "credentials": None,
+            "http_transport": ReplayHttp(get_cassette(), get_replay_latency()),
+        }
+
+    return {}
+
+
+# ---------------------------------------------------------
+# PLAIN HTTP (OVERPASS)
+# ---------------------------------------------------------
+
+def post_json(url: str, data: str, timeout=None):
+    """
+    POST `data` to `url` and return the decoded JSON body.
+
+    Raises requests.HTTPError on HTTP errors (live/record) and
+    ReplayMissError when nothing was recorded (replay).
+    """
+    mode = get_mode()
+    key = Cassette.request_key("POST", url, data)
+
+    if mode == MODE_REPLAY:
+        entry = get_cassette().load("overpass", key)
+        latency = get_replay_latency()
+        if latency:
+            time.sleep(latency)
+        return entry["json"]
+
+    r = requests.post(url, data=data, timeout=timeout)
+    r.raise_for_status()
+    payload = r.json()
+
+    if mode == MODE_RECORD:
+        get_cassette().save("overpass", key, {"url": url, "body": data, "json": payload})
+
+    return payload
@@ -0,0 +1,319 @@
+"""
+freshness.py
+------------
+
+Per-metric freshness of zones and regions, replacing the "0 means not
+computed" sentinels (a real 0 °C region used to be recomputed forever).
+
+Every Zone / Region keeps a `freshness` JSON of the metrics it holds:
+
+    {"terrain": {"computed_at": "2025-12-10T10:00:00+00:00",
+                 "version": "COPERNICUS/DEM/GLO30@1"}, ...}
+
+and a `data_state` column derived from it:
+
+    • pending  – no metric computed yet
+    • partial  – some metrics missing or stale
+    • complete – every metric present and fresh
+
+A metric is stale when its version differs from the current one (dataset
+version bumped in datasets.py, other climatology years, new scoring), when
+it is older than GEE_METRIC_MAX_AGE_DAYS (0 = never expires), or – for
+derived metrics – when one of its inputs was recomputed after it.
+
+    • current_versions()  – {metric: version} for the current settings
+    • stale_zone_metrics() / stale_region_metrics()
+    • zone_state() / region_state() – pending / partial / complete
+    • stamp()             – record freshly computed metrics on an object
+    • save_stamped()      – stamp() and save the given fields
+    • bulk_save_stamped() – the same for many objects, one bulk update
+    • WriteBuffer         – stamped results of several steps, written
+                            together in one transaction
+
+This module does not import Earth Engine.
+"""
+
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from analysis.core.bulk_write import bulk_update_rows
+from analysis.core.climatology import parse_years
+from analysis.core.datasets import (
+    COPERNICUS_DEM,
+    DATASET_VERSIONS,
+    ERA5_HOURLY,
+    ERA5_LAND_HOURLY,
+    ESA_WORLDCOVER,
+)
+from analysis.core.wind_distribution import WIND_HIST_TAG
+
+
+STATE_PENDING = "pending"
+STATE_PARTIAL = "partial"
+STATE_COMPLETE = "complete"
+
+STATE_CHOICES = [
+    (STATE_PENDING, "Pending"),
+    (STATE_PARTIAL, "Partial"),
+    (STATE_COMPLETE, "Complete"),
+]
+
+# Zone metrics, each written by one pipeline step, and the Zone fields they cover
+ZONE_METRICS = {
+    "wind": ("avg_wind_speed", "wind_direction"),
+    "terrain": ("min_alt", "max_alt", "roughness"),
+    "air_density": ("air_density",),
+    "power_density": ("power_avg",),
+    "land_cover": ("land_type",),
+    "wind_distribution": ("wind_histogram", "weibull_k", "weibull_c"),
+    "potential": ("potential",),
+}
+REGION_METRICS = {
+    "temperature": ("avg_temperature",),
+    "summary": ("wind_rose", "avg_potential", "rating"),
+}
+
+# Derived metrics are stale once any of their inputs is newer
+DERIVED_FROM = {
+    "potential": ("terrain", "power_density", "land_cover"),
+}
+
+# Bump when compute_potential / compute_region_metrics change
+SCORING_VERSION = "1"
+SUMMARY_VERSION = "1"
+
+# Years of the single-year pipeline (atmosphere / land cover defaults)
+DEFAULT_YEAR = 2022
+LAND_COVER_YEAR = 2021
+
+
+def _datasets(*ids) -> str:
+    return "+".join(f"{d}@{DATASET_VERSIONS[d]}" for d in ids)
+
+
+def _years(years) -> str:
+    years = sorted(years)
+    if len(years) == 1:
+        return f"y{years[0]}"
+    return f"y{years[0]}-{years[-1]}x{len(years)}"
+
+
+def current_versions(years=None) -> dict:
+    """
+    {metric: version} the stored metrics must match to be fresh.
+
+    years: atmospheric years in effect; None reads GEE_CLIMATOLOGY_YEARS
+    (empty → the single default year).
+    """
+    if years is None:
+        years = parse_years(getattr(settings, "GEE_CLIMATOLOGY_YEARS", ""))
+    atmosphere = _years(years or [DEFAULT_YEAR])
+
+    return {
+        "wind": f"{_datasets(ERA5_HOURLY)};{atmosphere}",
+        "terrain": _datasets(COPERNICUS_DEM),
+        "air_density": f"{_datasets(ERA5_LAND_HOURLY)};{atmosphere}",
+        "power_density": f"{_datasets(ERA5_HOURLY, ERA5_LAND_HOURLY)};{atmosphere}",
+        "land_cover": f"{_datasets(ESA_WORLDCOVER)};{_years([LAND_COVER_YEAR])}",
+        "wind_distribution": f"{_datasets(ERA5_HOURLY)};{atmosphere};{WIND_HIST_TAG}",
+        "potential": f"scoring@{SCORING_VERSION}",
+        "temperature": f"{_datasets(ERA5_LAND_HOURLY)};{_years([DEFAULT_YEAR])}",
+        "summary": f"summary@{SUMMARY_VERSION}",
+    }
+
+
+def _max_age():
+    days = float(getattr(settings, "GEE_METRIC_MAX_AGE_DAYS", 0) or 0)
+    return timedelta(days=days) if days > 0 else None
+
+
+def _computed_at(entry):
+    return parse_datetime(entry["computed_at"]) if entry and entry.get("computed_at") else None
+
+
+def _stale(freshness, metrics, versions, now=None) -> list:
+    now = now or timezone.now()
+    max_age = _max_age()
+    stale = []
+
+    for metric in metrics:
+        entry = freshness.get(metric)
+        at = _computed_at(entry)
+        if at is None or entry.get("version") != versions[metric]:
+            stale.append(metric)
+        elif max_age is not None and now - at > max_age:
+            stale.append(metric)
+        elif metric in DERIVED_FROM:
+            inputs = [_computed_at(freshness.get(m)) for m in DERIVED_FROM[metric]]
+            if any(t is None or t > at for t in inputs):
+                stale.append(metric)
+    return stale
+
+
+def stale_zone_metrics(zone, versions=None) -> list:
+    """Zone metrics that are missing or stale, in pipeline order."""
+    return _stale(zone.freshness or {}, ZONE_METRICS, versions or current_versions())
+
+
+def stale_region_metrics(region, versions=None) -> list:
+    return _stale(region.freshness or {}, REGION_METRICS, versions or current_versions())
+
+
+def data_state(freshness, metrics, versions) -> str:
+    stale = _stale(freshness or {}, metrics, versions)
+    if not stale:
+        return STATE_COMPLETE
+    if not any(m in (freshness or {}) for m in metrics):
+        return STATE_PENDING
+    return STATE_PARTIAL
+
+
+def zone_state(zone, versions=None) -> str:
+    """pending / partial / complete of a zone against the current versions."""
+    return data_state(zone.freshness, ZONE_METRICS, versions or current_versions())
+
+
+def region_state(region, versions=None) -> str:
+    return data_state(region.freshness, REGION_METRICS, versions or current_versions())
+
+
+def combine_states(*states) -> str:
+    """pending if all pending, complete if all complete, partial otherwise."""
+    states = set(states)
+    if len(states) == 1:
+        return states.pop()
+    return STATE_PARTIAL
+
+
+# Steps of the concurrent pipeline stamp and save the same instances from
+# several threads: stamping swaps in a new dict, and save_stamped() holds
+# the lock until the row is written so no stamp is lost to a stale write.
+_stamp_lock = threading.RLock()
+
+FRESHNESS_FIELDS = ["freshness", "data_state"]
+
+
+def stamp(obj, metrics, versions=None, now=None, current=None):
+    """
+    Record `metrics` as computed now on a Zone or Region and refresh its
+    data_state. Does not save.
+
+    versions: what the values were computed from (e.g. a single year that
+    climatology later replaces); defaults to `current`.
+    current: the versions of the run (e.g. current_versions(years) of a
+    --years fetch) the data_state is judged against; defaults to
+    current_versions() of the settings.
+    """
+    current = current or current_versions()
+    _stamp(obj, metrics, versions or current, (now or timezone.now()).isoformat(), current)
+
+
+def _stamp(obj, metrics, versions, at, current):
+    all_metrics = ZONE_METRICS if hasattr(obj, "grid_id") else REGION_METRICS
+
+    with _stamp_lock:
+        freshness = dict(obj.freshness or {})
+        for metric in metrics:
+            freshness[metric] = {"computed_at": at, "version": versions[metric]}
+        obj.freshness = freshness
+        obj.data_state = data_state(freshness, all_metrics, current)
+
+
+def save_stamped(obj, metrics, update_fields=None, versions=None, current=None):
+    """stamp() then save; update_fields=None saves every field."""
+    with _stamp_lock:
+        stamp(obj, metrics, versions, current=current)
+        if update_fields is None:
+            obj.save()
+        else:
+            obj.save(update_fields=list(update_fields) + FRESHNESS_FIELDS)
+
+
+def db_batch_size() -> int:
+    """Rows per bulk update statement (settings.GEE_DB_BATCH_SIZE)."""
+    return max(1, int(getattr(settings, "GEE_DB_BATCH_SIZE", 500)))
+
+
+def _stamp_all(objs, metrics, versions=None, current=None):
+    current = current or current_versions()
+    versions = versions or current
+    at = timezone.now().isoformat()
+    for obj in objs:
+        _stamp(obj, metrics, versions, at, current)
+
+
+def bulk_save_stamped(objs, metrics, update_fields, versions=None, batch_size=None, writes=None, current=None):
+    """
+    stamp() every object, then write `update_fields` with bulk_update_rows().
+
+    writes: a WriteBuffer to add the objects to instead; nothing is
+    written until it is flushed.
+    current: versions the data_state is judged against (see stamp());
+    defaults to those of the WriteBuffer, then to the settings.
+    """
+    if not objs:
+        return
+    if writes is not None:
+        writes.add(objs, metrics, update_fields, versions, current)
+        return
+    with _stamp_lock:
+        _stamp_all(objs, metrics, versions, current)
+        with transaction.atomic():
+            bulk_update_rows(objs, list(update_fields) + FRESHNESS_FIELDS, batch_size or db_batch_size())
+
+
+class WriteBuffer:
+    """
+    Pipeline results kept in memory until every step of a run is done.
+
+    add() stamps objects like bulk_save_stamped() and records which fields
+    changed on each; flush() writes them all in one transaction, one
+    bulk update per model and set of changed fields (see bulk_write.py),
+    GEE_DB_BATCH_SIZE rows per statement. A zone refreshed by four steps is written once,
+    with the fields of the four steps. Steps running in several threads
+    may add to the same buffer.
+
+    current: the versions of the run (current_versions(years)) every
+    added object's data_state is judged against; None uses the settings.
+    """
+
+    def __init__(self, batch_size=None, current=None):
+        self.batch_size = batch_size or db_batch_size()
+        self.current = current
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, objs, metrics, update_fields, versions=None, current=None):
+        with _stamp_lock:
+            _stamp_all(objs, metrics, versions, current or self.current)
+            for obj in objs:
+                _, fields = self._pending.setdefault((type(obj), obj.pk), (obj, set(FRESHNESS_FIELDS)))
+                fields.update(update_fields)
+
+    def add_copied(self, objs, update_fields):
+        """Like add() for objects whose freshness the caller already set (not stamped)."""
+        with _stamp_lock:
+            for obj in objs:
+                _, fields = self._pending.setdefault((type(obj), obj.pk), (obj, set(FRESHNESS_FIELDS)))
+                fields.update(update_fields)
+
+    def flush(self) -> int:
+        """Write and forget the pending objects; returns how many rows."""
+        with _stamp_lock:
+            pending, self._pending = self._pending, {}
+
+        groups = {}
+        for obj, fields in pending.values():
+            groups.setdefault((type(obj), tuple(sorted(fields))), []).append(obj)
+
+        with transaction.atomic():
+            for (model, fields), objs in groups.items():
+                bulk_update_rows(objs, fields, self.batch_size)
+        return len(pending)
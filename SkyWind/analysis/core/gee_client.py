@@ -0,0 +1,382 @@
+"""
+gee_client.py
+-------------
+
+Single entry point for every blocking Earth Engine call
+(getInfo, computePixels, getMapId).
+
+    • get_info(obj)            – obj.getInfo()
+    • compute_pixels(request)  – ee.data.computePixels(request)
+    • get_map_id(request)      – ee.data.getMapId(request)
+    • stats()                  – process-wide counters
+
+Earth Engine is initialized lazily, on first use, not at import:
+
+    • ensure_initialized()     – thread-safe ee.Initialize, once per process
+    • @requires_ee             – for functions that build ee objects
+    • warm_up()                – initialize ahead of time (worker boot)
+
+Importing the `ee` package alone takes close to a second, so this module
+only imports it inside functions: Django startup, migrate and the other
+management commands never touch Earth Engine.
+
+Each call goes through, in order:
+
+    1. circuit breaker – after GEE_CIRCUIT_FAILURE_THRESHOLD consecutive
+       transient failures, calls fail fast with CircuitOpenError for
+       GEE_CIRCUIT_RESET_SECONDS, then one trial call is let through
+    2. token bucket    – at most GEE_RATE_LIMIT_PER_SEC calls per second
+       (bursts up to GEE_RATE_LIMIT_BURST), shared by all threads
+    3. concurrency cap – at most GEE_MAX_CONCURRENT_REQUESTS in flight
+    4. retries         – transient errors (too many requests / quota,
+       backend unavailable, timeouts, connection resets) are retried up
+       to GEE_MAX_RETRIES times with exponential backoff and full jitter
+
+Errors that retrying cannot fix (bad expressions, memory limits, missing
+assets) are raised at once and do not count against the breaker.
+
+The limits are per process: size GEE_RATE_LIMIT_PER_SEC to the project
+quota divided by the number of worker processes.
+"""
+
+import functools
+import http.client
+import random
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Earth Engine while the breaker is open."""
+
+
+# Substrings of EEException messages worth retrying
+TRANSIENT_MESSAGES = (
+    "too many requests",
+    "too many concurrent",
+    "rate limit",
+    "quota exceeded",
+    "resource exhausted",
+    "internal error",
+    "service unavailable",
+    "backend error",
+    "deadline exceeded",
+    "timed out",
+    "connection reset",
+)
+
+
+# Network failures worth retrying; other OSErrors (missing files,
+# permissions, HTTP error statuses raised by requests) are not
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, socket.timeout, http.client.HTTPException)
+
+
+def is_transient(exc) -> bool:
+    """True for errors a later retry can succeed on."""
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    try:
+        import requests
+    except ImportError:
+        pass
+    else:
+        # Connection failures and timeouts of the Google API clients
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True
+    import ee
+
+    if isinstance(exc, ee.EEException):
+        message = str(exc).lower()
+        return any(m in message for m in TRANSIENT_MESSAGES)
+    return False
+
+
+# ---------------------------------------------------------
+# INITIALIZATION
+# ---------------------------------------------------------
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def ensure_initialized():
+    """
+    Call ee.Initialize (live, record or replay – see external_io.py) the
+    first time Earth Engine is needed. Safe to call from many threads; a
+    failed attempt is retried on the next call.
+    """
+    global _initialized
+    if _initialized:
+        return
+
+    with _init_lock:
+        if _initialized:
+            return
+
+        import ee
+        from analysis.core.external_io import ee_initialize_kwargs
+
+        ee.Initialize(project=getattr(settings, "GEE_PROJECT", "rospin1"), **ee_initialize_kwargs())
+        _initialized = True
+
+
+def requires_ee(fn):
+    """Initialize Earth Engine before running `fn` (which builds ee objects)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        ensure_initialized()
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def warm_up(background: bool = True):
+    """
+    Initialize Earth Engine ahead of the first request (worker boot).
+
+    background=True returns at once and initializes in a daemon thread;
+    a failure is only printed, the first real call will try again.
+    """
+    def run():
+        start = time.perf_counter()
+        try:
+            ensure_initialized()
+        except Exception as e:
+            print(f"⚠ Earth Engine warm-up failed: {e}")
+            return
+        print(f"🛰 Earth Engine initialized in {time.perf_counter() - start:.2f}s")
+
+    if not background:
+        run()
+        return None
+
+    thread = threading.Thread(target=run, name="gee-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+# ---------------------------------------------------------
+# BUILDING BLOCKS
+# ---------------------------------------------------------
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, up to `burst` saved."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """closed → open after `threshold` consecutive failures → half-open after `reset_seconds`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    raise CircuitOpenError("Earth Engine circuit is open; failing fast")
+                self.state = self.HALF_OPEN
+
+            if self.state == self.HALF_OPEN:
+                # Only one trial call probes a recovering service
+                if self._trial_running:
+                    raise CircuitOpenError("Earth Engine circuit is half-open; trial call in progress")
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self.state = self.CLOSED
+
+    def record_failure(self) -> bool:
+        """Count a transient failure; True when this opened the circuit."""
+        with self._lock:
+            self._trial_running = False
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (self.threshold and self._failures >= self.threshold):
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                return opened
+            return False
+
+    def release(self):
+        """End a call that neither succeeded nor failed transiently."""
+        with self._lock:
+            self._trial_running = False
+
+
+# ---------------------------------------------------------
+# CLIENT
+# ---------------------------------------------------------
+
+class GEEClient:
+    def __init__(self, rate=10.0, burst=20, max_concurrent=8, max_retries=5,
+                 base_delay=1.0, max_delay=60.0, failure_threshold=5, reset_seconds=60.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = threading.BoundedSemaphore(max(1, max_concurrent))
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = dict.fromkeys((
+            "calls", "succeeded", "failed", "retries", "transient_errors",
+            "rejected_open_circuit", "circuit_opened",
+        ), 0)
+        self._seconds = {"throttled": 0.0, "backoff": 0.0, "in_call": 0.0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _add_seconds(self, name, seconds):
+        with self._lock:
+            self._seconds[name] += seconds
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max_delay, base_delay · 2^attempt))."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, label: str = "call"):
+        """Run fn() under the breaker, rate limit, concurrency cap and retries."""
+        self._count("calls")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count("rejected_open_circuit")
+                self._count("failed")
+                raise
+
+            self._add_seconds("throttled", self.bucket.acquire())
+
+            with self.semaphore:
+                with self._lock:
+                    self._in_flight += 1
+                start = time.perf_counter()
+                try:
+                    result = fn()
+                except Exception as e:
+                    error = e
+                    transient = is_transient(e)
+                    if transient:
+                        self._count("transient_errors")
+                        if self.breaker.record_failure():
+                            self._count("circuit_opened")
+                    else:
+                        self.breaker.release()
+
+                    if not transient or attempt == self.max_retries:
+                        self._count("failed")
+                        raise
+                else:
+                    self.breaker.record_success()
+                    self._count("succeeded")
+                    return result
+                finally:
+                    self._add_seconds("in_call", time.perf_counter() - start)
+                    with self._lock:
+                        self._in_flight -= 1
+
+            delay = self.backoff(attempt)
+            print(f"⚠ Earth Engine {label} failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            self._count("retries")
+            self._add_seconds("backoff", delay)
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "circuit": self.breaker.state,
+                **{f"{name}_seconds": round(sec, 3) for name, sec in self._seconds.items()},
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GEEClient:
+    """Process-wide client configured from settings (GEE_RATE_LIMIT_*, ...)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GEEClient(
+                    rate=float(getattr(settings, "GEE_RATE_LIMIT_PER_SEC", 10)),
+                    burst=int(getattr(settings, "GEE_RATE_LIMIT_BURST", 20)),
+                    max_concurrent=int(getattr(settings, "GEE_MAX_CONCURRENT_REQUESTS", 8)),
+                    max_retries=int(getattr(settings, "GEE_MAX_RETRIES", 5)),
+                    base_delay=float(getattr(settings, "GEE_RETRY_BASE_DELAY", 1.0)),
+                    max_delay=float(getattr(settings, "GEE_RETRY_MAX_DELAY", 60.0)),
+                    failure_threshold=int(getattr(settings, "GEE_CIRCUIT_FAILURE_THRESHOLD", 5)),
+                    reset_seconds=float(getattr(settings, "GEE_CIRCUIT_RESET_SECONDS", 60.0)),
+                )
+    return _client
+
+
+def get_info(obj, label: str = "getInfo"):
+    ensure_initialized()
+    return get_client().call(obj.getInfo, label)
+
+
+def compute_pixels(request: dict):
+    import ee
+
+    ensure_initialized()
+    return get_client().call(lambda: ee.data.computePixels(request), "computePixels")
+
+
+def get_map_id(request: dict):
+    import ee
+
+    ensure_initialized()
+    return get_client().call(lambda: ee.data.getMapId(request), "getMapId")
+
+
+def stats() -> dict:
+    return get_client().stats()
@@ -1,13 +1,43 @@
 import ee
 
-# Initialize Earth Engine once
-ee.Initialize(project='rospin1')
+from analysis.core.gee_client import ensure_initialized, get_info, requires_ee
+from analysis.core.reduction_cache import geometry_key, get_reduction_cache
+
+# Dataset ids / versions live in datasets.py (no Earth Engine import);
+# re-exported here for existing callers
+from analysis.core.datasets import (
+    COPERNICUS_DEM,
+    DATASET_VERSIONS,
+    ERA5_HOURLY,
+    ERA5_LAND_HOURLY,
+    ESA_WORLDCOVER,
+    reduction_spec,
+)
+from analysis.core.wind_distribution import WIND_HIST_BANDS, WIND_HIST_BINS, WIND_HIST_MAX
+
+# Earth Engine is initialized on first use (gee_client.ensure_initialized),
+# not at import: results served from the reduction cache and the local
+# raster backend never need credentials.
 
 
 # ---------------------------------------------------------
 # TEMPERATURE
 # ---------------------------------------------------------
 
+@requires_ee
+def get_temperature_image(year: int = 2022):
+    """
+    REGION:
+    Mean annual 2m air temperature image (band temperature_2m, Kelvin) from ERA5-Land.
+    """
+    coll = (
+        ee.ImageCollection(ERA5_LAND_HOURLY)
+        .select('temperature_2m')
+        .filterDate(f'{year}-01-01', f'{year}-12-31')
+    )
+    return coll.mean()
+
+
 def get_avg_temperature(lat: float, lon: float, year: int = 2022) -> float:
     """
     REGION:
@@ -26,30 +56,70 @@ def get_avg_temperature(lat: float, lon: float, year: int = 2022) -> float:
         - Converts from Kelvin to Celsius: T(°C) = T(K) - 273.15
         - Averages all hourly values within 1km radius
         - Typical range: -50°C to +50°C
+        - Served from the reduction cache when already computed
     """
-    coll = (
-        ee.ImageCollection('ECMWF/ERA5_LAND/HOURLY')
-        .select('temperature_2m')
-        .filterDate(f'{year}-01-01', f'{year}-12-31')
-    )
+    return get_avg_temperatures([(lat, lon)], year)[(lat, lon)]
 
-    img = coll.mean()
-    point = ee.Geometry.Point([lon, lat])
 
-    kelvin = img.reduceRegion(
-        reducer=ee.Reducer.mean(),
-        geometry=point,
-        scale=1000
-    ).get('temperature_2m')
+def get_avg_temperatures(points, year: int = 2022):
+    """
+    REGION:
+    Mean annual 2m air temperature (°C) for many points in one request.
 
-    kelvin_value = kelvin.getInfo()
-    
-    # Handle missing data (e.g., over water, outside coverage)
-    if kelvin_value is None:
-        print(f"⚠ Temperature data unavailable for location ({lat}, {lon})")
-        return 15.0  # Default: 15°C (temperate climate average)
-    
-    return round(float(kelvin_value) - 273.15, 2)
+    Args:
+        points: list of (lat, lon) tuples (e.g. all region centers)
+        year: Year for data retrieval (default: 2022)
+
+    Returns:
+        dict[(lat, lon)] = temperature in °C (15.0 where data is missing)
+
+    Notes:
+        - Same values as get_avg_temperature(), which calls this
+        - Points already in the reduction cache are not sent; the others go
+          out as a single reduceRegions and are routed back by point index
+    """
+    points = list(dict.fromkeys(points))
+    if not points:
+        return {}
+
+    spec = reduction_spec(
+        [ERA5_LAND_HOURLY], year=year, bands=('temperature_2m',), reducer='mean', scale=1000
+    )
+    cache = get_reduction_cache()
+    geom_keys = {p: geometry_key([p]) for p in points}
+
+    cached = cache.get_many(spec, geom_keys.values())
+    kelvin = {p: cached[g] for p, g in geom_keys.items() if g in cached}
+
+    missing = [p for p in points if p not in kelvin]
+    if missing:
+        ensure_initialized()
+        fc = ee.FeatureCollection([
+            ee.Feature(ee.Geometry.Point([lon, lat]), {'point_index': i})
+            for i, (lat, lon) in enumerate(missing)
+        ])
+        reduced = get_info(get_temperature_image(year).reduceRegions(
+            collection=fc,
+            reducer=ee.Reducer.mean(),
+            scale=1000
+        ))
+
+        for f in reduced['features']:
+            props = f['properties']
+            kelvin[missing[int(props['point_index'])]] = props.get('mean')
+
+        cache.put_many(spec, {geom_keys[p]: kelvin.get(p) for p in missing})
+
+    result = {}
+    for (lat, lon) in points:
+        kelvin_value = kelvin.get((lat, lon))
+        # Handle missing data (e.g., over water, outside coverage)
+        if kelvin_value is None:
+            print(f"⚠ Temperature data unavailable for location ({lat}, {lon})")
+            result[(lat, lon)] = 15.0  # Default: 15°C (temperate climate average)
+        else:
+            result[(lat, lon)] = round(float(kelvin_value) - 273.15, 2)
+    return result
 
 
 # ---------------------------------------------------------
@@ -77,13 +147,109 @@ def get_avg_wind_speeds(centers, year: int = 2022):
           * Shows where the strongest winds come from (critical for turbine siting)
         - Returns 0.0 for missing data points
         - Resolution: ~25km (ERA5 is coarser than ERA5-Land but has 100m data)
+        - Points already in the reduction cache are not sent to Earth Engine
     """
 
     if not centers:
         return {}
 
+    spec = reduction_spec(
+        [ERA5_HOURLY], year=year, bands=('wind_speed', 'wind_dir'), reducer='mean', scale=1000
+    )
+    cache = get_reduction_cache()
+    geom_keys = {(lat, lon): geometry_key([(lat, lon)]) for lat, lon in centers}
+
+    # Points computed before come straight from the cache
+    cached = cache.get_many(spec, geom_keys.values())
+    result = {
+        center: cached[g]
+        for center, g in geom_keys.items()
+        if g in cached
+    }
+    returned_count = len(result)
+
+    missing = [c for c in centers if c not in result]
+    if not missing:
+        return result
+
+    ensure_initialized()
+    img = get_wind_image(year)
+
+    # Build FeatureCollection with index for better tracking
+    feats = [
+        ee.Feature(
+            ee.Geometry.Point([lon, lat]),
+            {
+                'lat_key': lat,
+                'lon_key': lon,
+                'point_index': i
+            }
+        )
+        for i, (lat, lon) in enumerate(missing)
+    ]
+
+    fc = ee.FeatureCollection(feats)
+
+    reduced = get_info(img.reduceRegions(
+        collection=fc,
+        reducer=ee.Reducer.mean(),
+        scale=1000
+    ))
+
+    fresh = {}
+
+    for f in reduced['features']:
+        p = f['properties']
+        lat_key = p.get('lat_key')
+        lon_key = p.get('lon_key')
+        spd = p.get('wind_speed')
+        direc = p.get('wind_dir')
+
+        if lat_key is None or lon_key is None:
+            continue
+
+        returned_count += 1
+        center = (float(lat_key), float(lon_key))
+        result[center] = {
+            'speed': float(spd) if spd is not None else 0.0,
+            'direction': float(direc) if direc is not None else 0.0,
+        }
+        if center in geom_keys:
+            fresh[geom_keys[center]] = result[center]
+
+    cache.put_many(spec, fresh)
+
+    # Warn if some points are missing
+    if returned_count < len(centers):
+        missing = len(centers) - returned_count
+        print(f"⚠ Wind speed: {missing}/{len(centers)} points returned no data")
+
+    return result
+
+
+@requires_ee
+def get_wind_components_image(year: int = 2022):
+    """
+    ZONE:
+    Create Earth Engine image with annual wind speed and the power-weighted
+    direction components at 100m.
+
+    Args:
+        year: Year for data retrieval (default: 2022)
+
+    Returns:
+        ee.Image: Three-band image containing:
+            - wind_speed: mean of hourly √(u² + v²) in m/s
+            - weighted_x: mean of cos(direction) × speed³
+            - weighted_y: mean of sin(direction) × speed³
+
+    Notes:
+        - The components are linear, so they can be averaged over a polygon
+          and turned into a direction afterwards with atan2(y, x)
+        - Averaging the direction band itself would break around 0°/360°
+    """
     coll = (
-        ee.ImageCollection('ECMWF/ERA5/HOURLY')
+        ee.ImageCollection(ERA5_HOURLY)
         .select(['u_component_of_wind_100m', 'v_component_of_wind_100m'])
         .filterDate(f'{year}-01-01', f'{year}-12-31')
     )
@@ -133,67 +299,87 @@ def get_avg_wind_speeds(centers, year: int = 2022):
     # Average the weighted components
     mean_weighted_x = coll_weighted.select('weighted_x').mean()
     mean_weighted_y = coll_weighted.select('weighted_y').mean()
-    
+
+    return speed.addBands([mean_weighted_x, mean_weighted_y])
+
+
+@requires_ee
+def get_wind_image(year: int = 2022):
+    """
+    ZONE:
+    Create Earth Engine image with annual mean wind speed and prevailing direction.
+
+    Args:
+        year: Year for data retrieval (default: 2022)
+
+    Returns:
+        ee.Image: Two-band image containing:
+            - wind_speed: mean wind speed at 100m in m/s
+            - wind_dir: power-weighted prevailing direction (0–360°)
+    """
+    components = get_wind_components_image(year)
+
     # Calculate prevailing direction from weighted components
-    direction = mean_weighted_y.atan2(mean_weighted_x).multiply(180.0 / 3.14159265)
+    direction = (
+        components.select('weighted_y')
+        .atan2(components.select('weighted_x'))
+        .multiply(180.0 / 3.14159265)
+    )
     
     # Normalize to 0-360
     direction = direction.add(360).mod(360).rename('wind_dir')
 
-    img = speed.addBands(direction)
-
-    # Build FeatureCollection with index for better tracking
-    feats = [
-        ee.Feature(
-            ee.Geometry.Point([lon, lat]),
-            {
-                'lat_key': lat,
-                'lon_key': lon,
-                'point_index': i
-            }
-        )
-        for i, (lat, lon) in enumerate(centers)
-    ]
+    return components.select('wind_speed').addBands(direction)
 
-    fc = ee.FeatureCollection(feats)
 
-    reduced = img.reduceRegions(
-        collection=fc,
-        reducer=ee.Reducer.mean(),
-        scale=1000
-    ).getInfo()
+@requires_ee
+def get_wind_histogram_image(year: int = 2022):
+    """
+    ZONE:
+    Create Earth Engine image with the histogram of hourly wind speeds at 100m.
 
-    result = {}
-    returned_count = 0
+    Args:
+        year: Year for data retrieval (default: 2022)
 
-    for f in reduced['features']:
-        p = f['properties']
-        lat_key = p.get('lat_key')
-        lon_key = p.get('lon_key')
-        spd = p.get('wind_speed')
-        direc = p.get('wind_dir')
+    Returns:
+        ee.Image: WIND_HIST_BINS bands h00, h01, ... – hours of the year
+        with √(u² + v²) in [0, 1), [1, 2), ... m/s (see wind_distribution.py)
 
-        if lat_key is None or lon_key is None:
-            continue
+    Notes:
+        - One fixedHistogram reduction over the hourly collection, so the
+          whole distribution costs a single pass on the server
+        - Speeds ≥ WIND_HIST_MAX are clamped into the last bin, so the
+          bands always add up to the number of hours
+        - Counts are linear: the zone mean of each band is the area-weighted
+          histogram of the zone, and the histograms of several years add up
+    """
+    coll = (
+        ee.ImageCollection(ERA5_HOURLY)
+        .select(['u_component_of_wind_100m', 'v_component_of_wind_100m'])
+        .filterDate(f'{year}-01-01', f'{year}-12-31')
+    )
 
-        returned_count += 1
-        result[(float(lat_key), float(lon_key))] = {
-            'speed': float(spd) if spd is not None else 0.0,
-            'direction': float(direc) if direc is not None else 0.0,
-        }
+    def calc_speed(img):
+        u = img.select('u_component_of_wind_100m')
+        v = img.select('v_component_of_wind_100m')
+        return u.pow(2).add(v.pow(2)).sqrt().min(WIND_HIST_MAX - 1e-3).rename('wind_speed')
 
-    # Warn if some points are missing
-    if returned_count < len(centers):
-        missing = len(centers) - returned_count
-        print(f"⚠ Wind speed: {missing}/{len(centers)} points returned no data")
+    # Array band [[bucket_min, count], ...] → one count band per bin
+    hist = coll.map(calc_speed).reduce(ee.Reducer.fixedHistogram(0, WIND_HIST_MAX, WIND_HIST_BINS))
 
-    return result
+    return (
+        hist.select('wind_speed_histogram')
+        .arraySlice(1, 1, 2)
+        .arrayProject([0])
+        .arrayFlatten([list(WIND_HIST_BANDS)])
+    )
 
 
 # ---------------------------------------------------------
 # ROUGHNESS -> DEM (Elevation, Slope, Tri)
 # ---------------------------------------------------------
 
+@requires_ee
 def get_dem_layers():
     """
     ZONE:
@@ -211,7 +397,7 @@ def get_dem_layers():
         - Use with reduceRegions() for zone-level statistics
     """
     dem = (
-        ee.ImageCollection("COPERNICUS/DEM/GLO30")
+        ee.ImageCollection(COPERNICUS_DEM)
         .mosaic()
         .select("DEM")
         .rename("elevation")
@@ -231,6 +417,7 @@ def get_dem_layers():
 # AIR DENSITY ρ = p / (R_d * T)
 # ---------------------------------------------------------
 
+@requires_ee
 def get_air_density_image(year: int = 2022):
     """
     ZONE:
@@ -251,7 +438,7 @@ def get_air_density_image(year: int = 2022):
         - Calculates density per-hour then averages (consistent with wind speed method)
     """
     coll = (
-        ee.ImageCollection('ECMWF/ERA5_LAND/HOURLY')
+        ee.ImageCollection(ERA5_LAND_HOURLY)
         .filterDate(f'{year}-01-01', f'{year}-12-31')
         .select(['surface_pressure', 'temperature_2m'])
     )
@@ -274,6 +461,7 @@ def get_air_density_image(year: int = 2022):
 # P = 0.5 * ρ * v³
 # ---------------------------------------------------------
 
+@requires_ee
 def get_wind_power_density_image(year: int = 2022):
     """
     ZONE:
@@ -289,6 +477,8 @@ def get_wind_power_density_image(year: int = 2022):
         - Formula: P = 0.5 × ρ × v³ (per Betz's law)
         - Calculates power density for each hour, then averages
         - This preserves the cubic relationship of wind speed
+        - Wind and surface hours are matched with one ee.Join on
+          system:time_start (see tests/benchmark_power_density.py)
         - Uses ERA5 100m wind + ERA5-Land surface data for air density
         - Wind class guidelines (at 100m):
             < 300 W/m²: Poor
@@ -299,28 +489,29 @@ def get_wind_power_density_image(year: int = 2022):
     """
     # Get 100m wind from ERA5
     wind_coll = (
-        ee.ImageCollection('ECMWF/ERA5/HOURLY')
+        ee.ImageCollection(ERA5_HOURLY)
         .filterDate(f'{year}-01-01', f'{year}-12-31')
         .select(['u_component_of_wind_100m', 'v_component_of_wind_100m'])
     )
     
     # Get surface data from ERA5-Land (higher resolution for pressure/temp)
     surface_coll = (
-        ee.ImageCollection('ECMWF/ERA5_LAND/HOURLY')
+        ee.ImageCollection(ERA5_LAND_HOURLY)
         .filterDate(f'{year}-01-01', f'{year}-12-31')
         .select(['surface_pressure', 'temperature_2m'])
     )
 
+    # Pair every wind hour with the surface hour of the same timestamp in one
+    # join, instead of filtering surface_coll separately for each of the
+    # ~8,760 hours. Hours missing from either collection are dropped.
+    same_hour = ee.Filter.equals(leftField='system:time_start', rightField='system:time_start')
+    paired = ee.ImageCollection(
+        ee.Join.saveFirst('surface').apply(wind_coll, surface_coll, same_hour)
+    )
+
     def per_hour(wind_img):
-        # Get timestamp to match surface data
-        time = wind_img.get('system:time_start')
-        
-        # Get corresponding surface data
-        surface_img = surface_coll.filterDate(
-            ee.Date(time), 
-            ee.Date(time).advance(1, 'hour')
-        ).first()
-        
+        surface_img = ee.Image(wind_img.get('surface'))
+
         u = wind_img.select('u_component_of_wind_100m')
         v = wind_img.select('v_component_of_wind_100m')
         T = surface_img.select('temperature_2m')  # K
@@ -332,7 +523,7 @@ def get_wind_power_density_image(year: int = 2022):
         pd = rho.multiply(speed.pow(3)).multiply(0.5).rename('power_density')
         return pd
 
-    hourly_pd = wind_coll.map(per_hour)
+    hourly_pd = paired.map(per_hour)
     return hourly_pd.mean().rename('power_density')
 
 
@@ -340,6 +531,7 @@ def get_wind_power_density_image(year: int = 2022):
 # LAND COVER
 # ---------------------------------------------------------
 
+@requires_ee
 def get_landcover_image(year: int = 2021):
     """
     ZONE:
@@ -358,7 +550,7 @@ def get_landcover_image(year: int = 2021):
         - Use with frequencyHistogram() reducer to get class distribution
         - Class values map to WORLD_COVER_CLASSES dictionary
     """
-    return ee.Image(f'ESA/WorldCover/v200/{year}').select('Map')
+    return ee.Image(f'{ESA_WORLDCOVER}/{year}').select('Map')
 
 
 WORLD_COVER_CLASSES = {
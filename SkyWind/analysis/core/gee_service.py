@@ -1,15 +1,48 @@
+import math
+import time
+from collections import defaultdict, namedtuple
+from dataclasses import replace
+
 import ee
-from analysis.models import Zone, RegionGrid
+import numpy as np
+from django.conf import settings
+from analysis.models import Zone, RegionGrid, ZoneMetricHistory
 from analysis.core.gee_data import (
+    ERA5_HOURLY,
+    ERA5_LAND_HOURLY,
+    COPERNICUS_DEM,
+    ESA_WORLDCOVER,
+    reduction_spec,
     get_avg_temperature,
+    get_avg_temperatures,
     get_avg_wind_speeds,
+    get_wind_components_image,
+    get_wind_histogram_image,
     get_dem_layers,
     get_air_density_image,
     get_wind_power_density_image,
     get_landcover_image,
     WORLD_COVER_CLASSES,
 )
+from analysis.core.gee_client import get_info, requires_ee
+from analysis.core.reduction_cache import get_reduction_cache, zone_geometry_key
+from analysis.core.raster_snapshot import SnapshotLayer, bounds_of, get_snapshot, zone_bounds
+from analysis.core.local_rasters import BACKEND_LOCAL, get_backend, point_value, read_layer
 from analysis.core.wind import compute_wind_rose
+from analysis.core.climatology import history_row_values, parse_years, summarize
+from analysis.core.freshness import (
+    DEFAULT_YEAR, WriteBuffer, bulk_save_stamped, current_versions, stale_region_metrics, stale_zone_metrics,
+)
+from analysis.core.pipeline import Step, run_steps
+from analysis.core.wind_distribution import (
+    WIND_HIST_BANDS, compact, fit_weibull, histogram_matrix, merge_histograms,
+)
+from analysis.core.scoring import HARD_EXCLUSION_CLASSES, LAND_SUITABILITY_SCORES, land_matrix, score, score_arrays
+from analysis.core.global_lattice import adopt_cell_metrics
+from analysis.core.metric_store import invalidate_store, write_store
+from analysis.core.quadtree import refine_grid
+from analysis.core.request_planner import map_batches, plan_batches
+from analysis.core.spatial import bbox_tuple, corners_of
 
 
 '''
@@ -22,6 +55,7 @@ ZONE:
     - min_alt, max_alt, roughness -> compute_altitude_roughness_dem()
     - air_density -> compute_air_density()
     - power_avg -> compute_WIND_power_density()
+    - wind_histogram, weibull_k, weibull_c -> compute_wind_distribution()
     - land_type -> compute_land_cover()
     - potential -> compute_potential()
 
@@ -33,11 +67,301 @@ REGION:
     - most_suitable_energy_storage -> (not implemented)
 '''
 
+# ---------------------------------------------------------
+# RESULT PARSING (shared by per-step and combined modes)
+# ---------------------------------------------------------
+
+# Zone fields written by each step. Steps save only their own fields, so
+# independent steps can run concurrently on the same Zone instances and a
+# WriteBuffer collecting several steps writes only what they changed.
+WIND_FIELDS = ["avg_wind_speed", "wind_direction"]
+DEM_FIELDS = ["min_alt", "max_alt", "roughness"]
+AIR_DENSITY_FIELDS = ["air_density"]
+POWER_DENSITY_FIELDS = ["power_avg"]
+LAND_COVER_FIELDS = ["land_type"]
+CLIMATOLOGY_FIELDS = WIND_FIELDS + AIR_DENSITY_FIELDS + POWER_DENSITY_FIELDS
+POTENTIAL_FIELDS = ["potential"]
+WIND_DISTRIBUTION_FIELDS = ["wind_histogram", "weibull_k", "weibull_c"]
+ZONE_DATA_FIELDS = WIND_FIELDS + DEM_FIELDS + AIR_DENSITY_FIELDS + POWER_DENSITY_FIELDS + LAND_COVER_FIELDS
+REGION_SUMMARY_FIELDS = ["wind_rose", "avg_potential", "rating"]
+
+# Freshness metrics (see freshness.py) written by steps 2-6
+ATMOSPHERE_METRICS = ["wind", "air_density", "power_density"]
+ZONE_DATA_METRICS = ATMOSPHERE_METRICS + ["terrain", "land_cover"]
+
+# Reductions of steps 2-6 and the metrics / fields each one writes
+ZONE_LAYERS = ("terrain", "atmosphere", "land_cover")
+LAYER_METRICS = {"terrain": ["terrain"], "atmosphere": ATMOSPHERE_METRICS, "land_cover": ["land_cover"]}
+LAYER_FIELDS = {"terrain": DEM_FIELDS, "atmosphere": CLIMATOLOGY_FIELDS, "land_cover": LAND_COVER_FIELDS}
+
+
+def zone_layers(years=None) -> tuple:
+    """
+    Layers steps 2-6 reduce: in multi-year mode climatology writes the
+    atmospheric metrics, so the single-year atmosphere is left out.
+    """
+    return tuple(name for name in ZONE_LAYERS if not (years and name == "atmosphere"))
+
+
+def _save_layers(zones, layers, year, writes):
+    """Stamp and save the metrics / fields of `layers` (steps 2-6)."""
+    bulk_save_stamped(
+        zones,
+        [m for name in layers for m in LAYER_METRICS[name]],
+        [f for name in layers for f in LAYER_FIELDS[name]],
+        current_versions([year]),
+        writes=writes,
+    )
+
+
+@requires_ee
+def _dem_reducer():
+    """mean + min/max + stdDev on shared inputs (elevation_min, tri_stdDev, ...)."""
+    return (
+        ee.Reducer.mean()
+        .combine(ee.Reducer.minMax(), sharedInputs=True)
+        .combine(ee.Reducer.stdDev(), sharedInputs=True)
+    )
+
+
+def _apply_dem(z, props):
+    z.min_alt = round(float(props.get("elevation_min") or 0.0), 2)
+    z.max_alt = round(float(props.get("elevation_max") or 0.0), 2)
+    z.roughness = round(float(props.get("tri_stdDev") or 0.0), 2)
+
+
+def _apply_air_density(z, value):
+    z.air_density = round(float(value or 0.0), 3)
+
+
+def _apply_power_density(z, value):
+    z.power_avg = round(float(value or 0.0), 1)
+
+
+def _apply_land_cover(z, hist):
+    """Convert a GEE frequency histogram into {label: percentage} on the zone."""
+    if not hist:
+        z.land_type = {}
+        return
+
+    # Convert string keys to int and get counts
+    hist_clean = {}
+    for k, v in hist.items():
+        try:
+            class_id = int(float(k))
+            count = float(v)
+            hist_clean[class_id] = count
+        except (ValueError, TypeError):
+            continue
+
+    if not hist_clean:
+        z.land_type = {}
+        return
+
+    # Calculate total pixels for percentage calculation
+    total_pixels = sum(hist_clean.values())
+    
+    # Build dict with percentages for ALL classes (sorted by percentage descending)
+    land_type_percentages = {}
+    for class_id, count in hist_clean.items():
+        label = WORLD_COVER_CLASSES.get(class_id, f"class_{class_id}")
+        percentage = round((count / total_pixels) * 100, 1)
+        land_type_percentages[label] = percentage
+    
+    # Sort by percentage descending
+    z.land_type = dict(sorted(land_type_percentages.items(), key=lambda x: x[1], reverse=True))
+
+
+@requires_ee
+def build_zone_feature_collection(zones):
+    """
+    Build the zone FeatureCollection (one polygon per zone, tagged with zone_id)
+    and the zone_id → Zone lookup used to route results back.
+    """
+    zone_map = {z.id: z for z in zones}
+    features = []
+    for z in zones:
+        corners = corners_of(z)
+        poly = [[lon, lat] for lat, lon in (corners[c] for c in "ABCDA")]
+        features.append(ee.Feature(
+            ee.Geometry.Polygon([poly]),
+            {"zone_id": z.id}
+        ))
+    return ee.FeatureCollection(features), zone_map
+
+
+# ---------------------------------------------------------
+# CACHED ZONE REDUCTIONS
+# ---------------------------------------------------------
+
+# image / reducer are zero-argument builders, so nothing is sent to (or even
+# built for) Earth Engine when every zone is already in the reduction cache.
+ZoneReduction = namedtuple("ZoneReduction", ["spec", "image", "reducer", "scale"])
+
+
+def terrain_reduction():
+    return ZoneReduction(
+        spec=reduction_spec(
+            [COPERNICUS_DEM], bands=("elevation", "slope", "tri"),
+            reducer="mean+minMax+stdDev", scale=30,
+        ),
+        image=get_dem_layers,
+        reducer=_dem_reducer,
+        scale=30,
+    )
+
+
+def air_density_reduction(year: int = 2022):
+    return ZoneReduction(
+        spec=reduction_spec(
+            [ERA5_LAND_HOURLY], year=year, bands=("mean",), reducer="mean", scale=1000,
+        ),
+        image=lambda: get_air_density_image(year),
+        reducer=lambda: ee.Reducer.mean(),
+        scale=1000,
+    )
+
+
+def power_density_reduction(year: int = 2022):
+    return ZoneReduction(
+        spec=reduction_spec(
+            [ERA5_HOURLY, ERA5_LAND_HOURLY], year=year, bands=("mean",), reducer="mean", scale=1000,
+        ),
+        image=lambda: get_wind_power_density_image(year),
+        reducer=lambda: ee.Reducer.mean(),
+        scale=1000,
+    )
+
+
+def land_cover_reduction(year: int = 2021):
+    return ZoneReduction(
+        spec=reduction_spec(
+            [ESA_WORLDCOVER], year=year, bands=("Map",), reducer="frequencyHistogram", scale=10,
+        ),
+        image=lambda: get_landcover_image(year),
+        reducer=lambda: ee.Reducer.frequencyHistogram(),
+        scale=10,
+    )
+
+
+def wind_histogram_reduction(year: int = 2022):
+    """Hours per 1 m/s wind-speed bin at 1km (see get_wind_histogram_image)."""
+    return ZoneReduction(
+        spec=reduction_spec(
+            [ERA5_HOURLY], year=year, bands=WIND_HIST_BANDS, reducer="fixedHistogram+mean", scale=1000,
+        ),
+        image=lambda: get_wind_histogram_image(year),
+        reducer=lambda: ee.Reducer.mean(),
+        scale=1000,
+    )
+
+
+def atmosphere_reduction(year: int = 2022):
+    """Air density, power density and wind components stacked at 1km."""
+    def image():
+        return (
+            get_air_density_image(year).rename("air_density")
+            .addBands(get_wind_power_density_image(year))
+            .addBands(get_wind_components_image(year))
+        )
+
+    return ZoneReduction(
+        spec=reduction_spec(
+            [ERA5_HOURLY, ERA5_LAND_HOURLY], year=year,
+            bands=("air_density", "power_density", "wind_speed", "weighted_x", "weighted_y"),
+            reducer="mean", scale=1000,
+        ),
+        image=image,
+        reducer=lambda: ee.Reducer.mean(),
+        scale=1000,
+    )
+
+
+def reduce_zones(zones, fc, reductions):
+    """
+    Run several reduceRegions over the same zones, served from the
+    reduction cache where possible.
+
+    Args:
+        zones: list of Zone (A-D loaded)
+        fc: FeatureCollection of all zones (build_zone_feature_collection)
+        reductions: {name: ZoneReduction}
+
+    Returns:
+        {name: {zone_id: properties}}
+
+    Only zones missing from the cache are sent; all reductions with misses
+    go out together in one getInfo() via ee.Dictionary (through gee_client,
+    so transient errors are retried).
+    """
+    cache = get_reduction_cache()
+    geom_keys = {z.id: zone_geometry_key(z) for z in zones}
+
+    results = {}
+    pending = {}
+
+    for name, red in reductions.items():
+        hits = cache.get_many(red.spec, geom_keys.values())
+        results[name] = {zid: hits[g] for zid, g in geom_keys.items() if g in hits}
+
+        missing = [z for z in zones if z.id not in results[name]]
+        if not missing:
+            continue
+
+        sub_fc = fc if len(missing) == len(zones) else build_zone_feature_collection(missing)[0]
+        pending[name] = red.image().reduceRegions(sub_fc, red.reducer(), scale=red.scale)
+
+    if not pending:
+        return results
+
+    if len(pending) == 1:
+        [(name, coll)] = pending.items()
+        fetched = {name: get_info(coll)}
+    else:
+        fetched = get_info(ee.Dictionary(pending))
+
+    for name, reduced in fetched.items():
+        fresh = {}
+        for f in reduced["features"]:
+            props = dict(f["properties"])
+            zid = int(props.pop("zone_id"))
+            if zid not in geom_keys:
+                continue
+            results[name][zid] = props
+            fresh[geom_keys[zid]] = props
+        cache.put_many(reductions[name].spec, fresh)
+
+    return results
+
+
+def reduce_zones_planned(zones, fc, reductions):
+    """
+    reduce_zones() split into request batches (see request_planner.py).
+
+    Zones of several grids may be passed together; they are packed into
+    batches of at most GEE_MAX_ZONES_PER_REQUEST zones, which are reduced
+    in parallel and merged back into {name: {zone_id: properties}}.
+    `fc` is reused when everything fits in one batch, and may be None.
+    """
+    batches = plan_batches(zones)
+    if len(batches) == 1 and fc is not None and len(batches[0]) == len(zones):
+        return reduce_zones(zones, fc, reductions)
+
+    def reduce_batch(batch):
+        return reduce_zones(batch, build_zone_feature_collection(batch)[0], reductions)
+
+    results = {name: {} for name in reductions}
+    for partial in map_batches(reduce_batch, batches):
+        for name, values in partial.items():
+            results[name].update(values)
+    return results
+
+
 # ---------------------------------------------------------
 # ZONE ATTRIBUTES
 # ---------------------------------------------------------
 
-def compute_wind_per_zone(zones):
+def compute_wind_per_zone(zones, writes=None):
     """
     STEP 2: Compute wind speed and direction for each zone.
     
@@ -65,13 +389,10 @@ def compute_wind_per_zone(zones):
         - Direction weighted by v³ to emphasize energy-producing winds
         - ERA5 directly provides 100m wind (no extrapolation needed)
     """
-    centers = []
-    for z in zones:
-        lat = round((z.A.lat + z.B.lat + z.C.lat + z.D.lat) / 4, 5)
-        lon = round((z.A.lon + z.B.lon + z.C.lon + z.D.lon) / 4, 5)
-        centers.append((lat, lon))
+    centers = [(round(lat, 5), round(lon, 5)) for lat, lon in (z.center for z in zones)]
 
     wind_data = get_avg_wind_speeds(centers)
+    versions = current_versions([DEFAULT_YEAR])
 
     for z, (lat, lon) in zip(zones, centers):
         data = wind_data.get((lat, lon))
@@ -87,10 +408,11 @@ def compute_wind_per_zone(zones):
 
             # Keep direction as-is (height doesn't change mean direction much)
             z.wind_direction = round(float(data.get("direction", 0.0) or 0.0), 1)
-        z.save()
+
+    bulk_save_stamped(zones, ["wind"], WIND_FIELDS, versions, writes=writes)
 
 
-def compute_altitude_roughness_dem(zones, fc, zone_map):
+def compute_altitude_roughness_dem(zones, fc, zone_map, writes=None):
     """
     STEP 3: Compute terrain metrics from Digital Elevation Model.
     
@@ -111,28 +433,22 @@ def compute_altitude_roughness_dem(zones, fc, zone_map):
         - Altitude: 0-3000m for most sites
         - Roughness: 0-5 flat, 5-20 gentle hills, >50 mountains
     """
-    dem_img = get_dem_layers()
-    reducer = (
-        ee.Reducer.mean()
-        .combine(ee.Reducer.minMax(), sharedInputs=True)
-        .combine(ee.Reducer.stdDev(), sharedInputs=True)
-    )
-
-    dem = dem_img.reduceRegions(fc, reducer, scale=30).getInfo()
+    dem = reduce_zones_planned(zones, fc, {"terrain": terrain_reduction()})["terrain"]
+    versions = current_versions([DEFAULT_YEAR])
 
-    for f in dem["features"]:
-        props = f["properties"]
-        z = zone_map.get(int(props["zone_id"]))
+    updated = []
+    for zid, props in dem.items():
+        z = zone_map.get(zid)
         if not z:
             continue
 
-        z.min_alt = round(float(props.get("elevation_min") or 0.0), 2)
-        z.max_alt = round(float(props.get("elevation_max") or 0.0), 2)
-        z.roughness = round(float(props.get("tri_stdDev") or 0.0), 2)
-        z.save()
+        _apply_dem(z, props)
+        updated.append(z)
 
+    bulk_save_stamped(updated, ["terrain"], DEM_FIELDS, versions, writes=writes)
 
-def compute_air_density(zones, fc, zone_map):
+
+def compute_air_density(zones, fc, zone_map, writes=None):
     """
     STEP 4: Compute air density using ideal gas law.
 
@@ -152,20 +468,22 @@ def compute_air_density(zones, fc, zone_map):
         - 2000m: ~0.95 kg/m³
         - Higher altitude = lower density = less power
     """
-    img = get_air_density_image()
-    air = img.reduceRegions(fc, ee.Reducer.mean(), scale=1000).getInfo()
+    air = reduce_zones_planned(zones, fc, {"air": air_density_reduction()})["air"]
+    versions = current_versions([DEFAULT_YEAR])
 
-    for f in air["features"]:
-        props = f["properties"]
-        z = zone_map.get(int(props["zone_id"]))
+    updated = []
+    for zid, props in air.items():
+        z = zone_map.get(zid)
         if not z:
             continue
 
-        z.air_density = round(float(props.get("mean") or 0.0), 3)
-        z.save()
+        _apply_air_density(z, props.get("mean"))
+        updated.append(z)
+
+    bulk_save_stamped(updated, ["air_density"], AIR_DENSITY_FIELDS, versions, writes=writes)
 
 
-def compute_WIND_power_density(zones, fc, zone_map):
+def compute_WIND_power_density(zones, fc, zone_map, writes=None):
     """
     STEP 5: Compute wind power density.
      
@@ -185,20 +503,22 @@ def compute_WIND_power_density(zones, fc, zone_map):
     
     Note: Calculated per-hour then averaged to preserve cubic relationship
     """
-    img = get_wind_power_density_image()
-    pw = img.reduceRegions(fc, ee.Reducer.mean(), scale=1000).getInfo()
+    pw = reduce_zones_planned(zones, fc, {"power": power_density_reduction()})["power"]
+    versions = current_versions([DEFAULT_YEAR])
 
-    for f in pw["features"]:
-        props = f["properties"]
-        z = zone_map.get(int(props["zone_id"]))
+    updated = []
+    for zid, props in pw.items():
+        z = zone_map.get(zid)
         if not z:
             continue
 
-        z.power_avg = round(float(props.get("mean") or 0.0), 1)
-        z.save()
+        _apply_power_density(z, props.get("mean"))
+        updated.append(z)
 
+    bulk_save_stamped(updated, ["power_density"], POWER_DENSITY_FIELDS, versions, writes=writes)
 
-def compute_land_cover(zones, fc, zone_map):
+
+def compute_land_cover(zones, fc, zone_map, writes=None):
     """
     STEP 6: Classify land cover type with percentages.
     
@@ -217,81 +537,373 @@ def compute_land_cover(zones, fc, zone_map):
     
     Method: Frequency histogram → calculate percentage for each class
     """
-    img = get_landcover_image()
-    lc = img.reduceRegions(fc, ee.Reducer.frequencyHistogram(), scale=10).getInfo()
+    lc = reduce_zones_planned(zones, fc, {"land_cover": land_cover_reduction()})["land_cover"]
+    versions = current_versions([DEFAULT_YEAR])
 
-    for feat in lc["features"]:
-        props = feat["properties"]
-        z = zone_map.get(int(props["zone_id"]))
+    updated = []
+    for zid, props in lc.items():
+        z = zone_map.get(zid)
         if not z:
             continue
 
-        hist = props.get("histogram")
-        if not hist:
-            z.land_type = {}
-            z.save()
+        _apply_land_cover(z, props.get("histogram"))
+        updated.append(z)
+
+    bulk_save_stamped(updated, ["land_cover"], LAND_COVER_FIELDS, versions, writes=writes)
+
+
+def compute_zone_metrics_combined(zones, fc, zone_map, year: int = 2022, writes=None, layers=ZONE_LAYERS):
+    """
+    STEPS 2-6 (combined): wind, DEM, air density, power density and land cover
+    in a single Earth Engine round trip.
+
+    The bands are stacked per native scale, because one reduceRegions call can
+    only use one scale:
+        - terrain (30m):    elevation, slope, tri   → mean + minMax + stdDev
+        - atmosphere (1km): air_density, power_density, wind_speed,
+                            weighted_x, weighted_y  → mean
+        - land cover (10m): Map                     → frequencyHistogram
+
+    The three reductions are wrapped in one ee.Dictionary, so the server
+    evaluates them as a single job and the zone FeatureCollection is sent once.
+    Zones already in the reduction cache are left out of the request, and
+    large zone lists (or zones of several grids) are split into request
+    batches by reduce_zones_planned.
+
+    Results are identical to the per-step functions except for wind, which is
+    averaged over the zone polygon instead of sampled at the zone center.
+    The direction is rebuilt from the mean power-weighted components, so it
+    stays correct across the 0°/360° wrap.
+
+    layers: the reductions to run (see zone_layers); only their metrics
+    are written.
+    """
+    reductions = {
+        "terrain": terrain_reduction,
+        "atmosphere": lambda: atmosphere_reduction(year),
+        "land_cover": land_cover_reduction,
+    }
+    batch = reduce_zones_planned(zones, fc, {name: reductions[name]() for name in layers})
+
+    _apply_zone_batch(zone_map, batch)
+
+    _save_layers(zones, layers, year, writes)
+
+
+def _apply_zone_batch(zone_map, batch):
+    """Write {"terrain", "atmosphere", "land_cover"} results (any of them) onto the zones."""
+    for zid, props in batch.get("terrain", {}).items():
+        z = zone_map.get(zid)
+        if z:
+            _apply_dem(z, props)
+
+    for zid, props in batch.get("atmosphere", {}).items():
+        z = zone_map.get(zid)
+        if not z:
             continue
 
-        # Convert string keys to int and get counts
-        hist_clean = {}
-        for k, v in hist.items():
-            try:
-                class_id = int(float(k))
-                count = float(v)
-                hist_clean[class_id] = count
-            except (ValueError, TypeError):
-                continue
+        _apply_air_density(z, props.get("air_density"))
+        _apply_power_density(z, props.get("power_density"))
+
+        speed = props.get("wind_speed")
+        wx = props.get("weighted_x")
+        wy = props.get("weighted_y")
+        z.avg_wind_speed = round(float(speed or 0.0), 2)
+        if wx is None or wy is None:
+            z.wind_direction = 0.0
+        else:
+            z.wind_direction = round(math.degrees(math.atan2(wy, wx)) % 360, 1)
+
+    for zid, props in batch.get("land_cover", {}).items():
+        z = zone_map.get(zid)
+        if z:
+            _apply_land_cover(z, props.get("histogram"))
+
+
+# ---------------------------------------------------------
+# REGION RASTER SNAPSHOTS
+# ---------------------------------------------------------
+
+def snapshot_layers(year: int = 2022):
+    """
+    The three rasters needed for steps 2-6, at the combined-mode scales,
+    and the wind-speed histogram bands of step 5b.
+    """
+    terrain = terrain_reduction()
+    atmosphere = atmosphere_reduction(year)
+    land_cover = land_cover_reduction()
+    wind_histogram = wind_histogram_reduction(year)
+
+    return {
+        "terrain": SnapshotLayer(
+            name="terrain",
+            spec=replace(terrain.spec, bands=("elevation", "tri"), reducer="snapshot"),
+            image=terrain.image,
+            dtype="float32",
+        ),
+        "atmosphere": SnapshotLayer(
+            name="atmosphere",
+            spec=replace(atmosphere.spec, reducer="snapshot"),
+            image=atmosphere.image,
+            dtype="float32",
+        ),
+        "land_cover": SnapshotLayer(
+            name="land_cover",
+            spec=replace(land_cover.spec, reducer="snapshot"),
+            image=land_cover.image,
+            dtype="uint8",
+        ),
+        "wind_histogram": SnapshotLayer(
+            name="wind_histogram",
+            spec=replace(wind_histogram.spec, reducer="snapshot"),
+            image=wind_histogram.image,
+            dtype="float32",
+        ),
+    }
 
-        if not hist_clean:
-            z.land_type = {}
-            z.save()
+
+def region_rasters(bounds, year: int = 2022, layers=ZONE_LAYERS):
+    """
+    {"terrain", "atmosphere", "land_cover"} RasterSnapshots over `bounds`
+    (those of `layers`), from Earth Engine snapshots or local staged
+    files (RASTER_BACKEND).
+    """
+    return {name: region_raster(name, bounds, year) for name in layers}
+
+
+def region_raster(name, bounds, year: int = 2022):
+    """One of the snapshot layers over `bounds`, from the configured backend."""
+    layer = snapshot_layers(year)[name]
+    if get_backend() == BACKEND_LOCAL:
+        return read_layer(layer, bounds)
+    return get_snapshot(layer, bounds)
+
+
+def _finite(value):
+    """NumPy statistic → float, or None for zones without valid pixels."""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def grid_bounds(grid: RegionGrid):
+    box = bbox_tuple(grid)
+    if box is not None:
+        return box
+    return bounds_of([
+        (grid.A.lat, grid.A.lon),
+        (grid.B.lat, grid.B.lon),
+        (grid.C.lat, grid.C.lon),
+        (grid.D.lat, grid.D.lon),
+    ])
+
+
+def compute_zone_metrics_snapshot(zones, zone_map, bounds, year: int = 2022, writes=None, layers=ZONE_LAYERS):
+    """
+    STEPS 2-6 (snapshot): same results as compute_zone_metrics_combined,
+    computed locally from the region's raster snapshots.
+
+    The first call for a region downloads its terrain, atmosphere and land
+    cover rasters (see raster_snapshot.py); every later call – any
+    zones_per_edge, any rescoring – runs without Earth Engine. With the
+    local backend the rasters are read from staged files instead.
+
+    layers: the rasters to read (see zone_layers); only their metrics are
+    written.
+    """
+    rasters = region_rasters(bounds, year, layers)
+
+    bounds = [zone_bounds(z) for z in zones]
+    batch = {}
+
+    if "terrain" in rasters:
+        terrain = rasters["terrain"]
+        t = terrain.zonal(bounds)
+        elevation = terrain.band("elevation")
+        elev_min, elev_max = t.min(elevation), t.max(elevation)
+        tri_std = t.std(terrain.band("tri"))
+        batch["terrain"] = {
+            z.id: {
+                "elevation_min": _finite(elev_min[i]),
+                "elevation_max": _finite(elev_max[i]),
+                "tri_stdDev": _finite(tri_std[i]),
+            }
+            for i, z in enumerate(zones)
+        }
+
+    if "atmosphere" in rasters:
+        atmosphere = rasters["atmosphere"]
+        a = atmosphere.zonal(bounds)
+        means = {band: a.mean(atmosphere.band(band)) for band in atmosphere.bands}
+        batch["atmosphere"] = {
+            z.id: {band: _finite(m[i]) for band, m in means.items()} for i, z in enumerate(zones)
+        }
+
+    if "land_cover" in rasters:
+        land_cover = rasters["land_cover"]
+        hists = land_cover.zonal(bounds).histogram(land_cover.band("Map"))
+        batch["land_cover"] = {z.id: {"histogram": hists[i]} for i, z in enumerate(zones)}
+
+    _apply_zone_batch(zone_map, batch)
+
+    _save_layers(zones, layers, year, writes)
+
+
+# ---------------------------------------------------------
+# MULTI-YEAR CLIMATOLOGY
+# ---------------------------------------------------------
+
+def _atmosphere_for_year(zones, year: int, bounds=None):
+    """
+    {zone_id: atmosphere properties} for one year.
+
+    With `bounds` the values come from the region's atmosphere raster
+    (snapshot or local backend), otherwise from a cached reduceRegions.
+    """
+    if bounds is not None:
+        atmosphere = region_raster("atmosphere", bounds, year)
+        index = atmosphere.zonal([zone_bounds(z) for z in zones])
+        means = {band: index.mean(atmosphere.band(band)) for band in atmosphere.bands}
+        return {
+            z.id: {band: _finite(m[i]) for band, m in means.items()}
+            for i, z in enumerate(zones)
+        }
+
+    return reduce_zones_planned(zones, None, {"atmosphere": atmosphere_reduction(year)})["atmosphere"]
+
+
+def compute_zone_history(zones, years, bounds=None):
+    """
+    Make sure every (zone, year) has a ZoneMetricHistory row.
+
+    Only the missing (zone, year) pairs are computed – adding a year to an
+    existing history computes that year alone. Returns {zone_id: [rows]}.
+    """
+    existing = set(
+        ZoneMetricHistory.objects
+        .filter(zone__in=zones, year__in=years)
+        .values_list("zone_id", "year")
+    )
+
+    new_rows = []
+    for year in years:
+        missing = [z for z in zones if (z.id, year) not in existing]
+        if not missing:
             continue
 
-        # Calculate total pixels for percentage calculation
-        total_pixels = sum(hist_clean.values())
-        
-        # Build dict with percentages for ALL classes (sorted by percentage descending)
-        land_type_percentages = {}
-        for class_id, count in hist_clean.items():
-            label = WORLD_COVER_CLASSES.get(class_id, f"class_{class_id}")
-            percentage = round((count / total_pixels) * 100, 1)
-            land_type_percentages[label] = percentage
-        
-        # Sort by percentage descending
-        z.land_type = dict(sorted(land_type_percentages.items(), key=lambda x: x[1], reverse=True))
-        z.save()
+        for zid, props in _atmosphere_for_year(missing, year, bounds).items():
+            new_rows.append(ZoneMetricHistory(zone_id=zid, year=year, **history_row_values(props)))
+
+    ZoneMetricHistory.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+    history = defaultdict(list)
+    for row in ZoneMetricHistory.objects.filter(zone__in=zones, year__in=years):
+        history[row.zone_id].append(row)
+    return history
+
+
+def compute_climatology(zones, years, bounds=None, writes=None):
+    """
+    STEP 6b (multi-year mode): replace the single-year atmospheric metrics
+    with climatological means over `years`.
+
+    What:
+        - avg_wind_speed, air_density, power_avg: mean of the yearly values
+        - wind_direction: from the mean power-weighted components
+
+    Why:
+        - a single year can be unusually windy or calm (±10% in power is
+          common); siting decisions need the long-term resource
+
+    Per-year values are kept in ZoneMetricHistory and reused on later runs.
+    """
+    history = compute_zone_history(zones, years, bounds)
+
+    updated = []
+    for z in zones:
+        rows = history.get(z.id)
+        if not rows:
+            continue
+
+        clim = summarize(rows)
+        z.avg_wind_speed = clim["avg_wind_speed"]
+        z.wind_direction = clim["wind_direction"]
+        z.air_density = clim["air_density"]
+        z.power_avg = clim["power_avg"]
+        updated.append(z)
+
+    bulk_save_stamped(updated, ATMOSPHERE_METRICS, CLIMATOLOGY_FIELDS, current_versions(years), writes=writes)
 
 
 # ---------------------------------------------------------
-# LAND SUITABILITY SCORING
+# WIND DISTRIBUTION
 # ---------------------------------------------------------
 
-# Suitability scores for each ESA WorldCover land class
-# Scale: 0.0 (completely unsuitable) to 1.0 (ideal for wind farms)
-LAND_SUITABILITY_SCORES = {
-    "Grassland": 1.0,           # Open, ideal terrain
-    "Bare / sparse": 1.0,       # Open, minimal vegetation
-    "Cropland": 0.9,            # Generally usable, some constraints
-    "Shrubland": 1.0,           # Open, suitable for development
-    "Tree cover": 0.4,          # Clearing/environment issues, access difficulties
-    "Moss / lichen": 0.4,       # Tundra-like, fragile soils
-    "Built-up": 0.0,            # Hard exclusion - urban areas
-    "Permanent water": 0.0,     # Hard exclusion - water bodies
-    "Herbaceous wetland": 0.0,  # Hard exclusion - protected wetlands
-    "Snow / ice": 0.0,          # Hard exclusion - permanent ice
-    "Mangroves": 0.0,           # Hard exclusion - protected coastal
-}
-
-# Hard exclusion classes (score = 0.0)
-HARD_EXCLUSION_CLASSES = {
-    "Built-up",
-    "Permanent water",
-    "Herbaceous wetland",
-    "Snow / ice",
-    "Mangroves",
-}
+def _histograms_for_years(zones, years, bounds=None):
+    """
+    [(zones × bins) hour counts] for each year.
+
+    With `bounds` the counts come from the region's histogram raster
+    (snapshot or local backend). Otherwise every year is a cached
+    reduceRegions, and the years missing from the cache go out together
+    in one getInfo() per request batch.
+    """
+    if bounds is not None:
+        per_year = []
+        for year in years:
+            raster = region_raster("wind_histogram", bounds, year)
+            index = raster.zonal([zone_bounds(z) for z in zones])
+            per_year.append(np.nan_to_num(
+                np.column_stack([index.mean(raster.band(band)) for band in WIND_HIST_BANDS])
+            ))
+        return per_year
+
+    reduced = reduce_zones_planned(zones, None, {str(y): wind_histogram_reduction(y) for y in years})
+    return [
+        histogram_matrix([
+            [(reduced[str(y)].get(z.id) or {}).get(band) for band in WIND_HIST_BANDS] for z in zones
+        ])
+        for y in years
+    ]
+
+
+def compute_wind_distribution(zones, years=None, bounds=None, writes=None):
+    """
+    STEP 5b: hourly 100m wind-speed histogram and Weibull k / c per zone.
+
+    What:
+        - wind_histogram: hours per 1 m/s bin, summed over `years`
+          (default: the single default year)
+        - weibull_k, weibull_c: fitted locally, for all zones at once
+          (see wind_distribution.py)
+
+    Why:
+        - the mean speed hides the shape of the distribution: two sites
+          with 7 m/s can differ by 30% in turbine yield
+        - with the histogram stored, yield, hours above cut-in or a refit
+          need no further Earth Engine call
+
+    bounds: read the counts from the region's histogram raster (snapshot
+    or local backend) instead of reducing on the server.
+    """
+    years = years or [DEFAULT_YEAR]
+    counts = merge_histograms(_histograms_for_years(zones, years, bounds))
+    k, c = fit_weibull(counts)
+
+    for i, z in enumerate(zones):
+        z.wind_histogram = compact(counts[i])
+        z.weibull_k = round(float(k[i]), 3) if np.isfinite(k[i]) else None
+        z.weibull_c = round(float(c[i]), 2) if np.isfinite(c[i]) else None
+
+    bulk_save_stamped(zones, ["wind_distribution"], WIND_DISTRIBUTION_FIELDS, current_versions(years), writes=writes)
 
 
+# ---------------------------------------------------------
+# LAND SUITABILITY SCORING
+# ---------------------------------------------------------
+
+# Land-class scores and the scoring formula live in scoring.py (NumPy);
+# the names are kept here for existing imports.
+
 def compute_land_suitability(land_type_dict):
     """
     Calculate land suitability index from land cover composition.
@@ -323,42 +935,11 @@ def compute_land_suitability(land_type_dict):
           buildable portion's quality, and the low fraction naturally reduces
           the final potential through the weighted calculation.
     """
-    if not land_type_dict:
-        return 0.0, 0.0
-    
-    # Convert percentages to fractions
-    total_fraction = 0.0
-    buildable_fraction = 0.0
-    weighted_suitability = 0.0
-    
-    for land_class, percentage in land_type_dict.items():
-        fraction = percentage / 100.0  # Convert percentage to fraction
-        total_fraction += fraction
-        
-        # Get suitability score (default to 0.5 for unknown classes)
-        suitability = LAND_SUITABILITY_SCORES.get(land_class, 0.5)
-        
-        # Track buildable area (non-excluded classes)
-        if land_class not in HARD_EXCLUSION_CLASSES:
-            buildable_fraction += fraction
-            weighted_suitability += fraction * suitability
-    
-    # Calculate land suitability index (normalized over buildable area)
-    # If no buildable area, return 0
-    if buildable_fraction > 0:
-        S_land = weighted_suitability / buildable_fraction
-    else:
-        S_land = 0.0
-    
-    # Natural penalty: multiply by buildable fraction
-    # This way 20% buildable with perfect land (S_land=1.0) gives 0.2 final contribution
-    # More gradual than hard cutoff, but still heavily penalizes unsuitable zones
-    S_land_effective = S_land * buildable_fraction
-    
-    return S_land_effective, buildable_fraction
+    parts = score_arrays([0.0], [0.0], *land_matrix([land_type_dict]))
+    return float(parts["s_land"][0]), float(parts["buildable"][0])
 
 
-def compute_potential(zones):
+def compute_potential(zones, writes=None):
     """
     STEP 7: Calculate overall site suitability score with gradual land assessment.
     
@@ -402,32 +983,27 @@ def compute_potential(zones):
         - Wind resource: 70% (primary driver)
         - Terrain: 30% (construction feasibility)
         - Land: multiplicative factor (site-specific constraints, gradual penalty)
+
+    All zones are scored at once as arrays (scoring.score, default
+    ScoringParams) and written back with a single bulk update.
     """
-    for z in zones:
-        # Wind component (normalized wind power density)
-        wpd = (z.power_avg or 0.0) / 800
-        S_wind = min(1.25, wpd)  # Cap at 1.25 for exceptional sites
-        
-        # Terrain component (smoothness score)
-        S_terrain = 1 - min(1.0, (z.roughness or 0.0) / 50)
-        
-        # Land suitability component (gradual, no hard cutoff)
-        land_types = z.land_type if isinstance(z.land_type, dict) else {}
-        S_land_effective, F_buildable = compute_land_suitability(land_types)
-        
-        # Base score (wind + terrain)
-        S_base = 0.7 * S_wind + 0.3 * S_terrain
-        
-        # Final potential (base score modulated by land suitability)
-        # S_land_effective already includes buildable fraction penalty
-        z.potential = round(100 * S_base * S_land_effective, 1)
-        z.save()
+    if not zones:
+        return
+
+    potentials = score(
+        [z.power_avg or 0.0 for z in zones],
+        [z.roughness or 0.0 for z in zones],
+        [z.land_type for z in zones],
+    )
+    for z, potential in zip(zones, potentials):
+        z.potential = float(potential)
+    bulk_save_stamped(zones, ["potential"], POTENTIAL_FIELDS, writes=writes)
 
 # ---------------------------------------------------------
 # REGION ATTRIBUTES
 # ---------------------------------------------------------
 
-def compute_temperature(region):
+def compute_temperature(region, writes=None):
     """
     STEP 1: Compute average annual temperature at region center.
     
@@ -437,15 +1013,48 @@ def compute_temperature(region):
     What: Mean 2m air temperature over full year (°C)
     Why: Affects air density calculation and equipment performance
     Expected: -50°C to +50°C depending on location
+
+    With the local raster backend the value is read from the staged ERA5
+    annual means (temperature band) instead.
     """ 
-    temp = get_avg_temperature(region.center.lat, region.center.lon)
+    if get_backend() == BACKEND_LOCAL:
+        year = atmosphere_reduction().spec.year
+        temp = point_value("atmosphere", "temperature", region.center.lat, region.center.lon, year=year)
+        # Same fallback as get_avg_temperature for masked pixels
+        temp = round(temp, 2) if temp is not None else 15.0
+    else:
+        temp = get_avg_temperature(region.center.lat, region.center.lon)
     region.avg_temperature = temp
-    region.save()
+    bulk_save_stamped([region], ["temperature"], ["avg_temperature"], writes=writes)
     return temp
 
 
 
-def compute_region_metrics(region, zones):
+def compute_temperatures(regions, writes=None):
+    """
+    STEP 1 for many regions at once: one batched temperature request for
+    all region centers (get_avg_temperatures) instead of one per region.
+
+    Regions sharing a center get the same value. Returns {region_id: °C}.
+    """
+    centers = {r.id: (r.center.lat, r.center.lon) for r in regions}
+
+    if get_backend() == BACKEND_LOCAL:
+        year = atmosphere_reduction().spec.year
+        temps = {}
+        for lat, lon in set(centers.values()):
+            temp = point_value("atmosphere", "temperature", lat, lon, year=year)
+            temps[(lat, lon)] = round(temp, 2) if temp is not None else 15.0
+    else:
+        temps = get_avg_temperatures(list(centers.values()))
+
+    for region in regions:
+        region.avg_temperature = temps[centers[region.id]]
+    bulk_save_stamped(list(regions), ["temperature"], ["avg_temperature"], writes=writes)
+    return {rid: temps[c] for rid, c in centers.items()}
+
+
+def compute_region_metrics(region, zones, writes=None):
     """
     STEP 8: Aggregate zone data to region level.
     
@@ -462,12 +1071,13 @@ def compute_region_metrics(region, zones):
     region.wind_rose = compute_wind_rose(zones)
     region.avg_potential = sum(z.potential for z in zones) / len(zones)
     region.rating = int(region.avg_potential * 10)
-    region.save()
+    bulk_save_stamped([region], ["summary"], REGION_SUMMARY_FIELDS, writes=writes)
 
 # ---------------------------------------------------------
 # FULL PIPELINE
 # ---------------------------------------------------------
-def compute_gee_for_grid(grid: RegionGrid):
+def compute_gee_for_grid(grid: RegionGrid, combined: bool = True, progress=None, snapshot: bool = None,
+                         years=None, force: bool = False, heartbeat=None):
     """
     FULL 8-STEP PIPELINE: Fetch all Google Earth Engine data for a grid.
     
@@ -477,49 +1087,215 @@ def compute_gee_for_grid(grid: RegionGrid):
         3. DEM terrain metrics (per zone)
         4. Air density (per zone)
         5. Wind power density (per zone)
+           5b. Wind-speed histogram + Weibull fit (per zone)
         6. Land cover classification (per zone)
         7. Potential scoring (per zone)
         8. Region-level aggregation
+
+    combined=True (default) runs steps 2-6 as one multi-band reduction
+    (see compute_zone_metrics_combined); combined=False runs them as five
+    separate reductions.
+
+    snapshot=True computes steps 2-6 locally from the region's raster
+    snapshots instead (see compute_zone_metrics_snapshot); None falls back
+    to settings.GEE_SNAPSHOTS_ENABLED. With RASTER_BACKEND = "local" the
+    rasters come from staged files and no step calls Earth Engine.
+
+    years: list of years for multi-year climatology mode (see
+    compute_climatology); None falls back to settings.GEE_CLIMATOLOGY_YEARS,
+    and an empty list keeps the single-year metrics.
+
+    Only stale metrics are refreshed (see freshness.py): each step runs on
+    the zones whose metric is missing, outdated or expired, steps with
+    nothing to do are skipped, and potential / region metrics are redone
+    only where an input changed. force=True recomputes everything.
+
+    Adaptive grids (grid.max_depth > 0, see quadtree.py) are refined after
+    each run – well-scoring zones are split in 4 – and the new children
+    computed, until the tree is stable. Region metrics use the leaves.
+
+    progress: optional callable(step, label) invoked before each step,
+    used by the job queue to report progress.
+    heartbeat: optional callable() invoked between and during steps (see
+    pipeline.run_steps), used by the job queue to detect dead workers.
+
+    The steps run as a dependency graph (see pipeline.py): independent
+    steps – temperature, and in per-step mode wind / DEM / air density /
+    power density / land cover – run concurrently on up to
+    settings.GEE_PIPELINE_WORKERS threads; potential and region metrics
+    wait for their inputs. Returns {step name: seconds} of the steps run
+    (summed over the refinement passes).
+
+    Steps write nothing themselves: their results are collected in a
+    WriteBuffer (see freshness.py) and flushed after the last step, in one
+    transaction with one UPDATE per set of changed fields, chunked
+    by settings.GEE_DB_BATCH_SIZE. The flush is timed as "db_write".
+    The grid's columnar metric store (see metric_store.py) is then
+    rewritten once for the whole run, or dropped when the run fails.
+
+    Zones of grids snapped to the global lattice first copy the metrics
+    other grids already computed for their cells ("shared_cells", see
+    global_lattice.py); only the remaining stale metrics are fetched.
     
     This ensures API returns identical values to fetch_gee_data command.
     """
+    try:
+        timings = _compute_grid(grid, combined, progress, snapshot, years, force, heartbeat=heartbeat)
+
+        for _ in range(grid.max_depth):
+            created, removed = refine_grid(grid)
+            if not created and not removed:
+                break
+            # New children are the only stale zones; a pruned tree still
+            # changes the leaves the region summary is built from
+            rerun = _compute_grid(grid, combined, progress, snapshot, years, summary=True, heartbeat=heartbeat)
+            for name, seconds in rerun.items():
+                timings[name] = timings.get(name, 0.0) + seconds
+    except Exception:
+        # The steps that finished before the failure were written to the
+        # zones: drop the store so the next read rebuilds it from them
+        invalidate_store(grid)
+        raise
+
+    # Columnar copy served by the zone endpoints, once per run
+    if timings or not hasattr(grid, "metric_store"):
+        write_store(grid)
+
+    return timings
+
+
+def _compute_grid(grid, combined, progress, snapshot, years, force=False, summary=False, heartbeat=None):
+    """One pipeline run over the grid's stale metrics (see compute_gee_for_grid)."""
     region = grid.region
+    # Corners and centers are inline on the zone rows (see core/spatial.py)
     zones = list(grid.zones.all())
 
     if not zones:
-        return
+        return {}
 
-    # Step 1: Temperature
-    compute_temperature(region)
+    if snapshot is None:
+        snapshot = getattr(settings, "GEE_SNAPSHOTS_ENABLED", False)
+    if get_backend() == BACKEND_LOCAL:
+        # Staged rasters replace Earth Engine entirely
+        snapshot = True
 
-    # Step 2: Wind
-    compute_wind_per_zone(zones)
+    if years is None:
+        years = parse_years(getattr(settings, "GEE_CLIMATOLOGY_YEARS", ""))
 
-    # Build FeatureCollection for spatial operations
-    zone_map = {z.id: z for z in zones}
-    features = []
-    for z in zones:
-        poly = [
-            [z.A.lon, z.A.lat],
-            [z.B.lon, z.B.lat],
-            [z.C.lon, z.C.lat],
-            [z.D.lon, z.D.lat],
-            [z.A.lon, z.A.lat],
-        ]
-        features.append(ee.Feature(
-            ee.Geometry.Polygon([poly]),
-            {"zone_id": z.id}
+    versions = current_versions(years)
+    stale = {z.id: set(ZONE_DATA_METRICS + ["wind_distribution", "potential"] if force
+                       else stale_zone_metrics(z, versions))
+             for z in zones}
+
+    # Every step adds its results here; they are written at the end, with
+    # the data_state judged against this run's years
+    writes = WriteBuffer(current=versions)
+
+    # Zones of snapped grids first take what other grids already computed
+    # for the same lattice cells (see global_lattice.py)
+    shared_start = time.perf_counter()
+    shared = 0 if force else adopt_cell_metrics(zones, stale, versions, writes)
+    shared_seconds = time.perf_counter() - shared_start
+
+    def stale_for(*metrics):
+        return [z for z in zones if stale[z.id].intersection(metrics)]
+
+    # Single-year atmospheric metrics are not kept in multi-year mode:
+    # climatology writes them, steps 2-6 only reduce the other layers
+    layers = zone_layers(years)
+    direct_metrics = [m for name in layers for m in LAYER_METRICS[name]]
+
+    steps = []
+    zone_steps = []
+    touched = set()
+
+    def add_zone_step(name, number, label, targets, run):
+        if targets:
+            steps.append(Step(name, number, label, lambda: run(targets, writes=writes)))
+            zone_steps.append(name)
+            touched.update(z.id for z in targets)
+
+    if force or "temperature" in stale_region_metrics(region, versions):
+        steps.append(Step("temperature", 1, "Temperature", lambda: compute_temperature(region, writes)))
+
+    if snapshot:
+        # Steps 2-6 from the region rasters (snapshot or local backend)
+        bounds = grid_bounds(grid)
+        add_zone_step(
+            "zone_metrics", 2, "Zone metrics (snapshot)", stale_for(*direct_metrics),
+            lambda targets, writes: compute_zone_metrics_snapshot(
+                targets, {z.id: z for z in targets}, bounds, writes=writes, layers=layers,
+            ),
+        )
+    else:
+        def with_fc(fn, **kwargs):
+            # FeatureCollection of the zones being refreshed, built in the step
+            return lambda targets, writes: fn(targets, *build_zone_feature_collection(targets), writes=writes, **kwargs)
+
+        if combined:
+            # Steps 2-6 in a single round trip
+            add_zone_step(
+                "zone_metrics", 2, "Zone metrics (combined)", stale_for(*direct_metrics),
+                with_fc(compute_zone_metrics_combined, layers=layers),
+            )
+        else:
+            # Steps 2-6 are independent reductions over the same zones
+            if not years:
+                add_zone_step("wind", 2, "Wind", stale_for("wind"), compute_wind_per_zone)
+            add_zone_step("dem", 3, "DEM", stale_for("terrain"), with_fc(compute_altitude_roughness_dem))
+            if not years:
+                add_zone_step("air_density", 4, "Air density", stale_for("air_density"), with_fc(compute_air_density))
+                add_zone_step("power_density", 5, "Power density", stale_for("power_density"),
+                              with_fc(compute_WIND_power_density))
+            add_zone_step("land_cover", 6, "Land cover", stale_for("land_cover"), with_fc(compute_land_cover))
+
+    # Step 5b: Wind-speed distribution – no other step depends on it
+    distribution = stale_for("wind_distribution")
+    if distribution:
+        steps.append(Step(
+            "wind_distribution", "5b", "Wind distribution",
+            lambda: compute_wind_distribution(distribution, years, grid_bounds(grid) if snapshot else None, writes),
         ))
-    fc = ee.FeatureCollection(features)
 
-    # Steps 3-6: Spatial computations
-    compute_altitude_roughness_dem(zones, fc, zone_map)
-    compute_air_density(zones, fc, zone_map)
-    compute_WIND_power_density(zones, fc, zone_map)
-    compute_land_cover(zones, fc, zone_map)
+    if years:
+        # Multi-year means replace the single-year atmospheric metrics,
+        # so they are written after the steps that set them
+        targets = [z for z in zones if z.id in touched or stale[z.id].intersection(ATMOSPHERE_METRICS)]
+        if targets:
+            steps.append(Step(
+                "climatology", "6b", f"Climatology {years[0]}-{years[-1]}",
+                lambda: compute_climatology(targets, years, grid_bounds(grid) if snapshot else None, writes),
+                deps=tuple(zone_steps),
+            ))
+            zone_steps = zone_steps + ["climatology"]
+            touched.update(z.id for z in targets)
 
-    # Step 7: Potential scoring
-    compute_potential(zones)
+    # Step 7: Potential scoring, wherever an input changed
+    rescore = [z for z in zones if z.id in touched or "potential" in stale[z.id]]
+    if rescore:
+        steps.append(Step("potential", 7, "Potential", lambda: compute_potential(rescore, writes), deps=tuple(zone_steps)))
+
+    # Step 8: Region aggregation (over the leaves of an adaptive grid)
+    parents = {z.parent_id for z in zones}
+    leaves = [z for z in zones if z.id not in parents]
+    if steps:
+        steps.append(Step(
+            "region", 8, "Region metrics", lambda: compute_region_metrics(region, leaves, writes),
+            deps=tuple(name for name in ("temperature", "potential") if any(s.name == name for s in steps)),
+        ))
+    elif shared or summary or "summary" in stale_region_metrics(region, versions):
+        steps.append(Step("region", 8, "Region metrics", lambda: compute_region_metrics(region, leaves, writes)))
 
-    # Step 8: Region aggregation
-    compute_region_metrics(region, zones)
+    # One transaction for the whole run; results of the steps that finished
+    # are kept even when a later step fails
+    try:
+        timings = run_steps(steps, progress=progress, heartbeat=heartbeat)
+    finally:
+        start = time.perf_counter()
+        writes.flush()
+        write_seconds = time.perf_counter() - start
+    if shared:
+        timings["shared_cells"] = shared_seconds
+    if steps or shared:
+        timings["db_write"] = write_seconds
+    return timings
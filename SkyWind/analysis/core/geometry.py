@@ -9,6 +9,8 @@ It only computes geographical coordinates:
 
     • compute_region_corners()
     • generate_zone_grid()
+    • zone_lattice()
+    • subdivide_zone()
 
 These functions are used by `generate_zones.py` to build RegionGrid and Zone
 instances in the database.
@@ -115,3 +117,45 @@ def generate_zone_grid(A, B, C, D, n: int):
         grid.append(row)
 
     return grid
+
+
+def zone_lattice(A, B, C, D, n: int):
+    """
+    The same n×n grid as generate_zone_grid(), as shared corner points.
+
+    Adjacent zones share corners, so the grid has only (n+1)² distinct
+    points. Returns (points, cells):
+
+        points: (n+1) rows × (n+1) columns of (lat, lon), row 0 on the
+                D-A edge, column 0 on the D-C edge
+        cells:  n×n zones in row order as {"A": (row, col), ...} indexes
+                into points
+    """
+    D_lat, D_lon = D
+    step_lat = (B[0] - A[0]) / n     # top to bottom
+    step_lon = (A[1] - D[1]) / n     # left to right
+
+    points = [
+        [(D_lat + i * step_lat, D_lon + j * step_lon) for j in range(n + 1)]
+        for i in range(n + 1)
+    ]
+    cells = [
+        {"A": (i, j + 1), "B": (i + 1, j + 1), "C": (i + 1, j), "D": (i, j)}
+        for i in range(n)
+        for j in range(n)
+    ]
+    return points, cells
+
+
+# ---------------------------------------------------------
+# QUADTREE SUBDIVISION
+# ---------------------------------------------------------
+
+def subdivide_zone(A, B, C, D):
+    """
+    Split one zone into its 4 quadtree children (same corner convention).
+
+    Returns a list of 4 dicts in row order: top-left, top-right,
+    bottom-left, bottom-right.
+    """
+    return [cell for row in generate_zone_grid(A, B, C, D, 2) for cell in row]
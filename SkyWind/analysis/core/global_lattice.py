@@ -0,0 +1,226 @@
+"""
+global_lattice.py
+-----------------
+
+A global zone lattice, so overlapping regions share zone cells.
+
+compute_region builds a lattice around whatever center is clicked: two
+regions 300 m apart get almost identical zones that are computed twice.
+With snapping, zone edges lie on one worldwide lattice per zone size and
+every zone carries the stable id of its cell; regions covering the same
+ground reference the same cells, and a cell's metrics are computed once
+and copied into every other zone of that cell.
+
+Tiers: cell sizes BASE_CELL_KM · 2^level (125 m … 32 km), so a quadtree
+child of a level-L cell is a level L-1 cell. Latitude steps use 0.009°
+per km like geometry.py; longitude steps are widened by 1 / cos(lat)
+taken at the middle of a BAND_DEG latitude band, so cells are constant
+in degrees within a band. A region uses the band of its center.
+
+Cell id: "level:band:row:col", row counted northwards from the equator
+and col eastwards from the prime meridian, in cells.
+
+    • level_for()         – tier closest to a zone size (km)
+    • snap_region()       – snapped center, corners and size of a region
+    • lattice_corners()   – corners of a snapped grid from its origin cell
+    • snapped_lattice()   – its zones like geometry.zone_lattice(), with
+                            cell ids
+    • subdivide_cell()    – the 4 quadtree children of a cell
+    • parse_cell() / cell_id()
+    • adopt_cell_metrics() – copy fresh metrics of the same cell computed
+                            by another grid
+
+This module does not import Earth Engine.
+"""
+
+import math
+from collections import namedtuple
+
+from analysis.core.freshness import ZONE_METRICS, data_state, stale_zone_metrics
+from analysis.models import Zone
+
+
+# Smallest cell: 125 m; largest: 125 m · 2^8 = 32 km
+BASE_CELL_KM = 0.125
+MAX_LEVEL = 8
+
+# Same conversion as geometry.compute_region_corners
+DEG_PER_KM = 0.009
+
+# Latitude band sharing one longitude step
+BAND_DEG = 1.0
+
+SnappedRegion = namedtuple(
+    "SnappedRegion", ["level", "band", "row", "col", "n", "center", "corners", "side_km", "origin"],
+)
+
+
+# ---------------------------------------------------------
+# CELLS
+# ---------------------------------------------------------
+
+def cell_id(level: int, band: int, row: int, col: int) -> str:
+    return f"{level}:{band}:{row}:{col}"
+
+
+def parse_cell(cell: str):
+    """(level, band, row, col) of a cell id."""
+    level, band, row, col = (int(part) for part in cell.split(":"))
+    return level, band, row, col
+
+
+def cell_km(level: int) -> float:
+    return BASE_CELL_KM * 2 ** level
+
+
+def level_for(zone_km: float) -> int:
+    """Tier whose cell size is closest to `zone_km` (log scale)."""
+    level = round(math.log2(zone_km / BASE_CELL_KM)) if zone_km > 0 else 0
+    return min(max(level, 0), MAX_LEVEL)
+
+
+def band_of(lat: float) -> int:
+    return math.floor(lat / BAND_DEG)
+
+
+def cell_steps(level: int, band: int):
+    """(lat_step, lon_step) in degrees of the cells of a tier and band."""
+    lat_step = cell_km(level) * DEG_PER_KM
+    lon_step = lat_step / math.cos(math.radians((band + 0.5) * BAND_DEG))
+    return lat_step, lon_step
+
+
+# ---------------------------------------------------------
+# REGIONS
+# ---------------------------------------------------------
+
+def snap_region(center_lat: float, center_lon: float, side_km: float, n: int) -> SnappedRegion:
+    """
+    The n×n block of lattice cells closest to a region of `side_km`
+    around (center_lat, center_lon). Cell size is the tier closest to
+    side_km / n, so the snapped side is n · cell_km(level).
+    """
+    level = level_for(side_km / n)
+    band = band_of(center_lat)
+    lat_step, lon_step = cell_steps(level, band)
+
+    # South-west cell of the block
+    row = round(center_lat / lat_step - n / 2)
+    col = round(center_lon / lon_step - n / 2)
+
+    origin = cell_id(level, band, row, col)
+    corners = lattice_corners(origin, n)
+    (north, east), (south, west) = corners["A"], corners["C"]
+
+    return SnappedRegion(
+        level=level, band=band, row=row, col=col, n=n,
+        center=((south + north) / 2, (west + east) / 2),
+        corners=corners,
+        side_km=n * cell_km(level),
+        origin=origin,
+    )
+
+
+def lattice_corners(origin: str, n: int) -> dict:
+    """
+    Corners A-D of the n×n block whose south-west cell is `origin` – the
+    corners of a snapped grid (RegionGrid.lattice_origin) and its region.
+    """
+    level, band, row, col = parse_cell(origin)
+    lat_step, lon_step = cell_steps(level, band)
+    south, north = row * lat_step, (row + n) * lat_step
+    west, east = col * lon_step, (col + n) * lon_step
+    return {"A": (north, east), "B": (south, east), "C": (south, west), "D": (north, west)}
+
+
+def snapped_lattice(level: int, band: int, row: int, col: int, n: int):
+    """
+    The n×n cells whose south-west cell is (row, col), in the layout of
+    geometry.zone_lattice(): returns (points, cells, cell_ids), points
+    row 0 on the north edge, cells in row order from the north-west.
+    """
+    lat_step, lon_step = cell_steps(level, band)
+    points = [
+        [((row + n - i) * lat_step, (col + j) * lon_step) for j in range(n + 1)]
+        for i in range(n + 1)
+    ]
+    cells = [
+        {"A": (i, j + 1), "B": (i + 1, j + 1), "C": (i + 1, j), "D": (i, j)}
+        for i in range(n)
+        for j in range(n)
+    ]
+    cell_ids = [cell_id(level, band, row + n - 1 - i, col + j) for i in range(n) for j in range(n)]
+    return points, cells, cell_ids
+
+
+def subdivide_cell(cell: str):
+    """
+    The 4 quadtree children of a cell – the cells of the tier below – as
+    (corners, cell id) in geometry.subdivide_zone() order (top-left,
+    top-right, bottom-left, bottom-right); None for a level 0 cell.
+    """
+    level, band, row, col = parse_cell(cell)
+    if level == 0:
+        return None
+    points, cells, cell_ids = snapped_lattice(level - 1, band, 2 * row, 2 * col, 2)
+    return [
+        ({corner: points[i][j] for corner, (i, j) in corners.items()}, child)
+        for corners, child in zip(cells, cell_ids)
+    ]
+
+
+# ---------------------------------------------------------
+# SHARED CELL METRICS
+# ---------------------------------------------------------
+
+def adopt_cell_metrics(zones, stale, versions, writes) -> int:
+    """
+    Copy into `zones` the metrics a zone of another grid already holds,
+    fresh, for the same cell: values and freshness entries (computed_at
+    and version of the original computation).
+
+    stale: {zone id: set of stale metrics}, updated in place so the
+    pipeline only computes what no other grid has. Copied zones are added
+    to the WriteBuffer `writes`. Per-year history rows (multi-year mode)
+    stay with the zone that computed them. Returns the number of zones
+    that adopted a metric.
+    """
+    wanted = {z.cell_id for z in zones if z.cell_id and stale[z.id]}
+    if not wanted:
+        return 0
+
+    fields = [field for metric_fields in ZONE_METRICS.values() for field in metric_fields]
+    donors = {}
+    candidates = (
+        Zone.objects
+        .filter(cell_id__in=wanted)
+        .exclude(grid_id__in={z.grid_id for z in zones})
+        .only("cell_id", "freshness", *fields)
+    )
+    for donor in candidates:
+        fresh = set(ZONE_METRICS) - set(stale_zone_metrics(donor, versions))
+        if len(fresh) > len(donors.get(donor.cell_id, (None, set()))[1]):
+            donors[donor.cell_id] = (donor, fresh)
+
+    adopted = 0
+    for z in zones:
+        donor, fresh = donors.get(z.cell_id, (None, set()))
+        metrics = stale[z.id] & fresh
+        if not metrics:
+            continue
+
+        freshness = dict(z.freshness or {})
+        update_fields = []
+        for metric in metrics:
+            for field in ZONE_METRICS[metric]:
+                setattr(z, field, getattr(donor, field))
+                update_fields.append(field)
+            freshness[metric] = donor.freshness[metric]
+        z.freshness = freshness
+        z.data_state = data_state(freshness, ZONE_METRICS, versions)
+
+        stale[z.id] = set(stale_zone_metrics(z, versions))
+        writes.add_copied([z], update_fields)
+        adopted += 1
+
+    return adopted
@@ -0,0 +1,221 @@
+"""
+job_queue.py
+------------
+
+Postgres-backed job queue for GEE pipeline runs.
+
+Views enqueue a PipelineJob and return immediately; one or more
+`run_pipeline_worker` processes claim jobs and run compute_gee_for_grid().
+
+    • enqueue_grid_refresh()  – add (or reuse) a job for a grid
+    • claim_next_job()        – SELECT ... FOR UPDATE SKIP LOCKED
+    • run_job()               – run the pipeline, record progress/result
+    • release_stale_jobs()    – requeue jobs of workers that died mid-run
+                                (no heartbeat for a while)
+    • job_to_dict()           – JSON payload for the job-status endpoint
+
+Claiming uses SKIP LOCKED, so several worker nodes can poll the same table
+without blocking each other or running a job twice. Jobs are served by
+priority (interactive before bulk), then oldest first.
+
+A running job is alive as long as its worker refreshes heartbeat_at (on
+every progress report, between steps and periodically during long ones);
+runs longer than the stale window are never requeued for their age alone.
+A worker only records progress and the outcome of a job it still holds,
+so a job requeued from under it is left to its new worker.
+"""
+
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from analysis.core.pipeline import main_step
+from analysis.models import PipelineJob
+
+
+MAX_ATTEMPTS = 3
+
+
+def default_worker_id():
+    """hostname:pid – identifies which worker holds a job."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ---------------------------------------------------------
+# ENQUEUE
+# ---------------------------------------------------------
+
+def enqueue_grid_refresh(grid, priority=PipelineJob.PRIORITY_INTERACTIVE):
+    """
+    Queue a pipeline run for `grid` and return the job.
+
+    If the grid already has a pending or running job, that job is returned
+    instead of queueing a duplicate. A pending bulk job is promoted when an
+    interactive request asks for the same grid.
+
+    Two requests racing on a grid without an active job both try to
+    create one; the unique constraint on active jobs lets one win and the
+    other returns the winner's job.
+    """
+    active = PipelineJob.objects.filter(grid=grid, status__in=PipelineJob.ACTIVE_STATUSES)
+
+    with transaction.atomic():
+        job = active.select_for_update().order_by("created_at").first()
+
+        if job is None:
+            try:
+                with transaction.atomic():
+                    return PipelineJob.objects.create(grid=grid, priority=priority)
+            except IntegrityError:
+                job = active.select_for_update().order_by("created_at").first()
+                if job is None:
+                    # The other job already finished: nothing left to race
+                    return PipelineJob.objects.create(grid=grid, priority=priority)
+
+        if job.status == PipelineJob.STATUS_PENDING and priority < job.priority:
+            job.priority = priority
+            job.save(update_fields=["priority"])
+
+        return job
+
+
+# ---------------------------------------------------------
+# CLAIM + RUN
+# ---------------------------------------------------------
+
+def claim_next_job(worker_id=None):
+    """
+    Atomically take the next pending job, or return None if the queue is empty.
+
+    Rows locked by other workers are skipped instead of waited on.
+    """
+    worker_id = worker_id or default_worker_id()
+
+    with transaction.atomic():
+        job = (
+            PipelineJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PipelineJob.STATUS_PENDING)
+            .order_by("priority", "created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = PipelineJob.STATUS_RUNNING
+        job.worker = worker_id
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.heartbeat_at = job.started_at
+        job.step = 0
+        job.step_label = ""
+        job.error = ""
+        job.save(update_fields=[
+            "status", "worker", "attempts", "started_at", "heartbeat_at",
+            "step", "step_label", "error",
+        ])
+        return job
+
+
+def _owned(job):
+    """The job's row while its claiming worker still holds it."""
+    return PipelineJob.objects.filter(pk=job.pk, worker=job.worker, status=PipelineJob.STATUS_RUNNING)
+
+
+def run_job(job):
+    """
+    Run the full pipeline for a claimed job and store the outcome.
+
+    Progress and heartbeats are written with plain UPDATEs (outside the
+    pipeline's own saves) so the status endpoint can report them while the
+    job is running. The outcome is only stored while this worker still
+    holds the job; the returned job is the row as it is then.
+    """
+    from analysis.core.gee_service import compute_gee_for_grid
+
+    def progress(number, label):
+        # step stays 0-8 for the progress ratio; a sub-step ("5b") keeps
+        # its number in the label
+        step = main_step(number)
+        if str(number) != str(step):
+            label = f"{number} {label}"
+        _owned(job).update(step=step, step_label=label, heartbeat_at=timezone.now())
+
+    def heartbeat():
+        _owned(job).update(heartbeat_at=timezone.now())
+
+    try:
+        timings = compute_gee_for_grid(job.grid, progress=progress, heartbeat=heartbeat)
+    except Exception as e:
+        _owned(job).update(
+            status=PipelineJob.STATUS_FAILED,
+            error=f"{e}\n\n{traceback.format_exc()}",
+            finished_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+
+    _owned(job).update(
+        status=PipelineJob.STATUS_DONE,
+        step=job.total_steps,
+        step_label="Done",
+        step_timings={name: round(sec, 3) for name, sec in (timings or {}).items()},
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def release_stale_jobs(older_than=timedelta(minutes=30)):
+    """
+    Put back jobs stuck in 'running' whose worker sent no heartbeat for
+    `older_than` (worker crashed or was killed).
+
+    Jobs that already used MAX_ATTEMPTS are marked failed instead.
+    Returns the number of jobs touched.
+    """
+    cutoff = timezone.now() - older_than
+    stale = PipelineJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=PipelineJob.STATUS_RUNNING,
+    )
+
+    retried = stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=PipelineJob.STATUS_PENDING, worker=""
+    )
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=PipelineJob.STATUS_FAILED,
+        error="Worker stopped responding",
+        finished_at=timezone.now(),
+    )
+    return retried + failed
+
+
+# ---------------------------------------------------------
+# SERIALIZATION
+# ---------------------------------------------------------
+
+def job_to_dict(job):
+    return {
+        "job_id": job.id,
+        "grid_id": job.grid_id,
+        "status": job.status,
+        "priority": job.priority,
+        "step": job.step,
+        "total_steps": job.total_steps,
+        "step_label": job.step_label,
+        "progress": round(job.step / job.total_steps, 2) if job.total_steps else 0.0,
+        "step_timings": job.step_timings,
+        "attempts": job.attempts,
+        "error": job.error.split("\n", 1)[0] if job.error else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "status_url": f"/api/jobs/{job.id}/",
+    }
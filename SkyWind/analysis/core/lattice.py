@@ -0,0 +1,124 @@
+"""
+lattice.py
+----------
+
+Bulk creation of zone corner points and zones.
+
+Creating a grid cell by cell costs four Point get_or_create queries and
+one INSERT per zone – ~500 queries for 10×10, ~50,000 for 100×100 – while
+adjacent zones share corners and only (n+1)² distinct points exist. Here
+a grid is built with a handful of statements whatever its size:
+
+    • upsert_points()      – distinct points inserted with ON CONFLICT DO
+                             NOTHING (unique_lat_lon), then their ids read
+                             back, in batches
+    • create_grid_zones()  – the n×n lattice of a RegionGrid (or its
+                             cells of the global lattice, see
+                             global_lattice.py), one bulk_create of zones
+    • create_zones()       – bulk_create of arbitrary zones (quadtree
+                             children)
+
+Coordinates are rounded to 9 decimals (~1 cm) like every other Point, so
+new zones share points with existing grids and overlapping regions. Each
+zone also gets the bounding box and center of its corners, which every
+later read uses instead of the Points (see core/spatial.py).
+
+This module does not import Earth Engine.
+"""
+
+from django.db.models import Q
+
+from analysis.core.geometry import zone_lattice
+from analysis.core.global_lattice import parse_cell, snapped_lattice
+from analysis.core.spatial import set_geometry
+from analysis.models import Point, Zone
+
+
+BATCH_SIZE = 1000
+
+# ~1 cm, the precision of every stored Point
+POINT_DECIMALS = 9
+
+
+def point_key(lat, lon):
+    return round(lat, POINT_DECIMALS), round(lon, POINT_DECIMALS)
+
+
+def upsert_points(coords, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Make sure a Point exists for every (lat, lon) in `coords`.
+
+    Returns {(lat, lon) rounded: point id}. Existing points are reused;
+    concurrent inserts of the same point are absorbed by the unique
+    constraint.
+    """
+    keys = list(dict.fromkeys(point_key(lat, lon) for lat, lon in coords))
+    ids = {}
+
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        Point.objects.bulk_create(
+            [Point(lat=lat, lon=lon) for lat, lon in batch], ignore_conflicts=True,
+        )
+
+        # lat IN (...) AND lon IN (...) may match a few extra points of
+        # the cross product; they are filtered out below
+        wanted = set(batch)
+        rows = Point.objects.filter(
+            Q(lat__in={lat for lat, _ in batch}) & Q(lon__in={lon for _, lon in batch})
+        ).values_list("lat", "lon", "id")
+        ids.update({(lat, lon): pid for lat, lon, pid in rows if (lat, lon) in wanted})
+
+    return ids
+
+
+def create_zones(zones, batch_size: int = BATCH_SIZE) -> list:
+    """
+    bulk_create unsaved Zones whose corners are given as coordinates.
+
+    zones: list of (Zone without corners, {"A": (lat, lon), ...})
+    Returns the saved zones (with ids on PostgreSQL and SQLite); their
+    corner Points are attached, so reading z.A.lat costs no query, and
+    their bounding box and center are set (see core/spatial.py).
+    """
+    ids = upsert_points([c for _, corners in zones for c in corners.values()], batch_size)
+    points = {key: Point(id=pid, lat=key[0], lon=key[1]) for key, pid in ids.items()}
+
+    objs = []
+    for zone, corners in zones:
+        for corner, (lat, lon) in corners.items():
+            setattr(zone, corner, points[point_key(lat, lon)])
+        set_geometry(zone, [getattr(zone, corner) for corner in corners])
+        objs.append(zone)
+
+    return Zone.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def create_grid_zones(grid, infrastructure, batch_size: int = BATCH_SIZE) -> list:
+    """
+    Create the zones_per_edge × zones_per_edge zones of `grid` inside its
+    corners (zone_index 1… in row order, like generate_zone_grid). Grids
+    snapped to the global lattice get its cells and their ids.
+    """
+    if grid.lattice_origin:
+        points, cells, cell_ids = snapped_lattice(*parse_cell(grid.lattice_origin), grid.zones_per_edge)
+    else:
+        points, cells = zone_lattice(
+            (grid.A.lat, grid.A.lon),
+            (grid.B.lat, grid.B.lon),
+            (grid.C.lat, grid.C.lon),
+            (grid.D.lat, grid.D.lon),
+            grid.zones_per_edge,
+        )
+        cell_ids = [""] * len(cells)
+
+    return create_zones(
+        [
+            (
+                Zone(grid=grid, infrastructure=infrastructure, zone_index=index, cell_id=cell),
+                {corner: points[i][j] for corner, (i, j) in cell_corners.items()},
+            )
+            for index, (cell_corners, cell) in enumerate(zip(cells, cell_ids), start=1)
+        ],
+        batch_size,
+    )
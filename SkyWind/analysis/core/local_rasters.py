@@ -0,0 +1,279 @@
+"""
+local_rasters.py
+----------------
+
+Local raster backend: serve the pipeline's rasters from staged files on
+disk instead of Earth Engine (settings.RASTER_BACKEND = "local").
+
+Layout under settings.LOCAL_RASTER_DIR:
+
+    dem/                    Copernicus GLO-30 tiles      (band: elevation)
+    worldcover/<year>/      ESA WorldCover tiles         (band: Map)
+    era5/<year>/            ERA5 / ERA5-Land annual means (bands: air_density,
+                            power_density, wind_speed, weighted_x,
+                            weighted_y, temperature)
+    era5_hist/<year>/       hourly 100m wind-speed histogram (bands: h00 … h29,
+                            hours per 1 m/s bin)
+
+Each folder holds lat/lon (EPSG:4326) tiles in either format:
+
+    • <name>.npy + <name>.json  – (bands, rows, cols) array with the same
+      sidecar as raster_snapshot.py; opened memory-mapped
+    • <name>.tif               – GeoTIFF read by window (needs rasterio)
+
+`manage.py stage_local_rasters` exports all of them from Earth Engine as NPY
+tiles; the official GLO-30 / WorldCover GeoTIFF tiles can be dropped in
+as they are.
+
+Reads are resampled (nearest neighbour) onto the same pixel grid that
+raster_snapshot.py downloads, so every zone statistic goes through the same
+RasterSnapshot / zonal_stats path whichever backend produced the pixels.
+The terrain ruggedness band (tri) is computed locally from the DEM exactly
+like get_dem_layers(): stdDev in an 11×11 window.
+
+This module does not import Earth Engine.
+"""
+
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from analysis.core.raster_snapshot import DEG_PER_KM, RasterSnapshot, load_raster, pixel_grid
+
+
+BACKEND_GEE = "gee"
+BACKEND_LOCAL = "local"
+
+# Folder of each snapshot layer under LOCAL_RASTER_DIR
+LAYER_FOLDERS = {
+    "terrain": "dem",
+    "land_cover": "worldcover/{year}",
+    "atmosphere": "era5/{year}",
+    "wind_histogram": "era5_hist/{year}",
+}
+
+# get_dem_layers(): ee.Kernel.square(radius=5) → 11×11 window
+TRI_RADIUS = 5
+
+
+class LocalRasterError(LookupError):
+    """Raised when the staged rasters do not cover a requested area."""
+
+
+def get_backend() -> str:
+    backend = getattr(settings, "RASTER_BACKEND", BACKEND_GEE) or BACKEND_GEE
+    if backend not in (BACKEND_GEE, BACKEND_LOCAL):
+        raise ValueError(f"Unknown RASTER_BACKEND: {backend!r}")
+    return backend
+
+
+def get_local_dir() -> Path:
+    return Path(getattr(settings, "LOCAL_RASTER_DIR", "rasters"))
+
+
+def layer_folder(name: str, year=None) -> Path:
+    return get_local_dir() / LAYER_FOLDERS[name].format(year=year)
+
+
+# ---------------------------------------------------------
+# TILES
+# ---------------------------------------------------------
+
+class _NpyTile:
+    def __init__(self, data_path, meta_path):
+        snap = load_raster(data_path, meta_path)
+        self.data = snap.data
+        self.bands = snap.bands
+        self.lat_max = snap.lat_max
+        self.lon_min = snap.lon_min
+        self.res_lat = snap.res_lat
+        self.res_lon = snap.res_lon
+        self.rows, self.cols = snap.shape
+        self.nodata = None
+
+    def read(self, band, r0, r1, c0, c1):
+        return np.asarray(self.data[self.bands.index(band), r0:r1, c0:c1])
+
+
+class _TiffTile:
+    def __init__(self, path, bands):
+        try:
+            import rasterio
+        except ImportError as exc:
+            raise ImportError(
+                f"Reading GeoTIFF tiles ({path}) requires rasterio; "
+                "install it or stage NPY tiles with `manage.py stage_local_rasters`."
+            ) from exc
+
+        self._rasterio = rasterio
+        self.path = path
+        self._local = threading.local()
+
+        src = self._open()
+        t = src.transform
+        self.lat_max = t.f
+        self.lon_min = t.c
+        self.res_lat = -t.e
+        self.res_lon = t.a
+        self.rows, self.cols = src.height, src.width
+        self.nodata = src.nodata
+
+        # Single-band official tiles take the layer's band name
+        names = [d for d in src.descriptions if d] if any(src.descriptions) else []
+        self.bands = names if len(names) == src.count else list(bands)[:src.count]
+
+    def _open(self):
+        # rasterio datasets are not thread-safe; one handle per thread
+        src = getattr(self._local, "src", None)
+        if src is None:
+            src = self._local.src = self._rasterio.open(self.path)
+        return src
+
+    def read(self, band, r0, r1, c0, c1):
+        from rasterio.windows import Window
+
+        window = Window(c0, r0, c1 - c0, r1 - r0)
+        return self._open().read(self.bands.index(band) + 1, window=window)
+
+
+@lru_cache(maxsize=None)
+def _tiles(folder: str, bands: tuple):
+    root = Path(folder)
+    if not root.is_dir():
+        return ()
+
+    tiles = []
+    for meta_path in sorted(root.glob("*.json")):
+        data_path = meta_path.with_suffix(".npy")
+        if data_path.exists():
+            tiles.append(_NpyTile(data_path, meta_path))
+    for tif in sorted(list(root.glob("*.tif")) + list(root.glob("*.tiff"))):
+        tiles.append(_TiffTile(tif, bands))
+    return tuple(tiles)
+
+
+def clear_tile_index():
+    """Forget the tile listings (after staging new tiles in a running process)."""
+    _tiles.cache_clear()
+
+
+# ---------------------------------------------------------
+# READING
+# ---------------------------------------------------------
+
+def read_region(folder, bands, bounds, scale_m, dtype, pad=0) -> RasterSnapshot:
+    """
+    Mosaic the tiles of `folder` onto the pixel grid of `bounds` at `scale_m`
+    (raster_snapshot.pixel_grid), grown by `pad` pixels on every side.
+
+    Pixels not covered by any tile are NaN (float) or 0 (integer); a region
+    with no coverage at all raises LocalRasterError.
+    """
+    bands = tuple(bands)
+    dtype = np.dtype(dtype)
+    fill = np.nan if dtype.kind == "f" else 0
+
+    res_lat, res_lon, height, width = pixel_grid(bounds, scale_m)
+    lat_max = bounds[1] + pad * res_lat
+    lon_min = bounds[2] - pad * res_lon
+    height += 2 * pad
+    width += 2 * pad
+
+    lats = lat_max - (np.arange(height) + 0.5) * res_lat
+    lons = lon_min + (np.arange(width) + 0.5) * res_lon
+
+    out = np.full((len(bands), height, width), fill, dtype=dtype)
+    covered = False
+
+    for tile in _tiles(str(folder), bands):
+        ri = np.floor((tile.lat_max - lats) / tile.res_lat).astype(np.intp)
+        ci = np.floor((lons - tile.lon_min) / tile.res_lon).astype(np.intp)
+        rows = np.flatnonzero((ri >= 0) & (ri < tile.rows))
+        cols = np.flatnonzero((ci >= 0) & (ci < tile.cols))
+        if not rows.size or not cols.size:
+            continue
+
+        covered = True
+        r0, r1 = ri[rows].min(), ri[rows].max() + 1
+        c0, c1 = ci[cols].min(), ci[cols].max() + 1
+
+        for b, band in enumerate(bands):
+            if band not in tile.bands:
+                continue
+            block = tile.read(band, r0, r1, c0, c1)
+            values = block[np.ix_(ri[rows] - r0, ci[cols] - c0)]
+            if tile.nodata is not None:
+                values = np.where(values == tile.nodata, fill, values)
+            out[b][np.ix_(rows, cols)] = values
+
+    if not covered:
+        raise LocalRasterError(f"No local raster in {folder} covers {bounds}")
+
+    return RasterSnapshot(out, bands, lat_max, lon_min, res_lat, res_lon)
+
+
+def neighborhood_std(values, radius: int):
+    """
+    Population stdDev in a (2·radius+1)² window around every pixel,
+    ignoring NaN – the local equivalent of reduceNeighborhood(stdDev).
+    """
+    valid = np.isfinite(values)
+    data = np.where(valid, values, 0.0).astype(np.float64)
+    data -= data[valid].mean() if valid.any() else 0.0
+    data[~valid] = 0.0
+
+    def window_sum(a):
+        k = 2 * radius + 1
+        h, w = a.shape
+        sat = np.zeros((h + 2 * radius + 1, w + 2 * radius + 1))
+        sat[1:, 1:] = np.pad(a, radius).cumsum(axis=0).cumsum(axis=1)
+        return sat[k:k + h, k:k + w] - sat[:h, k:k + w] - sat[k:k + h, :w] + sat[:h, :w]
+
+    n = window_sum(valid.astype(np.float64))
+    s = window_sum(data)
+    ss = window_sum(data * data)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / n
+        var = np.maximum(ss / n - mean * mean, 0.0)
+    return np.where(valid & (n > 0), np.sqrt(var), np.nan).astype(np.float32)
+
+
+def read_terrain(bounds, scale_m) -> RasterSnapshot:
+    """elevation + tri over `bounds`, from the staged DEM."""
+    dem = read_region(layer_folder("terrain"), ("elevation",), bounds, scale_m, "float32", pad=TRI_RADIUS)
+    elevation = dem.band("elevation")
+    tri = neighborhood_std(elevation, TRI_RADIUS)
+
+    crop = (slice(TRI_RADIUS, -TRI_RADIUS), slice(TRI_RADIUS, -TRI_RADIUS))
+    data = np.stack([elevation[crop], tri[crop]])
+    return RasterSnapshot(
+        data, ("elevation", "tri"),
+        dem.lat_max - TRI_RADIUS * dem.res_lat,
+        dem.lon_min + TRI_RADIUS * dem.res_lon,
+        dem.res_lat, dem.res_lon,
+    )
+
+
+def read_layer(layer, bounds) -> RasterSnapshot:
+    """The local equivalent of raster_snapshot.get_snapshot(layer, bounds)."""
+    if layer.name == "terrain":
+        return read_terrain(bounds, layer.spec.scale)
+
+    folder = layer_folder(layer.name, layer.spec.year)
+    return read_region(folder, layer.spec.bands, bounds, layer.spec.scale, layer.dtype)
+
+
+def point_value(name: str, band: str, lat: float, lon: float, year=None, scale_m: float = 1000):
+    """Value of `band` at one point (nearest pixel), or None if masked."""
+    half = scale_m / 1000 * DEG_PER_KM / 2
+    snap = read_region(
+        layer_folder(name, year), (band,), (lat - half, lat + half, lon - half, lon + half),
+        scale_m, "float32",
+    )
+    value = float(snap.band(band)[0, 0])
+    return value if np.isfinite(value) else None
+
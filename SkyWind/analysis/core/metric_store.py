@@ -0,0 +1,257 @@
+"""
+metric_store.py
+---------------
+
+Columnar per-grid storage of zone metrics (GridMetricStore).
+
+Listing the zones of a region from the Zone table materializes every
+zone row and a land_type JSON per zone – tens of
+thousands of objects for a 100×100 grid. Here the leaf zones of a grid
+are packed once per pipeline run into typed arrays stored in a single
+row; a full-grid read is one row fetch and np.frombuffer() views on it.
+
+    • write_store()      – (re)build the store of a grid from its zones
+    • invalidate_store() – drop it (zones regenerated)
+    • read_columns()     – {column: array} views on a stored blob
+    • grid_columns()     – the columns of one grid, building its store
+                           when missing or outdated
+    • region_columns()   – the same for all grids of a region
+    • zone_rows()        – the zone dicts served by the zone endpoints
+    • land_types()       – land_type dicts back from the land matrix
+    • land_percentages() – the land matrix as scoring.land_matrix() builds it
+
+Layout: every column is a little-endian array aligned to 8 bytes in
+`data`, described in `layout["columns"]` as {name: [dtype, offset,
+shape]}. Metrics are float32; the values the pipeline rounds (wind speed
+to 0.01 m/s, air density to 0.001 kg/m³, ...) are rounded back on read,
+so responses match the Zone table. Coordinates, ids and potential keep
+their full width. Absent values (no Weibull fit, no parent, a land class
+missing from the zone) are NaN or -1.
+
+This module does not import Earth Engine.
+"""
+
+import numpy as np
+
+from analysis.core.freshness import STATE_CHOICES
+from analysis.core.spatial import corners_of
+from analysis.models import GridMetricStore, RegionGrid
+
+# Bump when the columns or their encoding change; older stores are rebuilt
+STORE_VERSION = 1
+
+CORNERS = ("A", "B", "C", "D")
+CORNER_COLUMNS = [f"{c}_{axis}" for c in CORNERS for axis in ("lat", "lon")]
+
+# (column, dtype, decimals restored on read)
+COLUMNS = [
+    ("id", "<i8", None),
+    ("zone_index", "<i4", None),
+    ("depth", "<i2", None),
+    ("parent_id", "<i8", None),
+    ("infrastructure_id", "<i8", None),
+    *[(name, "<f8", None) for name in CORNER_COLUMNS],
+    ("avg_wind_speed", "<f4", 2),
+    ("wind_direction", "<f4", 1),
+    ("weibull_k", "<f4", 3),
+    ("weibull_c", "<f4", 2),
+    ("min_alt", "<f4", 2),
+    ("max_alt", "<f4", 2),
+    ("roughness", "<f4", 2),
+    ("air_density", "<f4", 3),
+    ("power_avg", "<f4", 1),
+    ("potential", "<f8", None),
+    ("data_state", "u1", None),
+]
+DECIMALS = {name: decimals for name, _, decimals in COLUMNS if decimals is not None}
+
+# Land cover percentages (zones × classes), one decimal like _apply_land_cover
+LAND_DECIMALS = 1
+
+STATES = [state for state, _ in STATE_CHOICES]
+
+# Keys of a zone_rows() dict after id, zone_index and the corners
+ROW_FIELDS = (
+    "avg_wind_speed", "wind_direction", "weibull_k", "weibull_c", "min_alt", "max_alt",
+    "roughness", "air_density", "power_avg", "land_type", "potential", "data_state",
+    "depth", "parent_id", "infrastructure_id",
+)
+
+
+# ---------------------------------------------------------
+# ENCODING
+# ---------------------------------------------------------
+
+def _land(zones):
+    classes = sorted({label for z in zones if isinstance(z.land_type, dict) for label in z.land_type})
+    column = {label: j for j, label in enumerate(classes)}
+    matrix = np.full((len(zones), len(classes)), np.nan, dtype="<f4")
+    for i, z in enumerate(zones):
+        if isinstance(z.land_type, dict):
+            for label, pct in z.land_type.items():
+                matrix[i, column[label]] = pct or 0.0
+    return matrix, classes
+
+
+def _value(z, name):
+    if name in CORNER_COLUMNS:
+        corner, axis = name.split("_")
+        return corners_of(z)[corner][0 if axis == "lat" else 1]
+    if name == "data_state":
+        return STATES.index(z.data_state) if z.data_state in STATES else 0
+    value = getattr(z, name)
+    if value is None:
+        return -1 if name.endswith("_id") else np.nan
+    return value
+
+
+def encode(zones):
+    """(layout, bytes) of `zones`, in the given order."""
+    arrays = {name: np.array([_value(z, name) for z in zones], dtype=dtype) for name, dtype, _ in COLUMNS}
+    land, classes = _land(zones)
+    arrays["land"] = land
+
+    columns, chunks, offset = {}, [], 0
+    for name, array in arrays.items():
+        raw = np.ascontiguousarray(array).tobytes()
+        columns[name] = [array.dtype.str, offset, list(array.shape)]
+        padding = -len(raw) % 8
+        chunks.append(raw + b"\0" * padding)
+        offset += len(raw) + padding
+
+    layout = {"version": STORE_VERSION, "count": len(zones), "classes": classes, "columns": columns}
+    return layout, b"".join(chunks)
+
+
+def read_columns(layout, data) -> dict:
+    """{column: read-only array} views on `data` – nothing is copied."""
+    buffer = memoryview(data)
+    columns = {}
+    for name, (dtype, offset, shape) in layout["columns"].items():
+        count = int(np.prod(shape)) if shape else 1
+        columns[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+    return columns
+
+
+# ---------------------------------------------------------
+# STORE
+# ---------------------------------------------------------
+
+def write_store(grid):
+    """Pack the current leaf zones of `grid` into its GridMetricStore."""
+    zones = list(grid.leaf_zones().order_by("id"))
+    layout, data = encode(zones)
+    store, _ = GridMetricStore.objects.update_or_create(grid=grid, defaults={"layout": layout, "data": data})
+    return store
+
+
+def invalidate_store(grid):
+    GridMetricStore.objects.filter(grid=grid).delete()
+
+
+def _is_current(store) -> bool:
+    return store is not None and store.layout.get("version") == STORE_VERSION
+
+
+def _columns(store) -> dict:
+    return {**read_columns(store.layout, store.data), "classes": store.layout["classes"]}
+
+
+def grid_columns(grid) -> dict:
+    """Columns of the leaf zones of `grid` (by id); one query when the store is current."""
+    store = GridMetricStore.objects.filter(grid=grid).first()
+    if not _is_current(store):
+        store = write_store(grid)
+    return _columns(store)
+
+
+def region_columns(region_id):
+    """
+    Columns of the leaf zones of every grid of the region (grids by id,
+    zones by id), or None when the region has no grid. One query when all
+    stores are current; the others are rebuilt first.
+    """
+    grids = list(RegionGrid.objects.filter(region_id=region_id).select_related("metric_store").order_by("id"))
+    if not grids:
+        return None
+
+    parts = []
+    for grid in grids:
+        store = getattr(grid, "metric_store", None)
+        if not _is_current(store):
+            store = write_store(grid)
+        parts.append(_columns(store))
+
+    return parts[0] if len(parts) == 1 else _concatenate(parts)
+
+
+def _concatenate(parts):
+    """Stack the columns of several grids; land matrices get the union of classes."""
+    classes = sorted({c for columns in parts for c in columns["classes"]})
+    merged = {
+        name: np.concatenate([columns[name] for columns in parts])
+        for name in parts[0] if name not in ("land", "classes")
+    }
+
+    land = np.full((len(merged["id"]), len(classes)), np.nan, dtype="<f4")
+    row = 0
+    for columns in parts:
+        count = len(columns["id"])
+        land[row:row + count, [classes.index(c) for c in columns["classes"]]] = columns["land"]
+        row += count
+
+    merged["land"] = land
+    merged["classes"] = classes
+    return merged
+
+
+# ---------------------------------------------------------
+# DECODING
+# ---------------------------------------------------------
+
+def values(columns, name) -> list:
+    """Python values of a column: decimals restored, NaN / -1 → None."""
+    array = columns[name]
+    if name in DECIMALS:
+        array = np.round(array.astype(float), DECIMALS[name])
+    out = array.tolist()
+    if array.dtype.kind == "f":
+        return [None if v != v else v for v in out]
+    if name.endswith("_id"):
+        return [None if v < 0 else v for v in out]
+    return out
+
+
+def land_percentages(columns):
+    """(percentages, classes) like scoring.land_matrix(): absent classes are 0."""
+    return np.nan_to_num(np.round(columns["land"].astype(float), LAND_DECIMALS)), list(columns["classes"])
+
+
+def land_types(columns) -> list:
+    """land_type dicts, largest share first."""
+    land = np.round(columns["land"].astype(float), LAND_DECIMALS)
+    present = ~np.isnan(land)
+    # Descending share, absent classes last, ties in class order
+    order = np.argsort(-np.where(present, land, -1.0), axis=1, kind="stable")
+    shares = np.take_along_axis(land, order, axis=1).tolist()
+    classes = columns["classes"]
+    return [
+        {classes[j]: share for j, share in zip(cols[:n], row[:n])}
+        for cols, row, n in zip(order.tolist(), shares, present.sum(axis=1).tolist())
+    ]
+
+
+def zone_rows(columns) -> list:
+    """The get_region_zones payload of every zone in the columns."""
+    fields = {name: values(columns, name) for name, _, _ in COLUMNS if name != "data_state"}
+    fields["land_type"] = land_types(columns)
+    fields["data_state"] = [STATES[i] for i in columns["data_state"].tolist()]
+
+    rows = []
+    for i in range(len(fields["id"])):
+        row = {"id": fields["id"][i], "zone_index": fields["zone_index"][i]}
+        for c in CORNERS:
+            row[c] = {"lat": fields[f"{c}_lat"][i], "lon": fields[f"{c}_lon"][i]}
+        row.update({name: fields[name][i] for name in ROW_FIELDS})
+        rows.append(row)
+    return rows
@@ -0,0 +1,160 @@
+"""
+pipeline.py
+-----------
+
+Declarative step graph for the GEE pipeline.
+
+A pipeline run is a list of Step(name, number, label, fn, deps). run_steps()
+starts every step whose dependencies are done on a bounded thread pool, so
+independent steps (DEM, air density, power density and land cover all read
+the same FeatureCollection) wait on Earth Engine at the same time and one
+grid refresh takes roughly as long as its slowest step:
+
+    temperature ─────────────────────────────────┐
+    wind ──────────┐                             │
+    dem ───────────┤                             │
+    air_density ───┼──> climatology ──> potential ──> region
+    power_density ─┤
+    land_cover ────┘
+
+    • Step         – one node: fn() is called with no arguments
+    • run_steps()  – execute the graph, return {name: seconds}
+    • main_step()  – the 1-8 step a step number belongs to
+
+Step numbers are the pipeline's 1-8, or a sub-step like "5b" (wind
+distribution) that runs alongside its main step and reports as it.
+
+Steps must only write the model fields they own (save(update_fields=...)),
+because they share the same Zone instances across threads.
+"""
+
+import string
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+
+Step = namedtuple("Step", "name number label fn deps", defaults=((),))
+
+
+def main_step(number) -> int:
+    """5 → 5, "5b" → 5."""
+    return int(str(number).rstrip(string.ascii_letters))
+
+# Longest gap between two heartbeat() calls while steps run on the pool
+HEARTBEAT_SECONDS = 30
+
+
+def get_max_workers() -> int:
+    return max(1, int(getattr(settings, "GEE_PIPELINE_WORKERS", 4) or 1))
+
+
+def _check_graph(steps):
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate step names: {names}")
+
+    for s in steps:
+        missing = set(s.deps) - set(names)
+        if missing:
+            raise ValueError(f"Step {s.name!r} depends on unknown steps {sorted(missing)}")
+
+    # Kahn's algorithm – every step must become ready at some point
+    done = set()
+    pending = list(steps)
+    while pending:
+        ready = [s for s in pending if set(s.deps) <= done]
+        if not ready:
+            raise ValueError(f"Cycle between steps {sorted(s.name for s in pending)}")
+        done.update(s.name for s in ready)
+        pending = [s for s in pending if s.name not in done]
+
+
+def _timed(step):
+    start = time.perf_counter()
+    step.fn()
+    return time.perf_counter() - start
+
+
+def _run_in_worker(step):
+    # Each pool thread gets its own DB connection; close it so a long-lived
+    # worker process does not leak one connection per thread and run.
+    try:
+        return _timed(step)
+    finally:
+        connections.close_all()
+
+
+def run_steps(steps, max_workers: int = None, progress=None, heartbeat=None) -> dict:
+    """
+    Run `steps` respecting their deps and return {name: seconds}, in the
+    order the steps finished.
+
+    max_workers=None reads settings.GEE_PIPELINE_WORKERS; 1 runs the steps
+    one after another in the calling thread (same order as the list).
+
+    progress: optional callable(number, label), called from the calling
+    thread when a step starts.
+
+    heartbeat: optional callable(), called from the calling thread when a
+    step finishes and, while steps run on the pool, at least every
+    HEARTBEAT_SECONDS – proof of life for the job queue.
+
+    The first failing step stops the run: nothing new is started, steps
+    already running are awaited, then its exception is raised.
+    """
+    steps = list(steps)
+    _check_graph(steps)
+
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    timings = {}
+    done = set()
+    pending = list(steps)
+
+    if max_workers <= 1:
+        while pending:
+            step = next(s for s in pending if set(s.deps) <= done)
+            if progress:
+                progress(step.number, step.label)
+            timings[step.name] = _timed(step)
+            done.add(step.name)
+            pending.remove(step)
+            if heartbeat:
+                heartbeat()
+        return timings
+
+    running = {}
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline") as pool:
+        while pending or running:
+            if error is None:
+                for step in [s for s in pending if set(s.deps) <= done]:
+                    if progress:
+                        progress(step.number, step.label)
+                    running[pool.submit(_run_in_worker, step)] = step
+                    pending.remove(step)
+
+            if not running:
+                break
+
+            finished, _ = wait(running, timeout=HEARTBEAT_SECONDS, return_when=FIRST_COMPLETED)
+            if heartbeat:
+                heartbeat()
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    timings[step.name] = future.result()
+                    done.add(step.name)
+                except Exception as e:
+                    if error is None:
+                        error = e
+
+    if error is not None:
+        raise error
+    return timings
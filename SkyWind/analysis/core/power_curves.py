@@ -0,0 +1,25 @@
+"""
+power_curves.py
+---------------
+
+Reference power curves, seeded onto WindTurbineType.power_curve by
+seed_wind_turbine_types and evaluated by energy.py. Plain data: no Django,
+Earth Engine or NumPy.
+"""
+
+
+# Power curves of one representative model per type, at 1.225 kg/m³:
+# [wind speed m/s, output kW]. Output is 0 below the first and above the
+# last point (cut-in / cut-out), linear in between.
+SMALL_TURBINE_CURVE = [  # 10 kW, 7 m rotor
+    [2.5, 0.0], [3, 0.2], [4, 0.7], [5, 1.5], [6, 2.6], [7, 4.1], [8, 5.9],
+    [9, 7.6], [10, 8.9], [11, 9.7], [12, 10.0], [20, 10.0], [20.01, 0.0],
+]
+ONSHORE_TURBINE_CURVE = [  # 3.4 MW, 130 m rotor
+    [3, 0.0], [4, 170.0], [5, 380.0], [6, 690.0], [7, 1110.0], [8, 1670.0],
+    [9, 2360.0], [10, 3050.0], [10.5, 3320.0], [11, 3400.0], [25, 3400.0], [25.01, 0.0],
+]
+OFFSHORE_TURBINE_CURVE = [  # 15 MW, 240 m rotor
+    [3, 0.0], [4, 700.0], [5, 1500.0], [6, 2700.0], [7, 4400.0], [8, 6600.0],
+    [9, 9400.0], [10, 12700.0], [10.6, 14700.0], [11, 15000.0], [25, 15000.0], [25.01, 0.0],
+]
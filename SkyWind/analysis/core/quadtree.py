@@ -0,0 +1,128 @@
+"""
+quadtree.py
+-----------
+
+Adaptive refinement of RegionGrids (RegionGrid.max_depth > 0).
+
+A uniform grid pays for every zone at the finest resolution: finding
+500 m sites in a 20 km region means 1,600 zones, most of them scoring
+poorly. An adaptive grid starts from the coarse zones_per_edge lattice
+(depth 0) and splits only the zones that score well into 4 children,
+level by level, down to max_depth:
+
+    • should_refine()  – does a computed zone deserve a finer look?
+    • refine_grid()    – add children under qualifying leaves, drop the
+                         subtrees of zones that no longer qualify
+
+A zone qualifies when its potential reaches GEE_REFINE_POTENTIAL_THRESHOLD
+or its wind speed reaches GEE_REFINE_WIND_THRESHOLD (0 disables either).
+
+compute_gee_for_grid() alternates pipeline runs and refine_grid() until
+the tree stops changing; since only stale metrics are computed (see
+freshness.py), each run fetches the new children alone. The leaves
+(RegionGrid.leaf_zones) form the map and feed the region summary.
+
+This module does not import Earth Engine.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from analysis.core.geometry import subdivide_zone
+from analysis.core.global_lattice import subdivide_cell
+from analysis.core.lattice import create_zones
+from analysis.core.spatial import corners_of
+from analysis.models import Zone
+
+
+def refinement_thresholds():
+    """(potential threshold, wind threshold in m/s) from settings."""
+    return (
+        float(getattr(settings, "GEE_REFINE_POTENTIAL_THRESHOLD", 40)),
+        float(getattr(settings, "GEE_REFINE_WIND_THRESHOLD", 0)),
+    )
+
+
+def should_refine(zone, potential_threshold: float, wind_threshold: float) -> bool:
+    """True when a zone with computed metrics is worth splitting."""
+    if "potential" not in (zone.freshness or {}):
+        # Not computed yet: decide on the next pass
+        return False
+    if potential_threshold > 0 and zone.potential >= potential_threshold:
+        return True
+    return wind_threshold > 0 and zone.avg_wind_speed >= wind_threshold
+
+
+def refine_grid(grid, thresholds=None):
+    """
+    One refinement pass over an adaptive grid.
+
+    Leaves above depth max_depth that qualify get 4 children (created
+    pending, with the parent's infrastructure); zones that have children
+    but no longer qualify lose their subtree. Returns (created, removed)
+    zone counts; (0, 0) means the tree is stable.
+    """
+    if grid.max_depth <= 0:
+        return 0, 0
+
+    potential_threshold, wind_threshold = thresholds or refinement_thresholds()
+    zones = list(grid.zones.all())
+
+    children = defaultdict(list)
+    for z in zones:
+        if z.parent_id:
+            children[z.parent_id].append(z)
+
+    next_index = max((z.zone_index for z in zones), default=0) + 1
+    dropped = set()
+    new_zones = []
+
+    with transaction.atomic():
+        for z in sorted(zones, key=lambda z: z.depth):
+            if z.id in dropped or "potential" not in (z.freshness or {}):
+                # Removed with an ancestor, or not computed yet
+                continue
+
+            refine = should_refine(z, potential_threshold, wind_threshold)
+
+            if z.id in children:
+                if not refine:
+                    dropped.update(_descendants(z.id, children))
+                    Zone.objects.filter(parent=z).delete()
+                continue
+
+            if not refine or z.depth >= grid.max_depth:
+                continue
+
+            # Children of a global lattice cell are the cells of the tier below
+            cells = subdivide_cell(z.cell_id) if z.cell_id else None
+            if cells is None:
+                corners = corners_of(z)
+                cells = [(cell, "") for cell in subdivide_zone(*(corners[c] for c in "ABCD"))]
+            for cell, child_id in cells:
+                new_zones.append((
+                    Zone(
+                        grid=grid,
+                        parent=z,
+                        depth=z.depth + 1,
+                        zone_index=next_index,
+                        infrastructure_id=z.infrastructure_id,
+                        cell_id=child_id,
+                    ),
+                    cell,
+                ))
+                next_index += 1
+
+        # Children share corners with each other and their neighbours:
+        # one batched point upsert and zone insert for the whole pass
+        create_zones(new_zones)
+
+    return len(new_zones), len(dropped)
+
+
+def _descendants(zone_id, children):
+    for child in children.get(zone_id, []):
+        yield child.id
+        yield from _descendants(child.id, children)
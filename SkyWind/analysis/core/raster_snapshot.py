@@ -0,0 +1,239 @@
+"""
+raster_snapshot.py
+------------------
+
+Region raster snapshots: download the annual-mean rasters of a region once,
+keep them on disk, and compute every zone statistic locally.
+
+A snapshot is one multi-band image (terrain, atmosphere or land cover)
+sampled on a regular lat/lon grid over the region's bounding box:
+
+    • fetched with ee.data.computePixels (tiled to stay under the
+      per-request size limit), straight into a NumPy array
+    • stored as <GEE_SNAPSHOT_DIR>/<bounds key>/<layer>-<spec digest>.npy
+      with a JSON sidecar holding the georeference
+    • opened memory-mapped, so only the windows that are read are paged in
+
+The file name depends on the region bounds and the layer's ReductionSpec
+(datasets + versions, year, bands, scale) – not on zones_per_edge – so
+regridding a region or changing the scoring formula reuses the same files
+without a single Earth Engine call.
+
+Zone statistics are computed for the whole grid at once by zonal_stats.py;
+the values match reduceRegions up to edge pixels.
+
+This module does not import Earth Engine at module level.
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from analysis.core.reduction_cache import geometry_key
+from analysis.core.spatial import bbox_tuple
+from analysis.core.zonal_stats import ZonalIndex, zonal_index
+
+
+# Degrees of latitude per km (same approximation as geometry.py)
+DEG_PER_KM = 0.009
+
+# Masked pixels are downloaded as NODATA and read back as NaN (float layers)
+# or 0 (integer layers, e.g. WorldCover where 0 is "no data")
+NODATA = -32768
+
+# computePixels rejects responses above 48 MB; keep a margin
+_MAX_REQUEST_BYTES = 32 * 1024 * 1024
+_MAX_TILE_SIDE = 4096
+
+
+# name:  file name prefix
+# spec:  ReductionSpec (datasets, year, bands, scale) – keys the file
+# image: zero-argument builder of the ee.Image holding `spec.bands`
+# dtype: NumPy dtype the bands are stored as
+SnapshotLayer = namedtuple("SnapshotLayer", ["name", "spec", "image", "dtype"])
+
+
+def get_snapshot_dir() -> Path:
+    return Path(getattr(settings, "GEE_SNAPSHOT_DIR", "cache/snapshots"))
+
+
+# ---------------------------------------------------------
+# GEOMETRY
+# ---------------------------------------------------------
+
+def bounds_of(points):
+    """(lat_min, lat_max, lon_min, lon_max) of a sequence of (lat, lon)."""
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return min(lats), max(lats), min(lons), max(lons)
+
+
+def zone_bounds(z):
+    """Bounds of a zone from its inline box (no corner Point needed)."""
+    return bbox_tuple(z)
+
+
+def pixel_grid(bounds, scale_m: float):
+    """
+    Lat/lon pixel grid covering `bounds` at roughly `scale_m` meters.
+
+    Returns (res_lat, res_lon, height, width); the grid's top-left corner
+    is (lat_max, lon_min).
+    """
+    lat_min, lat_max, lon_min, lon_max = bounds
+    center_lat = (lat_min + lat_max) / 2
+
+    res_lat = scale_m / 1000 * DEG_PER_KM
+    res_lon = res_lat / math.cos(math.radians(center_lat))
+
+    height = max(1, math.ceil((lat_max - lat_min) / res_lat - 1e-9))
+    width = max(1, math.ceil((lon_max - lon_min) / res_lon - 1e-9))
+    return res_lat, res_lon, height, width
+
+
+# ---------------------------------------------------------
+# SNAPSHOT
+# ---------------------------------------------------------
+
+class RasterSnapshot:
+    """
+    A (bands, rows, cols) array plus its georeference.
+
+    Row 0 is the northern edge (lat_max), column 0 the western edge (lon_min).
+    """
+
+    def __init__(self, data, bands, lat_max, lon_min, res_lat, res_lon):
+        self.data = data
+        self.bands = list(bands)
+        self.lat_max = lat_max
+        self.lon_min = lon_min
+        self.res_lat = res_lat
+        self.res_lon = res_lon
+
+    @property
+    def shape(self):
+        return self.data.shape[1:]
+
+    def band(self, name):
+        return self.data[self.bands.index(name)]
+
+    def zonal(self, bounds) -> ZonalIndex:
+        """ZonalIndex of zone rectangles ((N, 4) lat/lon bounds) on this grid."""
+        return zonal_index(bounds, self.lat_max, self.lon_min, self.res_lat, self.res_lon, self.shape)
+
+
+# ---------------------------------------------------------
+# STORE
+# ---------------------------------------------------------
+
+def _paths(layer: SnapshotLayer, bounds):
+    region_key = geometry_key([(bounds[0], bounds[2]), (bounds[1], bounds[3])])[:16]
+    stem = f"{layer.name}-{layer.spec.digest()[:16]}"
+    folder = get_snapshot_dir() / region_key
+    return folder / f"{stem}.npy", folder / f"{stem}.json"
+
+
+def load_raster(data_path, meta_path) -> RasterSnapshot:
+    """Open a .npy raster and its JSON sidecar (memory-mapped)."""
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    data = np.load(data_path, mmap_mode="r")
+    return RasterSnapshot(
+        data, meta["bands"], meta["lat_max"], meta["lon_min"], meta["res_lat"], meta["res_lon"],
+    )
+
+
+def get_snapshot(layer: SnapshotLayer, bounds) -> RasterSnapshot:
+    """Return the snapshot of `layer` over `bounds`, downloading it if missing."""
+    data_path, meta_path = _paths(layer, bounds)
+
+    # The sidecar is written last, so its presence marks a complete download
+    if not meta_path.exists():
+        download_raster(
+            layer.image(), layer.spec.bands, layer.dtype, bounds, layer.spec.scale,
+            data_path, meta_path,
+            extra_meta={
+                "datasets": [list(d) for d in layer.spec.datasets],
+                "year": layer.spec.year,
+            },
+        )
+
+    return load_raster(data_path, meta_path)
+
+
+def download_raster(image, bands, dtype, bounds, scale_m, data_path: Path, meta_path: Path,
+                    extra_meta=None):
+    """
+    Download `bands` of an ee.Image over `bounds` at `scale_m` into
+    data_path (.npy) + meta_path (JSON sidecar, written last).
+    """
+    # Imported here: this module is also used without Earth Engine
+    from analysis.core.gee_client import compute_pixels
+
+    lat_min, lat_max, lon_min, lon_max = bounds
+    bands = list(bands)
+    dtype = np.dtype(dtype)
+    res_lat, res_lon, height, width = pixel_grid(bounds, scale_m)
+
+    pixel_bytes = dtype.itemsize * len(bands)
+    tile = min(_MAX_TILE_SIDE, int(math.sqrt(_MAX_REQUEST_BYTES / pixel_bytes)))
+
+    image = image.select(bands).unmask(NODATA)
+    fill = np.nan if dtype.kind == "f" else 0
+
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = data_path.with_name(f"{data_path.stem}.{os.getpid()}.tmp.npy")
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(len(bands), height, width))
+
+    try:
+        for r0 in range(0, height, tile):
+            for c0 in range(0, width, tile):
+                h = min(tile, height - r0)
+                w = min(tile, width - c0)
+                pixels = compute_pixels({
+                    "expression": image,
+                    "fileFormat": "NUMPY_NDARRAY",
+                    "grid": {
+                        "dimensions": {"width": w, "height": h},
+                        "affineTransform": {
+                            "scaleX": res_lon,
+                            "shearX": 0,
+                            "translateX": lon_min + c0 * res_lon,
+                            "shearY": 0,
+                            "scaleY": -res_lat,
+                            "translateY": lat_max - r0 * res_lat,
+                        },
+                        "crsCode": "EPSG:4326",
+                    },
+                })
+                for i, band in enumerate(bands):
+                    values = np.asarray(pixels[band])
+                    out[i, r0:r0 + h, c0:c0 + w] = np.where(values == NODATA, fill, values)
+
+        out.flush()
+    except BaseException:
+        del out
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    del out
+    os.replace(tmp_path, data_path)
+
+    meta = {
+        "bands": bands,
+        "lat_max": lat_max,
+        "lon_min": lon_min,
+        "res_lat": res_lat,
+        "res_lon": res_lon,
+        "scale": scale_m,
+        **(extra_meta or {}),
+    }
+    tmp_meta = meta_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
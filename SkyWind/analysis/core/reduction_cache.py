@@ -0,0 +1,302 @@
+"""
+reduction_cache.py
+------------------
+
+Persistent, content-addressed cache for Earth Engine reduction results.
+
+A reduction result depends only on:
+    • the dataset(s) and their version
+    • the year
+    • the band set
+    • the reducer
+    • the scale
+    • the geometry it was reduced over
+
+so every cached value is stored under a SHA-256 of exactly those inputs.
+Results are cached per geometry (one zone polygon or one point), which
+means a grid that was already seen – or a new grid that overlaps an old
+one exactly – is answered from disk, and only the missing zones go to
+Earth Engine.
+
+Storage is a single SQLite file (stdlib only, safe across processes):
+
+    • size-bounded, least-recently-used eviction (GEE_CACHE_MAX_BYTES)
+    • explicit invalidation per dataset, or of every entry whose dataset
+      version no longer matches DATASET_VERSIONS in datasets.py
+
+This module does not import Earth Engine.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+from analysis.core.spatial import corners_of
+
+
+# ---------------------------------------------------------
+# KEYS
+# ---------------------------------------------------------
+
+@dataclass(frozen=True)
+class ReductionSpec:
+    """
+    Everything except the geometry that determines a reduction result.
+
+    datasets: tuple of (dataset_id, version) pairs used by the image
+    """
+    datasets: tuple
+    year: int = None
+    bands: tuple = ()
+    reducer: str = "mean"
+    scale: float = 1000
+
+    def digest(self) -> str:
+        payload = json.dumps(
+            {
+                "datasets": [list(d) for d in self.datasets],
+                "year": self.year,
+                "bands": list(self.bands),
+                "reducer": self.reducer,
+                "scale": self.scale,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def dataset_tag(self) -> str:
+        """'|id@version|id@version|' – lets invalidation match with LIKE."""
+        return "|" + "|".join(f"{d}@{v}" for d, v in self.datasets) + "|"
+
+
+def geometry_key(coords) -> str:
+    """
+    Stable hash of a geometry given as a sequence of (lat, lon) pairs.
+
+    Coordinates are rounded to 1e-7° (~1 cm) so the same zone built twice
+    hashes identically despite float noise.
+    """
+    flat = ",".join(f"{lat:.7f}:{lon:.7f}" for lat, lon in coords)
+    return hashlib.sha256(flat.encode()).hexdigest()
+
+
+def zone_geometry_key(z) -> str:
+    corners = corners_of(z)
+    return geometry_key([corners[c] for c in "ABCD"])
+
+
+def _entry_key(spec_digest: str, geom_key: str) -> str:
+    return hashlib.sha256(f"{spec_digest}:{geom_key}".encode()).hexdigest()
+
+
+# ---------------------------------------------------------
+# STORE
+# ---------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    datasets    TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+"""
+
+# SQLite limits bound parameters per statement
+_CHUNK = 500
+
+
+class ReductionCache:
+    """
+    Disk-backed map: (ReductionSpec, geometry key) → JSON-serializable value.
+
+    get_many/put_many work on whole grids at once; eviction runs after
+    each put_many and trims the file to 90% of max_bytes, oldest first.
+    """
+
+    def __init__(self, path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with sqlite3.connect(self.path, timeout=30) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                    self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    # -----------------------------------------------------
+    # READ / WRITE
+    # -----------------------------------------------------
+
+    def get_many(self, spec: ReductionSpec, geom_keys) -> dict:
+        """Return {geom_key: value} for the keys that are cached."""
+        digest = spec.digest()
+        by_entry = {_entry_key(digest, g): g for g in geom_keys}
+        if not by_entry:
+            return {}
+
+        found = {}
+        conn = self._connect()
+        try:
+            entry_keys = list(by_entry)
+            for i in range(0, len(entry_keys), _CHUNK):
+                chunk = entry_keys[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+
+            if found:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "UPDATE entries SET last_access = ? WHERE key = ?",
+                        [(now, k) for k in found],
+                    )
+        finally:
+            conn.close()
+
+        return {by_entry[k]: v for k, v in found.items()}
+
+    def put_many(self, spec: ReductionSpec, values: dict):
+        """Store {geom_key: value} and evict old entries if over budget."""
+        if not values:
+            return
+
+        now = time.time()
+        digest = spec.digest()
+        tag = spec.dataset_tag()
+        rows = []
+        for geom_key, value in values.items():
+            blob = json.dumps(value, separators=(",", ":"))
+            rows.append((_entry_key(digest, geom_key), tag, blob, len(blob), now))
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, datasets, value, size, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        to_free = total - target
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            victims.append((key,))
+            to_free -= size
+            if to_free <= 0:
+                break
+
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    # -----------------------------------------------------
+    # MAINTENANCE
+    # -----------------------------------------------------
+
+    def invalidate_dataset(self, dataset_id: str, keep_version: str = None) -> int:
+        """
+        Drop entries computed from `dataset_id`.
+
+        With keep_version, entries of that version survive (i.e. only
+        outdated versions are removed). Returns the number of entries removed.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                if keep_version is None:
+                    cur = conn.execute(
+                        "DELETE FROM entries WHERE datasets LIKE ?",
+                        (f"%|{dataset_id}@%",),
+                    )
+                else:
+                    cur = conn.execute(
+                        "DELETE FROM entries WHERE datasets LIKE ? AND datasets NOT LIKE ?",
+                        (f"%|{dataset_id}@%", f"%|{dataset_id}@{keep_version}|%"),
+                    )
+                return cur.rowcount
+        finally:
+            conn.close()
+
+    def invalidate_outdated(self, versions: dict) -> int:
+        """Drop every entry whose dataset version differs from `versions`."""
+        return sum(
+            self.invalidate_dataset(dataset_id, keep_version=version)
+            for dataset_id, version in versions.items()
+        )
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes, "path": str(self.path)}
+
+
+class _NullCache:
+    """Stand-in used when GEE_CACHE_ENABLED is False."""
+
+    def get_many(self, spec, geom_keys):
+        return {}
+
+    def put_many(self, spec, values):
+        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_reduction_cache():
+    """Process-wide cache configured from settings (GEE_CACHE_*)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if getattr(settings, "GEE_CACHE_ENABLED", True):
+                    _cache = ReductionCache(
+                        getattr(settings, "GEE_CACHE_PATH", "cache/gee_reductions.sqlite3"),
+                        int(getattr(settings, "GEE_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+                    )
+                else:
+                    _cache = _NullCache()
+    return _cache
@@ -0,0 +1,90 @@
+"""
+request_planner.py
+------------------
+
+Plan how zones are grouped into Earth Engine requests.
+
+One reduceRegions per grid is wasteful for small grids (a 5×5 grid pays a
+full round trip for 25 polygons) and fails for large ones (a 100×100 grid
+sends 10,000 polygons and hits payload / timeout limits). The planner
+decouples requests from grids:
+
+    • plan_batches()  – pack zones of any number of grids into batches of
+                        at most GEE_MAX_ZONES_PER_REQUEST zones: small grids
+                        share a batch, large grids are cut into shards
+    • map_batches()   – run one function per batch on a thread pool
+
+Batches are plain lists of Zone objects; every result is keyed by zone id,
+so routing results back to their zones needs no extra bookkeeping.
+
+This module does not import Earth Engine.
+"""
+
+import math
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from analysis.core.pipeline import get_max_workers
+
+
+def get_max_zones() -> int:
+    return max(1, int(getattr(settings, "GEE_MAX_ZONES_PER_REQUEST", 2500)))
+
+
+def _shards(zones, max_zones):
+    """Cut one grid into ceil(n / max_zones) contiguous, near-equal shards."""
+    count = math.ceil(len(zones) / max_zones)
+    size = math.ceil(len(zones) / count)
+    return [zones[i:i + size] for i in range(0, len(zones), size)]
+
+
+def plan_batches(zones, max_zones: int = None):
+    """
+    Group `zones` into request batches of at most `max_zones` zones.
+
+    Zones are grouped by grid first (in id order, i.e. row by row), so a
+    shard of a large grid is a band of adjacent rows. Grids and shards are
+    then packed first-fit decreasing: many small grids end up in one batch,
+    and no grid is split unless it is larger than a batch on its own.
+    """
+    if max_zones is None:
+        max_zones = get_max_zones()
+
+    by_grid = OrderedDict()
+    for z in sorted(zones, key=lambda z: (z.grid_id, z.id)):
+        by_grid.setdefault(z.grid_id, []).append(z)
+
+    items = []
+    for grid_zones in by_grid.values():
+        if len(grid_zones) > max_zones:
+            items.extend(_shards(grid_zones, max_zones))
+        else:
+            items.append(grid_zones)
+
+    batches = []
+    for item in sorted(items, key=len, reverse=True):
+        for batch in batches:
+            if len(batch) + len(item) <= max_zones:
+                batch.extend(item)
+                break
+        else:
+            batches.append(list(item))
+    return batches
+
+
+def map_batches(fn, batches, max_workers: int = None):
+    """
+    [fn(batch) for batch in batches], with up to `max_workers` batches in
+    flight at once (default settings.GEE_PIPELINE_WORKERS).
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    if len(batches) <= 1 or max_workers <= 1:
+        return [fn(batch) for batch in batches]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)),
+                            thread_name_prefix="gee-batch") as pool:
+        return list(pool.map(fn, batches))
@@ -0,0 +1,210 @@
+"""
+scoring.py
+----------
+
+Vectorized potential scoring (STEP 7) with configurable weights.
+
+This module is **pure NumPy**: it does NOT import Django, Earth Engine, or
+database models. It scores any number of zones at once from three inputs
+per zone – power_avg, roughness and the land_type percentages:
+
+    potential = 100 × (w_wind × S_wind + w_terrain × S_terrain) × S_land_eff
+
+    S_wind     = min(wind_cap, power_avg / wind_norm)
+    S_terrain  = 1 - min(1, roughness / roughness_norm)
+    S_land_eff = Σ f_c × s_c   over buildable classes c
+                 (= S_land_quality × F_buildable, see compute_land_suitability)
+
+    • ScoringParams        – weights, normalisations and land-class scores
+    • params_from_dict()   – ScoringParams from a JSON payload (validated)
+    • land_matrix()        – land_type dicts → (zones × classes) percentages
+    • score_arrays()       – every score component as arrays
+    • score()              – potentials rounded to one decimal
+
+With the default ScoringParams the results equal the per-zone formula
+(to ±0.1 where a value sits on a rounding boundary and the land classes
+are summed in another order). Scoring 10,000 zones takes ~10 ms, most
+of it reading the land_type dicts, so a region can be re-ranked with
+other weights on every request without rewriting rows.
+"""
+
+from dataclasses import asdict, dataclass, field, replace
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# PARAMETERS
+# ---------------------------------------------------------
+
+# Suitability scores for each ESA WorldCover land class
+# Scale: 0.0 (completely unsuitable) to 1.0 (ideal for wind farms)
+LAND_SUITABILITY_SCORES = {
+    "Grassland": 1.0,           # Open, ideal terrain
+    "Bare / sparse": 1.0,       # Open, minimal vegetation
+    "Cropland": 0.9,            # Generally usable, some constraints
+    "Shrubland": 1.0,           # Open, suitable for development
+    "Tree cover": 0.4,          # Clearing/environment issues, access difficulties
+    "Moss / lichen": 0.4,       # Tundra-like, fragile soils
+    "Built-up": 0.0,            # Hard exclusion - urban areas
+    "Permanent water": 0.0,     # Hard exclusion - water bodies
+    "Herbaceous wetland": 0.0,  # Hard exclusion - protected wetlands
+    "Snow / ice": 0.0,          # Hard exclusion - permanent ice
+    "Mangroves": 0.0,           # Hard exclusion - protected coastal
+}
+
+# Hard exclusion classes (score = 0.0)
+HARD_EXCLUSION_CLASSES = frozenset({
+    "Built-up",
+    "Permanent water",
+    "Herbaceous wetland",
+    "Snow / ice",
+    "Mangroves",
+})
+
+
+@dataclass(frozen=True)
+class ScoringParams:
+    """
+    Everything the potential depends on besides the zone metrics.
+
+    land_scores: {class label: suitability 0-1}; classes not listed score
+    unknown_land_score. hard_exclusions: classes that are not buildable.
+    """
+    wind_weight: float = 0.7
+    terrain_weight: float = 0.3
+    wind_norm: float = 800.0        # W/m² giving S_wind = 1
+    wind_cap: float = 1.25          # cap for exceptional sites
+    roughness_norm: float = 50.0    # roughness giving S_terrain = 0
+    land_scores: dict = field(default_factory=lambda: dict(LAND_SUITABILITY_SCORES))
+    hard_exclusions: frozenset = HARD_EXCLUSION_CLASSES
+    unknown_land_score: float = 0.5
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hard_exclusions"] = sorted(self.hard_exclusions)
+        return data
+
+
+DEFAULT_PARAMS = ScoringParams()
+
+_FLOAT_FIELDS = ("wind_weight", "terrain_weight", "wind_norm", "wind_cap", "roughness_norm", "unknown_land_score")
+
+
+def params_from_dict(data) -> ScoringParams:
+    """
+    ScoringParams overriding the defaults with the keys given in `data`.
+
+    land_scores are merged into the default scores (give only the classes
+    to change); hard_exclusions replaces the default set.
+    Raises ValueError on unknown keys or out-of-range values.
+    """
+    data = dict(data or {})
+    unknown = set(data) - set(_FLOAT_FIELDS) - {"land_scores", "hard_exclusions"}
+    if unknown:
+        raise ValueError(f"Unknown scoring parameters: {', '.join(sorted(unknown))}")
+
+    changes = {}
+    for name in _FLOAT_FIELDS:
+        if name in data:
+            value = float(data[name])
+            if not np.isfinite(value) or value < 0:
+                raise ValueError(f"{name} must be a non-negative number")
+            changes[name] = value
+
+    for name in ("wind_norm", "roughness_norm"):
+        if changes.get(name) == 0:
+            raise ValueError(f"{name} must be positive")
+
+    if "land_scores" in data:
+        if not isinstance(data["land_scores"], dict):
+            raise ValueError("land_scores must be an object of {land class: score}")
+        scores = dict(DEFAULT_PARAMS.land_scores)
+        for label, value in data["land_scores"].items():
+            value = float(value)
+            if not 0 <= value <= 1:
+                raise ValueError(f"land score of {label!r} must be between 0 and 1")
+            scores[str(label)] = value
+        changes["land_scores"] = scores
+
+    if "hard_exclusions" in data:
+        labels = data["hard_exclusions"]
+        if not isinstance(labels, (list, tuple)) or not all(isinstance(label, str) for label in labels):
+            raise ValueError("hard_exclusions must be a list of land class names")
+        changes["hard_exclusions"] = frozenset(labels)
+
+    return replace(DEFAULT_PARAMS, **changes)
+
+
+# ---------------------------------------------------------
+# ARRAYS
+# ---------------------------------------------------------
+
+def land_matrix(land_types, classes=None):
+    """
+    land_type dicts → (percentages, classes).
+
+    percentages is a float array of shape (zones, classes); a zone without
+    land cover data (empty or not a dict) is a row of zeros. Labels not in
+    `classes` (when given) are dropped.
+    """
+    land_types = [lt if isinstance(lt, dict) else {} for lt in land_types]
+    labels = [label for lt in land_types for label in lt]
+    if classes is None:
+        classes = sorted(set(labels))
+
+    column = {label: j for j, label in enumerate(classes)}
+    cols = np.array([column.get(label, -1) for label in labels], dtype=np.intp)
+    rows = np.repeat(np.arange(len(land_types)), [len(lt) for lt in land_types])
+    values = np.array([pct or 0.0 for lt in land_types for pct in lt.values()], dtype=float)
+
+    matrix = np.zeros((len(land_types), len(classes)))
+    known = cols >= 0
+    matrix[rows[known], cols[known]] = values[known]
+    return matrix, list(classes)
+
+
+def score_arrays(power_avg, roughness, land, classes, params: ScoringParams = DEFAULT_PARAMS) -> dict:
+    """
+    Score components for every zone.
+
+    power_avg, roughness: 1-D arrays (missing values as 0)
+    land, classes: output of land_matrix()
+
+    Returns {"potential", "s_wind", "s_terrain", "s_land", "buildable"},
+    each a float array with one value per zone (potential unrounded).
+    """
+    power_avg = np.nan_to_num(np.asarray(power_avg, dtype=float))
+    roughness = np.nan_to_num(np.asarray(roughness, dtype=float))
+
+    s_wind = np.minimum(params.wind_cap, power_avg / params.wind_norm)
+    s_terrain = 1 - np.minimum(1.0, roughness / params.roughness_norm)
+
+    fractions = np.asarray(land, dtype=float) / 100.0
+    buildable_mask = np.array([c not in params.hard_exclusions for c in classes], dtype=bool).reshape(-1)
+    class_scores = np.array(
+        [params.land_scores.get(c, params.unknown_land_score) for c in classes], dtype=float,
+    )
+
+    buildable = fractions[:, buildable_mask].sum(axis=1)
+    weighted = fractions[:, buildable_mask] @ class_scores[buildable_mask]
+
+    # Quality of the buildable area, then the buildable-fraction penalty
+    with np.errstate(invalid="ignore", divide="ignore"):
+        quality = np.where(buildable > 0, weighted / buildable, 0.0)
+    s_land = quality * buildable
+
+    s_base = params.wind_weight * s_wind + params.terrain_weight * s_terrain
+    return {
+        "potential": 100 * s_base * s_land,
+        "s_wind": s_wind,
+        "s_terrain": s_terrain,
+        "s_land": s_land,
+        "buildable": buildable,
+    }
+
+
+def score(power_avg, roughness, land_types, params: ScoringParams = DEFAULT_PARAMS) -> np.ndarray:
+    """Potentials (one decimal) for parallel sequences of zone values."""
+    land, classes = land_matrix(land_types)
+    return np.round(score_arrays(power_avg, roughness, land, classes, params)["potential"], 1)
@@ -0,0 +1,155 @@
+"""
+spatial.py
+----------
+
+Bounding boxes of regions, grids and zones, and indexed queries on them.
+
+Regions, grids and zones keep their geometry as foreign keys to Point
+rows, so asking which zones intersect an area or which region contains a
+coordinate meant loading every corner and comparing in Python. The three
+models also carry their bounding box as plain columns (lat_min, lat_max,
+lon_min, lon_max), set wherever corners are written and backfilled by
+migration 0014. Corners are axis-aligned (see geometry.py): the box is
+the exact footprint, and the corners are read back from it.
+
+Zones also carry their center (center_lat, center_lon, migration 0016),
+so the pipeline and the zone endpoints never join the four corner Points.
+
+    • bbox_of()         – {lat_min, lat_max, lon_min, lon_max} of corners
+    • set_bbox()        – write it onto a Region / RegionGrid / Zone
+    • set_geometry()    – box and center of a Zone
+    • bbox_tuple()      – (lat_min, lat_max, lon_min, lon_max) of an
+                          instance, None before its corners are known
+    • corners_of()      – {"A": (lat, lon), ...} from the box
+    • BBoxIntersects    – filter expression: the row's box intersects a box
+    • intersecting()    – rows intersecting a box
+    • containing()      – rows containing a point
+
+On PostgreSQL the predicate is
+
+    box(point(lon_min, lat_min), point(lon_max, lat_max)) && box(...)
+
+which the GiST expression indexes of migration 0014 serve; other
+backends compare the four columns (B-tree index on lat_min, lon_min).
+Boxes use the order of raster_snapshot.bounds_of().
+
+This module does not import Earth Engine.
+"""
+
+from django.db.models import BooleanField, F, Func, Value
+
+BBOX_FIELDS = ("lat_min", "lat_max", "lon_min", "lon_max")
+CENTER_FIELDS = ("center_lat", "center_lon")
+
+
+# ---------------------------------------------------------
+# BOUNDING BOXES
+# ---------------------------------------------------------
+
+def _coords(corner):
+    """(lat, lon) of a Point or of a (lat, lon) tuple."""
+    if hasattr(corner, "lat"):
+        return corner.lat, corner.lon
+    return corner
+
+
+def bbox_of(corners) -> dict:
+    """{lat_min, lat_max, lon_min, lon_max} of Points or (lat, lon) tuples."""
+    coords = [_coords(c) for c in corners]
+    lats = [lat for lat, _ in coords]
+    lons = [lon for _, lon in coords]
+    return {"lat_min": min(lats), "lat_max": max(lats), "lon_min": min(lons), "lon_max": max(lons)}
+
+
+def set_bbox(obj, corners):
+    """Set the bbox columns of `obj` from its corners (not saved)."""
+    for name, value in bbox_of(corners).items():
+        setattr(obj, name, value)
+    return obj
+
+
+def set_geometry(zone, corners):
+    """Set the bbox and center columns of a Zone from its 4 corners (not saved)."""
+    set_bbox(zone, corners)
+    coords = [_coords(c) for c in corners]
+    # Same mean as the former Zone.center
+    zone.center_lat = sum(lat for lat, _ in coords) / len(coords)
+    zone.center_lon = sum(lon for _, lon in coords) / len(coords)
+    return zone
+
+
+def bbox_tuple(obj):
+    """(lat_min, lat_max, lon_min, lon_max) of `obj`, or None without corners."""
+    box = tuple(getattr(obj, name) for name in BBOX_FIELDS)
+    return None if None in box else box
+
+
+def corners_of(obj) -> dict:
+    """
+    {"A": (lat, lon), ...} of `obj` from its box, in the orientation of
+    geometry.compute_region_corners (A top-right, then clockwise).
+    """
+    lat_min, lat_max, lon_min, lon_max = (getattr(obj, name) for name in BBOX_FIELDS)
+    return {
+        "A": (lat_max, lon_max),
+        "B": (lat_min, lon_max),
+        "C": (lat_min, lon_min),
+        "D": (lat_max, lon_min),
+    }
+
+
+# ---------------------------------------------------------
+# PREDICATES
+# ---------------------------------------------------------
+
+class BBoxIntersects(Func):
+    """
+    True for rows whose box intersects `bbox` (edges included).
+    `prefix` reaches the box of a related model, e.g. "grid__".
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, bbox, prefix=""):
+        super().__init__(
+            *[F(f"{prefix}{name}") for name in BBOX_FIELDS],
+            *[Value(float(v)) for v in bbox],
+        )
+
+    def _compile(self, compiler):
+        return [compiler.compile(arg) for arg in self.get_source_expressions()]
+
+    def as_sql(self, compiler, connection, **extra_context):
+        row_lat_min, row_lat_max, row_lon_min, row_lon_max, lat_min, lat_max, lon_min, lon_max = self._compile(compiler)
+        terms = [
+            (row_lat_min, "<=", lat_max),
+            (row_lat_max, ">=", lat_min),
+            (row_lon_min, "<=", lon_max),
+            (row_lon_max, ">=", lon_min),
+        ]
+        sql = " AND ".join(f"{left[0]} {op} {right[0]}" for left, op, right in terms)
+        params = [p for left, _, right in terms for p in (*left[1], *right[1])]
+        return f"({sql})", params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        parts = self._compile(compiler)
+
+        def box(lat_min, lat_max, lon_min, lon_max):
+            # Same expression as the GiST indexes
+            corners = (lon_min, lat_min, lon_max, lat_max)
+            sql = "box(point({}, {}), point({}, {}))".format(*(c[0] for c in corners))
+            return sql, [p for c in corners for p in c[1]]
+
+        row_sql, row_params = box(*parts[:4])
+        query_sql, query_params = box(*parts[4:])
+        return f"{row_sql} && {query_sql}", row_params + query_params
+
+
+def intersecting(queryset, bbox, prefix=""):
+    """Rows of `queryset` whose box intersects (lat_min, lat_max, lon_min, lon_max)."""
+    return queryset.filter(BBoxIntersects(bbox, prefix))
+
+
+def containing(queryset, lat, lon, prefix=""):
+    """Rows of `queryset` whose box contains (lat, lon)."""
+    return intersecting(queryset, (lat, lat, lon, lon), prefix)
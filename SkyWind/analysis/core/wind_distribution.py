@@ -0,0 +1,127 @@
+"""
+wind_distribution.py
+--------------------
+
+Hourly 100m wind-speed histograms and Weibull fits, for all zones at once.
+
+Earth Engine bins every hourly ERA5 speed of a pixel into fixed 1 m/s bins
+in one reduction (see gee_data.get_wind_histogram_image); each zone keeps
+its hour counts per bin (`Zone.wind_histogram`, a list of WIND_HIST_BINS
+integers, ~100 bytes). Everything distribution-aware – Weibull parameters,
+hours above a speed, turbine yield – is then computed here, without further
+Earth Engine calls.
+
+This module is **pure NumPy**: it does NOT import Django, Earth Engine, or
+database models.
+
+    • bin_edges() / bin_centers()  – the fixed bins
+    • histogram_matrix()           – stored lists → (zones × bins) counts
+    • merge_histograms()           – sum the counts of several years
+    • compact()                    – counts → stored list of whole hours
+    • fit_weibull()                – k, c per zone (vectorized)
+    • fraction_above()             – share of hours at or above a speed
+
+The Weibull fit uses the binned mean and standard deviation (Sheppard-
+corrected for the 1 m/s bins), the empirical k = (σ/μ)^-1.086 (Justus)
+and c = μ / Γ(1 + 1/k) with Γ(1 + 1/k) ≈ (0.568 + 0.433/k)^(1/k) (Lysen).
+Both approximations are within 1% for 1 ≤ k ≤ 10 and need no iteration,
+so 10,000 zones fit in a few milliseconds.
+"""
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# BINS
+# ---------------------------------------------------------
+
+# Speeds above WIND_HIST_MAX are counted in the last bin
+WIND_HIST_MAX = 30.0       # m/s
+WIND_HIST_BINS = 30        # 1 m/s wide
+
+# Band names of the flattened histogram image, one per bin
+WIND_HIST_BANDS = tuple(f"h{i:02d}" for i in range(WIND_HIST_BINS))
+
+# Part of the wind_distribution freshness version: changing the bins
+# invalidates every stored histogram
+WIND_HIST_TAG = f"bins{WIND_HIST_BINS}x{WIND_HIST_MAX:g}"
+
+
+def bin_edges() -> np.ndarray:
+    return np.linspace(0.0, WIND_HIST_MAX, WIND_HIST_BINS + 1)
+
+
+def bin_centers() -> np.ndarray:
+    edges = bin_edges()
+    return (edges[:-1] + edges[1:]) / 2
+
+
+# ---------------------------------------------------------
+# HISTOGRAMS
+# ---------------------------------------------------------
+
+def histogram_matrix(histograms) -> np.ndarray:
+    """
+    Stored histograms → float array of shape (zones, WIND_HIST_BINS).
+
+    A zone without a histogram (None, empty or the wrong length) is a row
+    of zeros; missing bin values count as 0.
+    """
+    matrix = np.zeros((len(histograms), WIND_HIST_BINS))
+    for i, hist in enumerate(histograms):
+        if hist and len(hist) == WIND_HIST_BINS:
+            matrix[i] = [h or 0.0 for h in hist]
+    return matrix
+
+
+def merge_histograms(per_year) -> np.ndarray:
+    """Sum a sequence of (zones × bins) count arrays, e.g. one per year."""
+    return np.sum([np.asarray(counts, dtype=float) for counts in per_year], axis=0)
+
+
+def compact(counts) -> list:
+    """One row of counts → list of whole hours, as stored on the zone."""
+    return [int(round(c)) for c in np.nan_to_num(np.asarray(counts, dtype=float))]
+
+
+# ---------------------------------------------------------
+# DISTRIBUTION METRICS
+# ---------------------------------------------------------
+
+def fit_weibull(counts):
+    """
+    Weibull shape k and scale c (m/s) for every row of `counts`.
+
+    Returns (k, c), two float arrays; zones without hours or without
+    spread (every hour in one bin) get NaN.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    centers = bin_centers()
+    width = WIND_HIST_MAX / WIND_HIST_BINS
+
+    total = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        freq = counts / total[:, None]
+        mean = freq @ centers
+        var = freq @ centers**2 - mean**2 - width**2 / 12
+
+        k = (np.sqrt(var) / mean) ** -1.086
+        c = mean / (0.568 + 0.433 / k) ** (1 / k)
+
+    bad = ~(total > 0) | ~(var > 0) | ~np.isfinite(k)
+    k[bad] = np.nan
+    c[bad] = np.nan
+    return k, c
+
+
+def fraction_above(counts, speed: float) -> np.ndarray:
+    """
+    Share of hours at or above `speed` (m/s) per zone, e.g. the cut-in
+    speed of a turbine. `speed` is rounded down to a bin edge.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    first = int(np.clip(np.floor(speed / (WIND_HIST_MAX / WIND_HIST_BINS)), 0, WIND_HIST_BINS))
+
+    total = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, counts[:, first:].sum(axis=1) / total, 0.0)
@@ -0,0 +1,271 @@
+"""
+zonal_stats.py
+--------------
+
+Vectorized zonal statistics for axis-aligned zone rectangles.
+
+This module is **pure NumPy**: it does NOT import Django, Earth Engine, or
+database models. It computes, for every zone of a grid at once, the same
+statistics the pipeline asks Earth Engine for:
+
+    • mean                  → air_density, power_avg, wind speed/direction
+    • min / max             → min_alt, max_alt
+    • stdDev                → roughness
+    • frequencyHistogram    → land_type
+
+How it works:
+
+    1. Each zone rectangle becomes a pixel window (rows r0:r1, cols c0:c1):
+       the pixels whose centers fall inside it, or the pixel under the zone
+       center when the zone is smaller than one pixel.
+    2. The union of all window edges cuts the raster into "elementary"
+       blocks; one ufunc.reduceat per axis reduces every block in one pass.
+    3. Zone sums come from a summed-area table over the (small) block grid;
+       zone min/max are read straight from the block grid, since the zones
+       of generate_zone_grid never overlap and each one is a single block.
+
+A 100×100 grid over a 20 km region at 30m (667×667 px) takes ~20 ms;
+see ZonalStatsTests in analysis/tests.py for correctness checks and
+tests/benchmark_zonal_stats.py for timings.
+"""
+
+import math
+import warnings
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# ZONE WINDOWS
+# ---------------------------------------------------------
+
+def cell_bounds(cells):
+    """
+    (N, 4) array of (lat_min, lat_max, lon_min, lon_max).
+
+    `cells` is the output of generate_zone_grid (rows of corner dicts) or a
+    flat sequence of corner dicts; zones come out in row-major order.
+    """
+    if cells and isinstance(cells[0], list):
+        cells = [cell for row in cells for cell in row]
+
+    out = np.empty((len(cells), 4))
+    for i, cell in enumerate(cells):
+        lats = [cell[k][0] for k in ("A", "B", "C", "D")]
+        lons = [cell[k][1] for k in ("A", "B", "C", "D")]
+        out[i] = (min(lats), max(lats), min(lons), max(lons))
+    return out
+
+
+def zone_windows(bounds, lat_max, lon_min, res_lat, res_lon, shape):
+    """
+    Pixel windows of zone rectangles on a north-up lat/lon raster.
+
+    Args:
+        bounds: (N, 4) array of (lat_min, lat_max, lon_min, lon_max)
+        lat_max, lon_min: top-left corner of the raster
+        res_lat, res_lon: pixel size in degrees
+        shape: (rows, cols) of the raster
+
+    Returns:
+        (r0, r1, c0, c1) int arrays; zone i covers raster[r0[i]:r1[i], c0[i]:c1[i]]
+    """
+    bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+    z_lat_min, z_lat_max, z_lon_min, z_lon_max = bounds.T
+    rows, cols = shape
+
+    # Pixel centers inside the rectangle
+    r0 = np.ceil((lat_max - z_lat_max) / res_lat - 0.5)
+    r1 = np.floor((lat_max - z_lat_min) / res_lat - 0.5) + 1
+    c0 = np.ceil((z_lon_min - lon_min) / res_lon - 0.5)
+    c1 = np.floor((z_lon_max - lon_min) / res_lon - 0.5) + 1
+
+    # Zones thinner than a pixel take the pixel under their center
+    thin = r1 <= r0
+    r0 = np.where(thin, np.floor((lat_max - (z_lat_min + z_lat_max) / 2) / res_lat), r0)
+    r1 = np.where(thin, r0 + 1, r1)
+    thin = c1 <= c0
+    c0 = np.where(thin, np.floor(((z_lon_min + z_lon_max) / 2 - lon_min) / res_lon), c0)
+    c1 = np.where(thin, c0 + 1, c1)
+
+    return (
+        np.clip(r0, 0, rows).astype(np.intp),
+        np.clip(r1, 0, rows).astype(np.intp),
+        np.clip(c0, 0, cols).astype(np.intp),
+        np.clip(c1, 0, cols).astype(np.intp),
+    )
+
+
+# ---------------------------------------------------------
+# ENGINE
+# ---------------------------------------------------------
+
+class ZonalIndex:
+    """
+    Precomputed zone → block mapping for one raster grid.
+
+    Build it once per (raster shape, zones) and reuse it for every band.
+    All statistics return one value per zone (NaN for zones with no valid
+    pixel); histogram() returns one dict per zone.
+    """
+
+    def __init__(self, windows, shape):
+        r0, r1, c0, c1 = (np.asarray(w, dtype=np.intp) for w in windows)
+        self.shape = tuple(shape)
+        self.n = len(r0)
+        self.empty = (r1 <= r0) | (c1 <= c0)
+
+        live = ~self.empty
+        self._row_edges = np.unique(np.concatenate([r0[live], r1[live]]))
+        self._col_edges = np.unique(np.concatenate([c0[live], c1[live]]))
+
+        # Zone → range of elementary blocks
+        self._br0 = np.searchsorted(self._row_edges, r0)
+        self._br1 = np.searchsorted(self._row_edges, r1)
+        self._bc0 = np.searchsorted(self._col_edges, c0)
+        self._bc1 = np.searchsorted(self._col_edges, c1)
+
+        self._window_sizes = np.where(live, (r1 - r0) * (c1 - c0), 0)
+        self._single = live & (self._br1 - self._br0 == 1) & (self._bc1 - self._bc0 == 1)
+        self._multi = np.flatnonzero(live & ~self._single)
+
+    # -----------------------------------------------------
+    # BLOCK REDUCTIONS
+    # -----------------------------------------------------
+
+    def _covered(self, values):
+        """The part of the raster any zone touches (a view, no copy)."""
+        re, ce = self._row_edges, self._col_edges
+        return np.asarray(values)[re[0]:re[-1], ce[0]:ce[-1]]
+
+    def _blocks(self, ufunc, covered, dtype=None):
+        """ufunc reduced over every elementary block → (row blocks, col blocks)."""
+        re, ce = self._row_edges, self._col_edges
+        a = ufunc.reduceat(covered, re[:-1] - re[0], axis=0, dtype=dtype)
+        return ufunc.reduceat(a, ce[:-1] - ce[0], axis=1, dtype=dtype)
+
+    def _zone_sums(self, blocks):
+        sat = np.zeros((blocks.shape[0] + 1, blocks.shape[1] + 1), dtype=blocks.dtype)
+        sat[1:, 1:] = blocks.cumsum(axis=0).cumsum(axis=1)
+        sums = (
+            sat[self._br1, self._bc1] - sat[self._br0, self._bc1]
+            - sat[self._br1, self._bc0] + sat[self._br0, self._bc0]
+        )
+        sums[self.empty] = 0
+        return sums
+
+    def _zone_extreme(self, ufunc, blocks):
+        out = np.full(self.n, np.nan)
+        single = self._single
+        out[single] = blocks[self._br0[single], self._bc0[single]]
+        for i in self._multi:
+            out[i] = ufunc.reduce(
+                blocks[self._br0[i]:self._br1[i], self._bc0[i]:self._bc1[i]], axis=None
+            )
+        return out
+
+    def _has_blocks(self):
+        return len(self._row_edges) > 1
+
+    # -----------------------------------------------------
+    # STATISTICS
+    # -----------------------------------------------------
+
+    def count(self, values):
+        """Number of valid (finite) pixels per zone."""
+        if not self._has_blocks():
+            return np.zeros(self.n, dtype=np.int64)
+        covered = self._covered(values)
+        if covered.dtype.kind != "f":
+            return self._window_sizes.copy()
+        return self._zone_sums(self._blocks(np.add, np.isfinite(covered), dtype=np.int64))
+
+    def mean(self, values):
+        return self.mean_std(values)[0]
+
+    def std(self, values):
+        """Population standard deviation (same as ee.Reducer.stdDev)."""
+        return self.mean_std(values)[1]
+
+    def mean_std(self, values):
+        """(mean, stdDev) per zone from one pass over sums and squared sums."""
+        if not self._has_blocks():
+            return np.full(self.n, np.nan), np.full(self.n, np.nan)
+
+        covered = self._covered(values)
+
+        # Shift by a reference value so E[x²] - E[x]² does not cancel
+        # (e.g. 0.5m roughness on 3000m elevation); a coarse sample is enough
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ref = float(np.nanmean(covered[::8, ::8]))
+        if not math.isfinite(ref):
+            ref = 0.0
+
+        data = np.subtract(covered, ref, dtype=np.float64)
+        if covered.dtype.kind == "f":
+            invalid = ~np.isfinite(data)
+            if invalid.any():
+                data[invalid] = 0.0
+                n = self._zone_sums(self._blocks(np.add, ~invalid, dtype=np.int64))
+            else:
+                n = self._window_sizes
+        else:
+            n = self._window_sizes
+        n = n.astype(np.float64)
+
+        s = self._zone_sums(self._blocks(np.add, data))
+        np.square(data, out=data)
+        ss = self._zone_sums(self._blocks(np.add, data))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = s / n
+            var = np.maximum(ss / n - m * m, 0.0)
+        m = np.where(n > 0, m + ref, np.nan)
+        sd = np.where(n > 0, np.sqrt(var), np.nan)
+        return m, sd
+
+    def min(self, values):
+        return self._extreme(np.fmin, values)
+
+    def max(self, values):
+        return self._extreme(np.fmax, values)
+
+    def _extreme(self, ufunc, values):
+        # fmin/fmax skip NaN, so invalid pixels need no masking
+        if not self._has_blocks():
+            return np.full(self.n, np.nan)
+        values = self._covered(values)
+        if values.dtype.kind != "f":
+            values = values.astype(np.float64)
+        return self._zone_extreme(ufunc, self._blocks(ufunc, values))
+
+    def histogram(self, values, nodata=0):
+        """
+        Pixel count per class and zone, as frequencyHistogram returns it:
+        [{"10": 1520, "30": 410}, ...] (nodata pixels are not counted).
+        """
+        out = [{} for _ in range(self.n)]
+        if not self._has_blocks():
+            return out
+
+        covered = self._covered(values)
+
+        if covered.dtype.kind == "u":
+            classes = np.flatnonzero(np.bincount(covered.ravel()))
+        else:
+            classes = np.unique(covered)
+
+        for cls in classes:
+            if nodata is not None and cls == nodata:
+                continue
+            counts = self._zone_sums(self._blocks(np.add, covered == cls, dtype=np.int64))
+            key = str(int(cls))
+            for i in np.flatnonzero(counts):
+                out[i][key] = int(counts[i])
+        return out
+
+
+def zonal_index(bounds, lat_max, lon_min, res_lat, res_lon, shape) -> ZonalIndex:
+    """ZonalIndex of zone rectangles (see zone_windows) on one raster grid."""
+    return ZonalIndex(zone_windows(bounds, lat_max, lon_min, res_lat, res_lon, shape), shape)
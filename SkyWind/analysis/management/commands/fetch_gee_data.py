@@ -9,41 +9,194 @@ This command fetches all Earth Engine data for each RegionGrid:
     3. DEM (min/max elevation + roughness)
     4. Air density
     5. Wind power density
+       5b. Hourly wind-speed histogram + Weibull fit
     6. Land cover classification
     7. Potential scoring
     8. Region-level metrics (wind rose, rating)
 
+Temperatures for all region centers go out as one batched request. Steps
+2-6 run as one combined multi-band reduction for all grids together: the
+zones are packed into request batches of at most GEE_MAX_ZONES_PER_REQUEST
+(small grids share a batch, large grids are sharded) that run in parallel
+(see request_planner.py). Pass --per-step to run them one reduction at a time,
+or --snapshot to compute them locally from the region's raster snapshots
+(downloaded once per region, then reused for any zones_per_edge).
+With RASTER_BACKEND = "local" every step reads staged rasters instead
+(see stage_local_rasters) and Earth Engine is never called.
+
+Step 5b bins every hourly speed of the year in one histogram reduction
+(or reads the histogram raster in snapshot / local mode); the Weibull
+parameters are fitted locally (see wind_distribution.py).
+
+Pass --years 2019-2023 (or set GEE_CLIMATOLOGY_YEARS) for multi-year mode:
+per-year wind / air density / power density are stored in
+ZoneMetricHistory (only missing years are computed) and the zones get the
+climatological means; the wind histograms of all years are added up.
+Steps 2-6 then reduce terrain and land cover only.
+
+Every metric is recomputed, whatever its freshness (compute_gee_for_grid
+and the job queue refresh only stale metrics). Each computed metric is
+stamped with its time and source version (see freshness.py).
+
+Results are kept in memory and written with bulk updates of the changed
+fields only: the batched temperature / zone-metric requests once, then
+each grid in one transaction after its last step (see WriteBuffer). The
+grid's columnar metric store is rebuilt afterwards (see metric_store.py).
+
+Adaptive grids (max_depth > 0) are then refined: well-scoring zones are
+split in 4 and only the new children are computed (see quadtree.py).
+
+Pass --bbox LAT_MIN LAT_MAX LON_MIN LON_MAX to process only the grids
+intersecting that area.
+
+Pass --enqueue to queue the grids as bulk-priority jobs for
+run_pipeline_worker instead; interactive requests from the API are served
+ahead of them.
+
 Relies on:
     analysis.core.gee_data
+    analysis.core.freshness
+    analysis.core.gee_service
+    analysis.core.metric_store
+    analysis.core.request_planner
+    analysis.core.spatial
     analysis.core.wind
     analysis.models
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from analysis.models import RegionGrid, Zone
-from analysis.core.gee_data import (
-    get_avg_temperature,
-    get_avg_wind_speeds,
-    get_dem_layers,
-    get_air_density_image,
-    get_wind_power_density_image,
-    get_landcover_image,
-    WORLD_COVER_CLASSES,
+from analysis.models import RegionGrid, Zone, PipelineJob
+from analysis.core import gee_client
+from analysis.core.job_queue import enqueue_grid_refresh
+from analysis.core.local_rasters import BACKEND_LOCAL, get_backend
+from analysis.core.gee_service import (
+    build_zone_feature_collection,
+    compute_gee_for_grid,
+    compute_potential,
+    compute_temperature,
+    compute_temperatures,
+    compute_climatology,
+    compute_zone_metrics_combined,
+    compute_zone_metrics_snapshot,
+    grid_bounds,
+    zone_layers,
+    compute_wind_per_zone,
+    compute_altitude_roughness_dem,
+    compute_air_density,
+    compute_WIND_power_density,
+    compute_wind_distribution,
+    compute_land_cover,
+    REGION_SUMMARY_FIELDS,
 )
 from analysis.core.wind import compute_wind_rose
-import ee
+from analysis.core.climatology import parse_years
+from analysis.core.freshness import WriteBuffer, bulk_save_stamped, current_versions
+from analysis.core.metric_store import write_store
+from analysis.core.request_planner import plan_batches
+from analysis.core.spatial import intersecting
 
 
 class Command(BaseCommand):
     help = "Fetch all GEE data for each RegionGrid and update zone + region metrics."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--per-step",
+            action="store_true",
+            help="Run steps 2-6 as separate reductions instead of one combined reduction.",
+        )
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="Compute steps 2-6 locally from downloaded region rasters.",
+        )
+        parser.add_argument(
+            "--years",
+            nargs="+",
+            help="Multi-year climatology, e.g. --years 2019-2023 or --years 2019 2021 2022.",
+        )
+        parser.add_argument(
+            "--bbox",
+            nargs=4,
+            type=float,
+            metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"),
+            help="Only the grids intersecting this bounding box (indexed, see core/spatial.py).",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue one bulk-priority job per grid for run_pipeline_worker instead of running inline.",
+        )
+
     def handle(self, *args, **options):
 
         grids = RegionGrid.objects.all()
+        if options["bbox"]:
+            grids = intersecting(grids, options["bbox"])
         if not grids.exists():
             self.stdout.write(self.style.ERROR("❌ No RegionGrid objects found."))
             return
 
+        if options["enqueue"]:
+            for grid in grids:
+                job = enqueue_grid_refresh(grid, priority=PipelineJob.PRIORITY_BULK)
+                self.stdout.write(f"📥 Grid {grid.id} → Job {job.id} ({job.status})")
+            self.stdout.write(self.style.SUCCESS("\n🎉 All RegionGrids queued."))
+            return
+
+        # Staged rasters replace Earth Engine entirely (RASTER_BACKEND = "local")
+        local = get_backend() == BACKEND_LOCAL
+
+        if options["years"]:
+            years = parse_years(",".join(options["years"]))
+        else:
+            years = parse_years(getattr(settings, "GEE_CLIMATOLOGY_YEARS", ""))
+        # Freshness of this run's results is judged against its own years
+        versions = current_versions(years)
+        # Climatology writes the atmospheric metrics of a multi-year run
+        layers = zone_layers(years)
+
+        grids = list(grids.select_related("region", "region__center"))
+        zones_by_grid = {
+            grid.id: list(grid.zones.select_related("infrastructure"))
+            for grid in grids
+        }
+
+        # Results of the requests shared by all grids, written before the
+        # per-grid steps
+        writes = WriteBuffer(current=versions)
+
+        # -----------------------------------------------------------------
+        # STEP 1 — Temperature at every region center, one batched request
+        # -----------------------------------------------------------------
+        try:
+            temps = compute_temperatures([grid.region for grid in grids if zones_by_grid[grid.id]], writes)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"❌ Temperature error: {e}"))
+            temps = {}
+
+        # -----------------------------------------------------------------
+        # STEPS 2-6 — Combined reduction for all grids at once: zones are
+        # packed into size-bounded request batches (small grids together,
+        # large grids sharded) that run in parallel
+        # -----------------------------------------------------------------
+        batched = False
+        if not (options["snapshot"] or local or options["per_step"]):
+            all_zones = [z for zones in zones_by_grid.values() for z in zones]
+            try:
+                self.stdout.write(self.style.NOTICE(
+                    f"🛰 Wind, DEM, air, power, land cover for {len(all_zones)} zones "
+                    f"in {len(plan_batches(all_zones))} request batch(es)..."
+                ))
+                fc, zone_map = build_zone_feature_collection(all_zones)
+                compute_zone_metrics_combined(all_zones, fc, zone_map, writes=writes, layers=layers)
+                batched = True
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Batched reduction error: {e} (retrying per grid)"))
+
+        self.stdout.write(f"💾 {writes.flush()} rows written")
+
         for grid in grids:
             region = grid.region
 
@@ -52,331 +205,173 @@ class Command(BaseCommand):
                 f"{grid.zones_per_edge}×{grid.zones_per_edge})"
             ))
 
-            zones = list(grid.zones.all())
+            zones = zones_by_grid[grid.id]
             if not zones:
                 self.stdout.write(self.style.WARNING("⚠ No zones in this grid. Skipping."))
                 continue
 
-            # -------------------------------------------------------------
-            # STEP 1 — Temperature at region center
-            # -------------------------------------------------------------
-            try:
-                temp = get_avg_temperature(region.center.lat, region.center.lon)
-                region.avg_temperature = temp
-                region.save()
-                self.stdout.write(self.style.SUCCESS(f"🌡 Temperature OK = {temp:.2f}°C"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Temperature error: {e}"))
-                continue
-
-            # -------------------------------------------------------------
-            # STEP 2 — Wind speed & direction for each zone
-            # -------------------------------------------------------------
-            centers = []
-            for z in zones:
-                lat = round((z.A.lat + z.B.lat + z.C.lat + z.D.lat) / 4, 5)
-                lon = round((z.A.lon + z.B.lon + z.C.lon + z.D.lon) / 4, 5)
-                centers.append((lat, lon))
-
-            try:
-                wind_data = get_avg_wind_speeds(centers)
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Wind speed error: {e}"))
-                continue
-
-            missing = 0
-            for z, (lat, lon) in zip(zones, centers):
-                data = wind_data.get((lat, lon))
-                if not data:
-                    missing += 1
-                    z.avg_wind_speed = 0.0
-                    z.wind_direction = 0.0
-                else:
-                    z.avg_wind_speed = round(data["speed"], 2)
-                    z.wind_direction = round(data["direction"], 1)
-                z.save()
-
-            self.stdout.write(self.style.SUCCESS(
-                f"💨 Wind updated"
-            ))
-
-            # -------------------------------------------------------------
-            # BUILD SHARED ZONE DATA STRUCTURES
-            # (Used by DEM, air density, power density, and land cover)
-            # -------------------------------------------------------------
-            zone_map = {z.id: z for z in zones}
-
-            features = []
-            for z in zones:
-                poly = [
-                    [z.A.lon, z.A.lat],
-                    [z.B.lon, z.B.lat],
-                    [z.C.lon, z.C.lat],
-                    [z.D.lon, z.D.lat],
-                    [z.A.lon, z.A.lat],
-                ]
-                features.append(ee.Feature(
-                    ee.Geometry.Polygon([poly]),
-                    {"zone_id": z.id}
-                ))
-
-            fc = ee.FeatureCollection(features)
-
-            # -------------------------------------------------------------
-            # STEP 3 — DEM (min/max altitude + roughness)
-            # -------------------------------------------------------------
-            try:
-                self.stdout.write(self.style.NOTICE("🗺 DEM..."))
-
-                dem_img = get_dem_layers()
-
-                reducer = (
-                    ee.Reducer.mean()
-                    .combine(ee.Reducer.minMax(), sharedInputs=True)
-                    .combine(ee.Reducer.stdDev(), sharedInputs=True)
-                )
-
-                result = dem_img.reduceRegions(
-                    collection=fc,
-                    reducer=reducer,
-                    scale=30
-                ).getInfo()
-
-                for f in result["features"]:
-                    props = f["properties"]
-                    z = zone_map.get(int(props["zone_id"]))
-                    if not z:
-                        continue
-
-                    z.min_alt = round(float(props.get("elevation_min", 0.0)), 2)
-                    z.max_alt = round(float(props.get("elevation_max", 0.0)), 2)
-                    z.roughness = round(float(props.get("tri_stdDev", 0.0)), 2)
-
-                    z.save()
-
-                self.stdout.write(self.style.SUCCESS("✅ DEM updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ DEM error: {e}"))
-
-            # -------------------------------------------------------------
-            # STEP 4 — Air density
-            # -------------------------------------------------------------
-            try:
-                self.stdout.write(self.style.NOTICE("🌫 Air density..."))
-
-                img = get_air_density_image()
-                res = img.reduceRegions(
-                    collection=fc,
-                    reducer=ee.Reducer.mean(),
-                    scale=1000
-                ).getInfo()
-
-                for f in res["features"]:
-                    z = zone_map.get(int(f["properties"]["zone_id"]))
-                    if not z:
-                        continue
-                    z.air_density = round(float(f["properties"].get("mean", 0.0)), 3)
-                    z.save()
-
-                self.stdout.write(self.style.SUCCESS("💨 Air density updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Air density error: {e}"))
-
-            # -------------------------------------------------------------
-            # STEP 5 — Wind power density
-            # -------------------------------------------------------------
-            try:
-                self.stdout.write(self.style.NOTICE("⚡ Power density..."))
-
-                img = get_wind_power_density_image()
-                res = img.reduceRegions(
-                    collection=fc,
-                    reducer=ee.Reducer.mean(),
-                    scale=1000
-                ).getInfo()
-
-                for f in res["features"]:
-                    z = zone_map.get(int(f["properties"]["zone_id"]))
-                    if not z:
-                        continue
-                    z.power_avg = round(float(f["properties"].get("mean", 0.0)), 1)
-                    z.save()
-
-                self.stdout.write(self.style.SUCCESS("⚡ Power density updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Power density error: {e}"))
-
-            # -------------------------------------------------------------
-            # STEP 6 — Land cover
-            # -------------------------------------------------------------
+            # The grid's results, written in one transaction after its last step
+            writes = WriteBuffer(current=versions)
             try:
-                self.stdout.write(self.style.NOTICE("🏞 Land cover..."))
-
-                img = get_landcover_image()
-
-                # We use frequency histogram instead of mode
-                lc_res = img.reduceRegions(
-                    collection=fc,
-                    reducer=ee.Reducer.frequencyHistogram(),
-                    scale=10
-                ).getInfo()
-
-                for feat in lc_res["features"]:
-                    props = feat["properties"]
-                    zid = props.get("zone_id")
-                    z = zone_map.get(int(zid))
-                    if not z:
+                # -------------------------------------------------------------
+                # STEP 1 — Temperature at region center
+                # -------------------------------------------------------------
+                try:
+                    temp = temps[region.id] if region.id in temps else compute_temperature(region, writes)
+                    self.stdout.write(self.style.SUCCESS(f"🌡 Temperature OK = {temp:.2f}°C"))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Temperature error: {e}"))
+                    continue
+
+                if options["snapshot"] or local:
+                    # ---------------------------------------------------------
+                    # STEPS 2-6 — Local statistics on the region snapshots
+                    # ---------------------------------------------------------
+                    try:
+                        self.stdout.write(self.style.NOTICE("🧊 Wind, DEM, air, power, land cover (snapshot)..."))
+                        compute_zone_metrics_snapshot(
+                            zones, {z.id: z for z in zones}, grid_bounds(grid), writes=writes, layers=layers,
+                        )
+                        self.stdout.write(self.style.SUCCESS("✅ Zone metrics updated."))
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"❌ Snapshot error: {e}"))
                         continue
-
-                    hist = props.get("histogram")
-
-                    # If no histogram → empty dict
-                    if not hist:
-                        z.land_type = {}
-                        z.save()
+                elif batched:
+                    self.stdout.write(self.style.SUCCESS("✅ Zone metrics updated (batched)."))
+                elif not options["per_step"]:
+                    # ---------------------------------------------------------
+                    # STEPS 2-6 — One combined multi-band reduction
+                    # ---------------------------------------------------------
+                    try:
+                        self.stdout.write(self.style.NOTICE("🛰 Wind, DEM, air, power, land cover (combined)..."))
+                        fc, zone_map = build_zone_feature_collection(zones)
+                        compute_zone_metrics_combined(zones, fc, zone_map, writes=writes, layers=layers)
+                        self.stdout.write(self.style.SUCCESS("✅ Zone metrics updated."))
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"❌ Combined reduction error: {e}"))
                         continue
+                else:
+                    # ---------------------------------------------------------
+                    # STEPS 2-6 — One reduction per metric
+                    # ---------------------------------------------------------
+                    fc, zone_map = build_zone_feature_collection(zones)
 
-                    # FIX: Convert histogram to int keys and float values
-                    # GEE returns string keys like "40", "50"
-                    hist_clean = {}
-                    for k, v in hist.items():
+                    if not years:
                         try:
-                            class_id = int(float(k))  # Handle "40.0" or "40"
-                            count = float(v)
-                            hist_clean[class_id] = count
-                        except (ValueError, TypeError):
+                            compute_wind_per_zone(zones, writes)
+                            self.stdout.write(self.style.SUCCESS("💨 Wind updated"))
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"❌ Wind speed error: {e}"))
                             continue
 
-                    if not hist_clean:
-                        z.land_type = {}
-                        z.save()
-                        continue
-
-                    # Calculate total pixels for percentage calculation
-                    total_pixels = sum(hist_clean.values())
-                    
-                    # Build dict with percentages for ALL classes
-                    land_type_percentages = {}
-                    for class_id, count in hist_clean.items():
-                        label = WORLD_COVER_CLASSES.get(class_id, f"class_{class_id}")
-                        percentage = round((count / total_pixels) * 100, 1)
-                        land_type_percentages[label] = percentage
-                    
-                    # Sort by percentage descending and save
-                    z.land_type = dict(sorted(land_type_percentages.items(), key=lambda x: x[1], reverse=True))
-                    z.save()
-
-                self.stdout.write(self.style.SUCCESS("🏞 Land cover updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Land cover error: {e}"))
-
-            # -------------------------------------------------------------
-            # STEP 7 — Potential scoring with gradual land suitability
-            # -------------------------------------------------------------
-            try:
-                self.stdout.write(self.style.NOTICE("📈 Potential..."))
-
-                # Land suitability scores for each land cover class
-                LAND_SUITABILITY_SCORES = {
-                    "Grassland": 1.0,
-                    "Bare / sparse": 1.0,
-                    "Cropland": 0.9,
-                    "Shrubland": 1.0,
-                    "Tree cover": 0.4,
-                    "Moss / lichen": 0.4,
-                    "Built-up": 0.0,
-                    "Permanent water": 0.0,
-                    "Herbaceous wetland": 0.0,
-                    "Snow / ice": 0.0,
-                    "Mangroves": 0.0,
-                }
-
-                HARD_EXCLUSION = {
-                    "Built-up",
-                    "Permanent water",
-                    "Herbaceous wetland",
-                    "Snow / ice",
-                    "Mangroves",
-                }
-
-                def compute_land_suitability(land_type_dict):
-                    """Calculate land suitability with gradual buildable fraction penalty."""
-                    if not land_type_dict:
-                        return 0.0, 0.0
-                    
-                    buildable_fraction = 0.0
-                    weighted_suitability = 0.0
-                    
-                    for land_class, percentage in land_type_dict.items():
-                        fraction = percentage / 100.0
-                        suitability = LAND_SUITABILITY_SCORES.get(land_class, 0.5)
-                        
-                        if land_class not in HARD_EXCLUSION:
-                            buildable_fraction += fraction
-                            weighted_suitability += fraction * suitability
-                    
-                    # No hard threshold - gradual penalty
-                    if buildable_fraction > 0:
-                        S_land = weighted_suitability / buildable_fraction
-                    else:
-                        S_land = 0.0
-                    
-                    # Effective land score includes buildable fraction penalty
-                    S_land_effective = S_land * buildable_fraction
-                    
-                    return S_land_effective, buildable_fraction
-
-                def score(z):
-                    # Wind component
-                    S_wind = min(1.25, (z.power_avg or 0.0) / 800)
-                    
-                    # Terrain component
-                    S_terrain = 1 - min(1.0, (z.roughness or 0.0) / 50)
-                    
-                    # Land suitability component (gradual)
-                    land_types = z.land_type if isinstance(z.land_type, dict) else {}
-                    S_land_effective, _ = compute_land_suitability(land_types)
-                    
-                    # Combined calculation
-                    S_base = 0.7 * S_wind + 0.3 * S_terrain
-                    
-                    return round(100 * S_base * S_land_effective, 1)
-
-                for z in zones:
-                    z.potential = score(z)
-                    z.save()
-
-                self.stdout.write(self.style.SUCCESS("📊 Potential updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Potential error: {e}"))
+                    steps = [("🗺 DEM", compute_altitude_roughness_dem)]
+                    if not years:
+                        steps += [
+                            ("🌫 Air density", compute_air_density),
+                            ("⚡ Power density", compute_WIND_power_density),
+                        ]
+                    steps.append(("🏞 Land cover", compute_land_cover))
+                    for label, step in steps:
+                        try:
+                            self.stdout.write(self.style.NOTICE(f"{label}..."))
+                            step(zones, fc, zone_map, writes)
+                            self.stdout.write(self.style.SUCCESS(f"{label} updated."))
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"❌ {label} error: {e}"))
+
+                # -------------------------------------------------------------
+                # STEP 5b — Wind-speed histogram + Weibull fit
+                # -------------------------------------------------------------
+                try:
+                    self.stdout.write(self.style.NOTICE("🌬 Wind distribution..."))
+                    bounds = grid_bounds(grid) if (options["snapshot"] or local) else None
+                    compute_wind_distribution(zones, years, bounds, writes)
+                    self.stdout.write(self.style.SUCCESS("🌬 Wind distribution updated."))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Wind distribution error: {e}"))
+
+                # -------------------------------------------------------------
+                # STEP 6b — Multi-year climatology
+                # -------------------------------------------------------------
+                if years:
+                    try:
+                        self.stdout.write(self.style.NOTICE(f"📅 Climatology {years[0]}-{years[-1]}..."))
+                        bounds = grid_bounds(grid) if (options["snapshot"] or local) else None
+                        compute_climatology(zones, years, bounds, writes)
+                        self.stdout.write(self.style.SUCCESS(f"📅 Climatology updated ({len(years)} years)."))
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"❌ Climatology error: {e}"))
+
+                # -------------------------------------------------------------
+                # STEP 7 — Potential scoring (vectorized, see scoring.py)
+                # -------------------------------------------------------------
+                try:
+                    self.stdout.write(self.style.NOTICE("📈 Potential..."))
+
+                    compute_potential(zones, writes)
+
+                    self.stdout.write(self.style.SUCCESS("📊 Potential updated."))
+
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Potential error: {e}"))
+
+                # -------------------------------------------------------------
+                # STEP 8 — Compute region wind rose + metrics
+                # -------------------------------------------------------------
+                try:
+                    self.stdout.write(self.style.NOTICE("📘 Region metrics..."))
+
+                    # Leaves only: parents of an adaptive grid are covered by their children
+                    parents = {z.parent_id for z in zones}
+                    leaves = [z for z in zones if z.id not in parents]
+
+                    # Wind rose
+                    region.wind_rose = compute_wind_rose(leaves)
+
+                    # Basic numbers
+                    region.avg_potential = sum(z.potential for z in leaves) / len(leaves)
+                    region.max_potential = max(leaves, key=lambda z: z.potential)
+                    region.infrastructure_rating = (
+                        sum(z.infrastructure.index for z in leaves) / len(leaves)
+                    )
+                    region.index_average = sum(z.zone_index for z in leaves) / len(leaves)
+                    region.rating = int(region.avg_potential * 10)
+
+                    bulk_save_stamped(
+                        [region], ["summary"],
+                        REGION_SUMMARY_FIELDS + ["max_potential", "infrastructure_rating", "index_average"],
+                        writes=writes,
+                    )
+                    self.stdout.write(self.style.SUCCESS("🏁 Region metrics updated."))
+
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Region metrics error: {e}"))
+            finally:
+                self.stdout.write(f"💾 {writes.flush()} rows written")
+                # Adaptive grids rewrite it again after refinement
+                write_store(grid)
 
             # -------------------------------------------------------------
-            # STEP 8 — Compute region wind rose + metrics
+            # Adaptive grids: split well-scoring zones, compute the children
             # -------------------------------------------------------------
-            try:
-                self.stdout.write(self.style.NOTICE("📘 Region metrics..."))
-
-                # Wind rose
-                region.wind_rose = compute_wind_rose(zones)
-
-                # Basic numbers
-                region.avg_potential = sum(z.potential for z in zones) / len(zones)
-                region.max_potential = max(zones, key=lambda z: z.potential)
-                region.infrastructure_rating = (
-                    sum(z.infrastructure.index for z in zones) / len(zones)
-                )
-                region.index_average = sum(z.zone_index for z in zones) / len(zones)
-                region.rating = int(region.avg_potential * 10)
-
-                region.save()
-                self.stdout.write(self.style.SUCCESS("🏁 Region metrics updated."))
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Region metrics error: {e}"))
+            if grid.max_depth > 0:
+                try:
+                    self.stdout.write(self.style.NOTICE(f"🌳 Refining adaptive grid (depth ≤ {grid.max_depth})..."))
+                    compute_gee_for_grid(
+                        grid, combined=not options["per_step"], snapshot=options["snapshot"], years=years,
+                    )
+                    leaves = grid.leaf_zones().count()
+                    self.stdout.write(self.style.SUCCESS(
+                        f"🌳 {leaves} leaf zones ({grid.zones.count()} computed in total)"
+                    ))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Refinement error: {e}"))
 
         self.stdout.write(self.style.SUCCESS("\n🎉 All RegionGrids processed successfully!"))
+
+        if not local:
+            st = gee_client.stats()
+            self.stdout.write(
+                f"🛰 Earth Engine: {st['calls']} calls, {st['retries']} retries, "
+                f"{st['failed']} failed, throttled {st['throttled_seconds']:.1f}s, circuit {st['circuit']}"
+            )
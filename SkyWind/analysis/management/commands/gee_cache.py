@@ -0,0 +1,71 @@
+"""
+gee_cache.py
+------------
+
+Inspect and invalidate the Earth Engine reduction cache.
+
+    python manage.py gee_cache --stats
+    python manage.py gee_cache --purge-outdated
+    python manage.py gee_cache --invalidate ECMWF/ERA5/HOURLY
+    python manage.py gee_cache --clear
+
+--purge-outdated removes every entry whose dataset version differs from
+DATASET_VERSIONS in analysis/core/datasets.py (bump a version there first).
+
+Relies on:
+    analysis.core.reduction_cache
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.core.reduction_cache import ReductionCache
+
+
+class Command(BaseCommand):
+    help = "Show stats for, or invalidate, the Earth Engine reduction cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stats", action="store_true", help="Print entry count and size.")
+        parser.add_argument(
+            "--invalidate",
+            metavar="DATASET_ID",
+            action="append",
+            default=[],
+            help="Drop all entries computed from this dataset (repeatable).",
+        )
+        parser.add_argument(
+            "--purge-outdated",
+            action="store_true",
+            help="Drop entries whose dataset version differs from DATASET_VERSIONS.",
+        )
+        parser.add_argument("--clear", action="store_true", help="Drop everything.")
+
+    def handle(self, *args, **options):
+        if not settings.GEE_CACHE_ENABLED:
+            raise CommandError("GEE_CACHE_ENABLED is off.")
+
+        cache = ReductionCache(settings.GEE_CACHE_PATH, settings.GEE_CACHE_MAX_BYTES)
+
+        if options["clear"]:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("🧹 Cache cleared."))
+
+        for dataset_id in options["invalidate"]:
+            removed = cache.invalidate_dataset(dataset_id)
+            self.stdout.write(self.style.SUCCESS(f"🗑 {dataset_id}: removed {removed} entries"))
+
+        if options["purge_outdated"]:
+            from analysis.core.datasets import DATASET_VERSIONS
+
+            removed = cache.invalidate_outdated(DATASET_VERSIONS)
+            self.stdout.write(self.style.SUCCESS(f"🗑 Removed {removed} outdated entries"))
+
+        if options["stats"] or not any(
+            [options["clear"], options["invalidate"], options["purge_outdated"]]
+        ):
+            st = cache.stats()
+            self.stdout.write(
+                f"📦 {st['entries']} entries, {st['bytes'] / 1e6:.1f} MB "
+                f"of {st['max_bytes'] / 1e6:.0f} MB ({st['path']})"
+            )
@@ -5,20 +5,28 @@ generate_zones.py
 This management command generates all zones for each RegionGrid.
 
 Responsibilities:
-    • Compute region corners based on center + side_km
+    • Compute region corners based on center + side_km (grids snapped to
+      the global lattice keep the corners of their lattice block)
     • Generate n×n zone polygons
-    • Create Point + Zone objects in DB
-    • Update Region corners
+    • Create Point + Zone objects in DB (batched upsert of the shared
+      lattice points + one bulk_create of zones, see core/lattice.py)
+    • Update Region corners (and their bounding boxes, see core/spatial.py)
     • Reuse Infrastructure records
 
 Requires:
     analysis.core.geometry
+    analysis.core.global_lattice
+    analysis.core.lattice
+    analysis.core.spatial
     analysis.models
 """
 
 from django.core.management.base import BaseCommand
-from analysis.models import RegionGrid, Zone, Point, Infrastructure
-from analysis.core.geometry import compute_region_corners, generate_zone_grid
+from analysis.models import RegionGrid, Point, Infrastructure
+from analysis.core.geometry import compute_region_corners
+from analysis.core.global_lattice import lattice_corners
+from analysis.core.lattice import create_grid_zones
+from analysis.core.spatial import set_bbox
 
 
 class Command(BaseCommand):
@@ -49,11 +57,7 @@ class Command(BaseCommand):
             # -------------------------------------------------------------
             # STEP 1 — Compute region corners
             # -------------------------------------------------------------
-            corners = compute_region_corners(
-                center_lat=region.center.lat,
-                center_lon=region.center.lon,
-                side_km=grid.side_km
-            )
+            corners = self.region_corners(region, grid)
 
             # Save corners as Point objects
             A = self.get_point(*corners["A"])
@@ -66,6 +70,7 @@ class Command(BaseCommand):
             region.B = B
             region.C = C
             region.D = D
+            set_bbox(region, [A, B, C, D])
             region.save()
 
             # Update RegionGrid (optional, only if you want)
@@ -73,45 +78,14 @@ class Command(BaseCommand):
             grid.B = B
             grid.C = C
             grid.D = D
+            set_bbox(grid, [A, B, C, D])
             grid.save()
 
             # -------------------------------------------------------------
-            # STEP 2 — Generate zone grid (pure geometry)
-            # -------------------------------------------------------------
-            zone_grid = generate_zone_grid(
-                A=(A.lat, A.lon),
-                B=(B.lat, B.lon),
-                C=(C.lat, C.lon),
-                D=(D.lat, D.lon),
-                n=grid.zones_per_edge
-            )
-
-            # -------------------------------------------------------------
-            # STEP 3 — Create Zone records
+            # STEP 2 — Zone lattice (pure geometry) + bulk Point / Zone
+            # creation
             # -------------------------------------------------------------
-            count = 0
-            zone_index = 1
-
-            for row in zone_grid:
-                for cell in row:
-
-                    A_z = self.get_point(*cell["A"])
-                    B_z = self.get_point(*cell["B"])
-                    C_z = self.get_point(*cell["C"])
-                    D_z = self.get_point(*cell["D"])
-
-                    Zone.objects.create(
-                        grid=grid,
-                        A=A_z,
-                        B=B_z,
-                        C=C_z,
-                        D=D_z,
-                        infrastructure=infra,
-                        zone_index=zone_index
-                    )
-
-                    zone_index += 1
-                    count += 1
+            count = len(create_grid_zones(grid, infra))
 
             self.stdout.write(self.style.SUCCESS(
                 f"✔ Created {count} zones for RegionGrid {grid.id}"
@@ -123,22 +97,32 @@ class Command(BaseCommand):
     # ---------------------------------------------------------------------
 
     def get_point(self, lat, lon):
-        """Get or create a Point with (lat, lon)."""
-        p, _ = Point.objects.get_or_create(lat=lat, lon=lon)
+        """Get or create a Point with (lat, lon), rounded like the zone points."""
+        p, _ = Point.objects.get_or_create(lat=round(lat, 9), lon=round(lon, 9))
         return p
 
-    def update_region_corners(self, region, grid):
+    def region_corners(self, region, grid):
         """
-        If zones already exist, still recompute region corners from center.
-        This ensures region corner points are always correct.
+        Corners of the grid's region: from its center and side_km, or the
+        lattice block of a snapped grid – cos(center_lat) would not match
+        the band longitude step its zones were built with.
         """
-
-        corners = compute_region_corners(
+        if grid.lattice_origin:
+            return lattice_corners(grid.lattice_origin, grid.zones_per_edge)
+        return compute_region_corners(
             center_lat=region.center.lat,
             center_lon=region.center.lon,
             side_km=grid.side_km
         )
 
+    def update_region_corners(self, region, grid):
+        """
+        If zones already exist, still recompute region corners from center.
+        This ensures region corner points are always correct.
+        """
+
+        corners = self.region_corners(region, grid)
+
         A = self.get_point(*corners["A"])
         B = self.get_point(*corners["B"])
         C = self.get_point(*corners["C"])
@@ -148,6 +132,7 @@ class Command(BaseCommand):
         region.B = B
         region.C = C
         region.D = D
+        set_bbox(region, [A, B, C, D])
         region.save()
 
         self.stdout.write(self.style.SUCCESS(
@@ -0,0 +1,79 @@
+"""
+rescore_zones.py
+----------------
+
+Recompute STEP 7 (potential) and STEP 8 (region metrics) from the stored
+zone metrics, for every grid or the given ones, without Earth Engine:
+
+    python manage.py rescore_zones
+    python manage.py rescore_zones --grid 3 --grid 7
+    python manage.py rescore_zones --dry-run
+
+Each grid is scored as arrays (see analysis/core/scoring.py) and written
+with one bulk update; use it after changing the scoring formula or land
+scores (and bump SCORING_VERSION in freshness.py). --dry-run only reports
+how many potentials would change.
+
+Zones whose metrics were never computed are left alone.
+
+The grids' columnar metric stores are rewritten afterwards.
+
+Relies on:
+    analysis.core.metric_store
+    analysis.core.scoring
+    analysis.core.gee_service
+    analysis.models
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from analysis.core.metric_store import write_store
+from analysis.core.scoring import score
+from analysis.models import RegionGrid
+
+
+class Command(BaseCommand):
+    help = "Rescore zone potentials and region metrics from stored zone metrics (no Earth Engine)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grid", type=int, action="append", default=[], help="RegionGrid id (repeatable).")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them.")
+
+    def handle(self, *args, **options):
+        from analysis.core.gee_service import compute_potential, compute_region_metrics
+
+        grids = RegionGrid.objects.select_related("region")
+        if options["grid"]:
+            grids = grids.filter(pk__in=options["grid"])
+
+        total, changed = 0, 0
+        start = time.perf_counter()
+
+        for grid in grids:
+            zones = [z for z in grid.zones.all() if z.freshness.get("land_cover")]
+            if not zones:
+                continue
+
+            potentials = score(
+                [z.power_avg for z in zones], [z.roughness for z in zones], [z.land_type for z in zones],
+            )
+            diff = sum(1 for z, p in zip(zones, potentials) if z.potential != p)
+            total += len(zones)
+            changed += diff
+
+            if options["dry_run"]:
+                self.stdout.write(f"🔎 Grid {grid.id}: {diff}/{len(zones)} potentials would change")
+                continue
+
+            compute_potential(zones)
+            parents = {z.parent_id for z in zones}
+            compute_region_metrics(grid.region, [z for z in zones if z.id not in parents])
+            write_store(grid)
+            self.stdout.write(self.style.SUCCESS(f"📊 Grid {grid.id}: {diff}/{len(zones)} potentials changed"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n🎉 {changed}/{total} zone potentials {'would change' if options['dry_run'] else 'updated'} "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,107 @@
+"""
+run_pipeline_worker.py
+----------------------
+
+Long-running worker that processes queued PipelineJob rows.
+
+Each loop:
+    1. Requeue jobs left 'running' by dead workers (stale heartbeat)
+    2. Claim the next job (interactive first, then bulk)
+    3. Run the full GEE pipeline for its grid
+    4. Sleep when the queue is empty
+
+Several workers (on one or many hosts) can run side by side; claiming uses
+SELECT ... FOR UPDATE SKIP LOCKED.
+
+Earth Engine is initialized once when the worker starts.
+
+Relies on:
+    analysis.core.gee_client
+    analysis.core.job_queue
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from analysis.core.gee_client import warm_up
+from analysis.core.local_rasters import BACKEND_LOCAL, get_backend
+from analysis.core.job_queue import (
+    claim_next_job,
+    default_worker_id,
+    release_stale_jobs,
+    run_job,
+)
+from analysis.models import PipelineJob
+
+
+class Command(BaseCommand):
+    help = "Process queued GEE pipeline jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty (default: 2).",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Requeue running jobs without a heartbeat for this long (default: 30).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        stale_after = timedelta(minutes=options["stale_minutes"])
+
+        self.stdout.write(self.style.NOTICE(f"👷 Worker {worker_id} started"))
+
+        # Every job needs Earth Engine (unless rasters are staged locally):
+        # initialize it now rather than inside the first job
+        if get_backend() != BACKEND_LOCAL:
+            warm_up(background=False)
+
+        while True:
+            close_old_connections()
+
+            released = release_stale_jobs(stale_after)
+            if released:
+                self.stdout.write(self.style.WARNING(f"⚠ Requeued {released} stale job(s)"))
+
+            job = claim_next_job(worker_id)
+
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(self.style.NOTICE(
+                f"▶ Job {job.id}: Grid {job.grid_id} (priority {job.priority})"
+            ))
+
+            started = time.monotonic()
+            job = run_job(job)
+            elapsed = time.monotonic() - started
+
+            if job.worker != worker_id:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠ Job {job.id} was requeued while running; result of this run discarded"
+                ))
+            elif job.status == PipelineJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f"✔ Job {job.id} done in {elapsed:.1f}s"))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"❌ Job {job.id} failed at step {job.step}: {job.error.splitlines()[0]}"
+                ))
+
+        self.stdout.write(self.style.SUCCESS("🏁 Queue empty, worker exiting."))
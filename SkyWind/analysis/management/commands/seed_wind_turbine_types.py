@@ -1,10 +1,11 @@
 from django.core.management.base import BaseCommand
 
+from analysis.core.power_curves import OFFSHORE_TURBINE_CURVE, ONSHORE_TURBINE_CURVE, SMALL_TURBINE_CURVE
 from analysis.models import WindTurbineType
 
 
 class Command(BaseCommand):
-    help = "Seed the database with reference data for wind turbine types."
+    help = "Seed the database with reference data and power curves for wind turbine types."
 
     def handle(self, *args, **options):
         data = [
@@ -17,6 +18,7 @@ class Command(BaseCommand):
                 "swept_area_max_m2": 80.0,
                 "rated_power_min_kw": 1.0,
                 "rated_power_max_kw": 20.0,
+                "power_curve": SMALL_TURBINE_CURVE,
             },
             {
                 "type_name": "Utility-Scale Onshore Turbine",
@@ -27,6 +29,7 @@ class Command(BaseCommand):
                 "swept_area_max_m2": 18000.0,
                 "rated_power_min_kw": 1000.0,
                 "rated_power_max_kw": 6000.0,
+                "power_curve": ONSHORE_TURBINE_CURVE,
             },
             {
                 "type_name": "Utility-Scale Offshore Turbine",
@@ -37,6 +40,7 @@ class Command(BaseCommand):
                 "swept_area_max_m2": 45000.0,
                 "rated_power_min_kw": 8000.0,
                 "rated_power_max_kw": 18000.0,
+                "power_curve": OFFSHORE_TURBINE_CURVE,
             },
         ]
 
@@ -0,0 +1,142 @@
+"""
+stage_local_rasters.py
+----------------------
+
+Export the rasters used by the pipeline from Earth Engine into
+LOCAL_RASTER_DIR, as NPY tiles the local raster backend can read:
+
+    dem/                  Copernicus GLO-30 elevation (30m)
+    worldcover/<year>/    ESA WorldCover Map (10m)
+    era5/<year>/          ERA5 / ERA5-Land annual means (1km): air_density,
+                          power_density, wind_speed, weighted_x,
+                          weighted_y, temperature (°C)
+    era5_hist/<year>/     hourly 100m wind-speed histogram (1km): h00 … h29
+
+    python manage.py stage_local_rasters --bbox 43.6 48.3 20.2 29.8
+    python manage.py stage_local_rasters --bbox 45 47 22 25 --layers era5 era5_hist --year 2023
+
+Tiles already on disk are skipped, so an interrupted run can be restarted.
+Afterwards set RASTER_BACKEND=local to run compute_gee_for_grid and
+fetch_gee_data without Earth Engine.
+
+Relies on:
+    analysis.core.gee_data
+    analysis.core.gee_service
+    analysis.core.raster_snapshot
+    analysis.core.local_rasters
+"""
+
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.core.gee_data import get_dem_layers, get_temperature_image
+from analysis.core.gee_service import (
+    atmosphere_reduction,
+    land_cover_reduction,
+    terrain_reduction,
+    wind_histogram_reduction,
+)
+from analysis.core.local_rasters import clear_tile_index, layer_folder
+from analysis.core.raster_snapshot import download_raster
+
+
+LAYERS = ("dem", "worldcover", "era5", "era5_hist")
+
+
+class Command(BaseCommand):
+    help = "Export DEM, WorldCover, ERA5 annual means and wind histograms from Earth Engine into LOCAL_RASTER_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bbox",
+            nargs=4,
+            type=float,
+            required=True,
+            metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"),
+            help="Area to stage, in degrees.",
+        )
+        parser.add_argument(
+            "--layers",
+            nargs="+",
+            choices=LAYERS,
+            default=list(LAYERS),
+            help="Which rasters to stage (default: all).",
+        )
+        parser.add_argument("--year", type=int, default=2022, help="ERA5 year (default: 2022).")
+        parser.add_argument(
+            "--tile-deg",
+            type=float,
+            default=1.0,
+            help="Tile size in degrees (default: 1.0).",
+        )
+
+    def handle(self, *args, **options):
+        lat_min, lat_max, lon_min, lon_max = options["bbox"]
+        if lat_min >= lat_max or lon_min >= lon_max:
+            raise CommandError("--bbox must be LAT_MIN LAT_MAX LON_MIN LON_MAX with min < max.")
+
+        step = options["tile_deg"]
+        tiles = [
+            (la, min(la + step, lat_max), lo, min(lo + step, lon_max))
+            for la in _frange(lat_min, lat_max, step)
+            for lo in _frange(lon_min, lon_max, step)
+        ]
+
+        for name in options["layers"]:
+            image, bands, dtype, scale, folder = self._layer(name, options["year"])
+            self.stdout.write(self.style.NOTICE(f"\n🗂 {name} → {folder} ({len(tiles)} tiles @ {scale}m)"))
+
+            for bounds in tiles:
+                stem = _tile_name(bounds)
+                data_path = folder / f"{stem}.npy"
+                meta_path = folder / f"{stem}.json"
+                if meta_path.exists():
+                    self.stdout.write(f"  ⏭ {stem} (exists)")
+                    continue
+
+                try:
+                    download_raster(image, bands, dtype, bounds, scale, data_path, meta_path)
+                    self.stdout.write(self.style.SUCCESS(f"  ✅ {stem}"))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"  ❌ {stem}: {e}"))
+
+        clear_tile_index()
+        self.stdout.write(self.style.SUCCESS("\n🎉 Staging finished."))
+
+    @staticmethod
+    def _layer(name, year):
+        """(image, bands, dtype, scale, folder) for one staged layer."""
+        if name == "dem":
+            red = terrain_reduction()
+            return get_dem_layers(), ("elevation",), "float32", red.scale, layer_folder("terrain")
+
+        if name == "worldcover":
+            red = land_cover_reduction()
+            return red.image(), red.spec.bands, "uint8", red.scale, layer_folder("land_cover", red.spec.year)
+
+        if name == "era5_hist":
+            red = wind_histogram_reduction(year)
+            return red.image(), red.spec.bands, "float32", red.scale, layer_folder("wind_histogram", year)
+
+        red = atmosphere_reduction(year)
+        temperature = get_temperature_image(year).subtract(273.15).rename("temperature")
+        return (
+            red.image().addBands(temperature),
+            red.spec.bands + ("temperature",),
+            "float32",
+            red.scale,
+            layer_folder("atmosphere", year),
+        )
+
+
+def _frange(start, stop, step):
+    n = math.ceil((stop - start) / step - 1e-9)
+    return [start + i * step for i in range(n)]
+
+
+def _tile_name(bounds):
+    lat, _, lon, _ = bounds
+    ns = "N" if lat >= 0 else "S"
+    ew = "E" if lon >= 0 else "W"
+    return f"{ns}{abs(lat):06.3f}_{ew}{abs(lon):07.3f}"
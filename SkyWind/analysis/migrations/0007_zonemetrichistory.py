@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0006_pipelinejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneMetricHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.SmallIntegerField()),
+                ('avg_wind_speed', models.FloatField(null=True)),
+                ('weighted_x', models.FloatField(null=True)),
+                ('weighted_y', models.FloatField(null=True)),
+                ('air_density', models.FloatField(null=True)),
+                ('power_avg', models.FloatField(null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='analysis.zone')),
+            ],
+            options={
+                'ordering': ['zone', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('zone', 'year'), name='unique_zone_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0007_zonemetrichistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pipelinejob',
+            name='step_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_existing_results(apps, schema_editor):
+    """
+    Rows computed before freshness tracking get "legacy" entries: their
+    values are still served (partial) until a run refreshes them.
+    """
+    Zone = apps.get_model("analysis", "Zone")
+    Region = apps.get_model("analysis", "Region")
+
+    at = timezone.now().isoformat()
+
+    def legacy(metrics):
+        return {m: {"computed_at": at, "version": "legacy"} for m in metrics}
+
+    Zone.objects.exclude(avg_wind_speed=0).update(
+        freshness=legacy(["wind", "terrain", "air_density", "power_density", "land_cover", "potential"]),
+        data_state="partial",
+    )
+    Region.objects.exclude(avg_temperature=0).update(
+        freshness=legacy(["temperature", "summary"]),
+        data_state="partial",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0008_pipelinejob_step_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='data_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partial'), ('complete', 'Complete')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='freshness',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='data_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partial'), ('complete', 'Complete')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='freshness',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(mark_existing_results, migrations.RunPython.noop),
+    ]
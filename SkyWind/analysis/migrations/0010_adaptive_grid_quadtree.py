@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0009_zone_region_freshness'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='regiongrid',
+            name='unique_region_grid_config',
+        ),
+        migrations.AddField(
+            model_name='regiongrid',
+            name='max_depth',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='depth',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='analysis.zone'),
+        ),
+        migrations.AddConstraint(
+            model_name='regiongrid',
+            constraint=models.UniqueConstraint(fields=('region', 'side_km', 'zones_per_edge', 'max_depth'), name='unique_region_grid_config'),
+        ),
+    ]
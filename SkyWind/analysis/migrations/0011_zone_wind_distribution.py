@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+
+
+def mark_complete_zones_partial(apps, schema_editor):
+    """Complete zones lack the new wind_distribution metric until refreshed."""
+    Zone = apps.get_model("analysis", "Zone")
+    Zone.objects.filter(data_state="complete").update(data_state="partial")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0010_adaptive_grid_quadtree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zone',
+            name='weibull_c',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='weibull_k',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='wind_histogram',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(mark_complete_zones_partial, migrations.RunPython.noop),
+    ]
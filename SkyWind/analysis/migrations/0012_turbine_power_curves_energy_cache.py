@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0011_zone_wind_distribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='windturbinetype',
+            name='power_curve',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='RegionEnergyCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64)),
+                ('payload', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('region', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='energy_cache', to='analysis.region')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0012_turbine_power_curves_energy_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GridMetricStore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layout', models.JSONField(default=dict)),
+                ('data', models.BinaryField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('grid', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metric_store', to='analysis.regiongrid')),
+            ],
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Tables with a GiST index on the same box expression as
+# analysis.core.spatial.BBoxIntersects (PostgreSQL only)
+GIST_INDEXES = {
+    "analysis_region": "region_bbox_gist",
+    "analysis_regiongrid": "grid_bbox_gist",
+    "analysis_zone": "zone_bbox_gist",
+}
+
+
+def backfill_bbox(apps, schema_editor):
+    """Bounding boxes of existing regions, grids and zones from their corner points."""
+    for name in ("Region", "RegionGrid", "Zone"):
+        model = apps.get_model("analysis", name)
+        rows = model.objects.filter(A__isnull=False).select_related("A", "B", "C", "D")
+
+        batch = []
+        for obj in rows.iterator(chunk_size=BATCH_SIZE):
+            corners = [obj.A, obj.B, obj.C, obj.D]
+            if None in corners:
+                continue
+            obj.lat_min = min(p.lat for p in corners)
+            obj.lat_max = max(p.lat for p in corners)
+            obj.lon_min = min(p.lon for p in corners)
+            obj.lon_max = max(p.lon for p in corners)
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ["lat_min", "lat_max", "lon_min", "lon_max"])
+                batch = []
+        model.objects.bulk_update(batch, ["lat_min", "lat_max", "lon_min", "lon_max"])
+
+
+def create_gist_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, index in GIST_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index} ON {table} "
+            f"USING gist (box(point(lon_min, lat_min), point(lon_max, lat_max)))"
+        )
+
+
+def drop_gist_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index in GIST_INDEXES.values():
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0013_grid_metric_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='lat_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='lat_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='lon_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='lon_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='regiongrid',
+            name='lat_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='regiongrid',
+            name='lat_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='regiongrid',
+            name='lon_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='regiongrid',
+            name='lon_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='lat_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='lat_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='lon_max',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='lon_min',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['lat_min', 'lon_min'], name='region_bbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='regiongrid',
+            index=models.Index(fields=['lat_min', 'lon_min'], name='grid_bbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(fields=['lat_min', 'lon_min'], name='zone_bbox_idx'),
+        ),
+        migrations.RunPython(backfill_bbox, migrations.RunPython.noop),
+        migrations.RunPython(create_gist_indexes, drop_gist_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0014_region_zone_bbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regiongrid',
+            name='lattice_origin',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='cell_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+from django.db.models import Q
+
+BATCH_SIZE = 2000
+
+GEOMETRY_FIELDS = ["lat_min", "lat_max", "lon_min", "lon_max", "center_lat", "center_lon"]
+
+
+def backfill_zone_geometry(apps, schema_editor):
+    """Center (and any missing bounding box) of existing zones from their corner points."""
+    Zone = apps.get_model("analysis", "Zone")
+    rows = (
+        Zone.objects
+        .filter(Q(center_lat__isnull=True) | Q(lat_min__isnull=True))
+        .select_related("A", "B", "C", "D")
+    )
+
+    batch = []
+    for zone in rows.iterator(chunk_size=BATCH_SIZE):
+        corners = [zone.A, zone.B, zone.C, zone.D]
+        zone.lat_min = min(p.lat for p in corners)
+        zone.lat_max = max(p.lat for p in corners)
+        zone.lon_min = min(p.lon for p in corners)
+        zone.lon_max = max(p.lon for p in corners)
+        zone.center_lat = sum(p.lat for p in corners) / 4
+        zone.center_lon = sum(p.lon for p in corners) / 4
+        batch.append(zone)
+        if len(batch) >= BATCH_SIZE:
+            Zone.objects.bulk_update(batch, GEOMETRY_FIELDS)
+            batch = []
+    Zone.objects.bulk_update(batch, GEOMETRY_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0015_global_lattice_cells'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zone',
+            name='center_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='center_lon',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_zone_geometry, migrations.RunPython.noop),
+    ]
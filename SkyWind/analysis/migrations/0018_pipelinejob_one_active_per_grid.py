@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2025-12-10 10:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep the oldest active job of each grid; later duplicates are failed."""
+    PipelineJob = apps.get_model("analysis", "PipelineJob")
+    kept = {}
+    for job in PipelineJob.objects.filter(status__in=ACTIVE_STATUSES).order_by("created_at", "id"):
+        if job.grid_id not in kept:
+            kept[job.grid_id] = job.id
+            continue
+        job.status = "failed"
+        job.error = f"Duplicate of job {kept[job.grid_id]}"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0017_pipelinejob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pipelinejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'running'))), fields=('grid',), name='pipelinejob_one_active_per_grid'),
+        ),
+    ]
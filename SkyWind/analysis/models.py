@@ -1,5 +1,8 @@
 from django.db import models
 
+from analysis.core.energy import energy_matrix, generic_power_curve, zone_frequencies
+from analysis.core.freshness import STATE_CHOICES, STATE_PENDING
+
 
 # ---------------------------------------------------------
 # POINT MODEL
@@ -77,6 +80,12 @@ class Region(models.Model):
     C = models.ForeignKey(Point, on_delete=models.SET_NULL, null=True, blank=True, related_name="region_C")
     D = models.ForeignKey(Point, on_delete=models.SET_NULL, null=True, blank=True, related_name="region_D")
 
+    # Bounding box of the corners, for indexed spatial queries (see core/spatial.py)
+    lat_min = models.FloatField(null=True, blank=True)
+    lat_max = models.FloatField(null=True, blank=True)
+    lon_min = models.FloatField(null=True, blank=True)
+    lon_max = models.FloatField(null=True, blank=True)
+
     # Region-level aggregated metrics
     avg_temperature = models.FloatField(default=0.0)
     wind_rose = models.JSONField(default=dict, blank=True)
@@ -95,8 +104,12 @@ class Region(models.Model):
         EnergyStorage, on_delete=models.SET_NULL, null=True, blank=True
     )
 
+    # Per-metric computed_at / version, see analysis/core/freshness.py
+    freshness = models.JSONField(default=dict, blank=True)
+    data_state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_PENDING)
+
     class Meta:
-        pass
+        indexes = [models.Index(fields=["lat_min", "lon_min"], name="region_bbox_idx")]
 
     def __str__(self):
         return f"Region #{self.id} @ ({self.center.lat:.4f}, {self.center.lon:.4f})"
@@ -105,26 +118,43 @@ class Region(models.Model):
         """
         Return a list of dicts:
             [
-              {"zone": <Zone>, "power_kw": <float>},
+              {"zone": <Zone>, "power_kw": <float>, "aep_mwh": <float>,
+               "capacity_factor": <float>},
               ...
             ]
-        for all zones in this region for the given turbine.
+        for all zones in this region for the given turbine (leaves of
+        adaptive grids). power_kw is the mean output over the year.
+
+        Read from the region's energy matrix (see core/region_energy.py),
+        which is computed for all zones and turbine types at once and
+        cached until the zone metrics or power curves change.
         """
         from .models import Zone  # local import to avoid circular imports
+        from analysis.core.region_energy import region_energy
+
+        energy = region_energy(self)
+        if turbine.id not in energy["turbines"]:
+            return []
+        t = energy["turbines"].index(turbine.id)
 
         zones = (
             Zone.objects
-            .filter(grid__region=self)
+            .filter(pk__in=energy["zones"])
             .select_related("grid")
+            .in_bulk()
         )
 
         results = []
-        for zone in zones:
-            power_kw = zone.power_for_turbine(turbine)
+        for i, zone_id in enumerate(energy["zones"]):
+            zone = zones.get(zone_id)
+            if zone is None:
+                continue
             results.append(
                 {
                     "zone": zone,
-                    "power_kw": power_kw,
+                    "power_kw": energy["mean_kw"][i][t],
+                    "aep_mwh": energy["aep_mwh"][i][t],
+                    "capacity_factor": energy["capacity_factor"][i][t],
                 }
             )
         return results
@@ -146,16 +176,31 @@ class RegionGrid(models.Model):
     side_km = models.FloatField()           # e.g. 20 km
     zones_per_edge = models.IntegerField()  # e.g. 10
 
+    # Adaptive refinement: 0 = uniform grid; otherwise zones that score well
+    # are split into 4 children, down to this depth (see core/quadtree.py)
+    max_depth = models.IntegerField(default=0)
+
     # Optional: store computed corners of the grid
     A = models.ForeignKey(Point, null=True, blank=True, on_delete=models.SET_NULL, related_name="grid_A")
     B = models.ForeignKey(Point, null=True, blank=True, on_delete=models.SET_NULL, related_name="grid_B")
     C = models.ForeignKey(Point, null=True, blank=True, on_delete=models.SET_NULL, related_name="grid_C")
     D = models.ForeignKey(Point, null=True, blank=True, on_delete=models.SET_NULL, related_name="grid_D")
 
+    # Bounding box of the corners, for indexed spatial queries (see core/spatial.py)
+    lat_min = models.FloatField(null=True, blank=True)
+    lat_max = models.FloatField(null=True, blank=True)
+    lon_min = models.FloatField(null=True, blank=True)
+    lon_max = models.FloatField(null=True, blank=True)
+
+    # Snapped to the global lattice: id of the south-west cell; empty for a
+    # lattice built around the region center (see core/global_lattice.py)
+    lattice_origin = models.CharField(max_length=40, blank=True, default="")
+
     class Meta:
+        indexes = [models.Index(fields=["lat_min", "lon_min"], name="grid_bbox_idx")]
         constraints = [
             models.UniqueConstraint(
-                fields=["region", "side_km", "zones_per_edge"],
+                fields=["region", "side_km", "zones_per_edge", "max_depth"],
                 name="unique_region_grid_config",
             )
         ]
@@ -163,6 +208,10 @@ class RegionGrid(models.Model):
     def __str__(self):
         return f"Grid {self.id} for Region {self.region.id} ({self.zones_per_edge}×{self.zones_per_edge})"
 
+    def leaf_zones(self):
+        """Zones not split further: the whole grid for a uniform grid."""
+        return self.zones.filter(children__isnull=True)
+
 
 # ---------------------------------------------------------
 # ZONE MODEL
@@ -184,6 +233,16 @@ class Zone(models.Model):
     C = models.ForeignKey(Point, on_delete=models.CASCADE, related_name="zone_C")
     D = models.ForeignKey(Point, on_delete=models.CASCADE, related_name="zone_D")
 
+    # Bounding box of the corners, for indexed spatial queries (see core/spatial.py)
+    lat_min = models.FloatField(null=True, blank=True)
+    lat_max = models.FloatField(null=True, blank=True)
+    lon_min = models.FloatField(null=True, blank=True)
+    lon_max = models.FloatField(null=True, blank=True)
+
+    # Mean of the corners; with the box, reads never join the corner Points
+    center_lat = models.FloatField(null=True, blank=True)
+    center_lon = models.FloatField(null=True, blank=True)
+
     # Wind
     wind_direction = models.FloatField(default=0.0)  # degrees 0–360
     avg_wind_speed = models.FloatField(default=0.0)  # m/s
@@ -202,14 +261,38 @@ class Zone(models.Model):
     land_type = models.JSONField(default=dict, blank=True)
     potential = models.FloatField(default=0.0)
 
+    # Hourly 100m wind-speed distribution: hours per 1 m/s bin and the
+    # fitted Weibull shape / scale (see core/wind_distribution.py)
+    wind_histogram = models.JSONField(default=list, blank=True)
+    weibull_k = models.FloatField(null=True, blank=True)
+    weibull_c = models.FloatField(null=True, blank=True)  # m/s
+
     # Index inside the grid (1→100)
     zone_index = models.IntegerField(default=0)
 
+    # Quadtree of adaptive grids: depth 0 = base lattice, children split
+    # their parent in 4 (see core/quadtree.py)
+    parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, null=True, blank=True, related_name="children"
+    )
+    depth = models.IntegerField(default=0)
+
+    # Global lattice cell shared by every snapped grid covering it; empty
+    # for zones of unsnapped grids (see core/global_lattice.py)
+    cell_id = models.CharField(max_length=40, blank=True, default="", db_index=True)
+
     # Infrastructure
     infrastructure = models.ForeignKey(
         Infrastructure, on_delete=models.CASCADE
     )
 
+    # Per-metric computed_at / version, see analysis/core/freshness.py
+    freshness = models.JSONField(default=dict, blank=True)
+    data_state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_PENDING)
+
+    class Meta:
+        indexes = [models.Index(fields=["lat_min", "lon_min"], name="zone_bbox_idx")]
+
     def __str__(self):
         return (
             f"Region {self.grid.region.id} | Grid {self.grid.id} | Zone {self.zone_index}"
@@ -218,24 +301,63 @@ class Zone(models.Model):
     @property
     def center(self):
         """Return center (lat, lon) of the zone."""
+        if self.center_lat is not None and self.center_lon is not None:
+            return self.center_lat, self.center_lon
         return (
             (self.A.lat + self.B.lat + self.C.lat + self.D.lat) / 4,
             (self.A.lon + self.B.lon + self.C.lon + self.D.lon) / 4,
         )
 
     def power_for_turbine(self, turbine: "WindTurbineType") -> float:
+        """
+        Mean output (kW) of the turbine over the year: its power curve
+        weighted by the zone's wind-speed distribution (see core/energy.py).
+        For many zones use Region.zone_power_for_turbines.
+        """
+        freq = zone_frequencies(
+            [self.wind_histogram], [self.weibull_k], [self.weibull_c], [self.avg_wind_speed],
+        )
+        energy = energy_matrix(freq, [self.air_density], [turbine.curve()])
+        return round(float(energy["mean_kw"][0, 0]), 2)
+
+
+# ---------------------------------------------------------
+# ZONE METRIC HISTORY MODEL
+# ---------------------------------------------------------
+
+class ZoneMetricHistory(models.Model):
+    """
+    Per-year atmospheric metrics of one zone (multi-year climatology mode).
+
+    One row per (zone, year); rows are computed once and reused, so adding
+    a year only computes that year. The climatological means written onto
+    Zone are derived from these rows (see analysis/core/climatology.py).
+
+    The power-weighted wind components are stored instead of the direction,
+    so the multi-year direction is an exact vector mean.
+    """
 
-        if self.air_density <= 0 or self.avg_wind_speed <= 0:
-            return 0.0
+    zone = models.ForeignKey(
+        Zone, on_delete=models.CASCADE, related_name="history"
+    )
+    year = models.SmallIntegerField()
 
-        swept_area_m2 = (
-            turbine.swept_area_min_m2 + turbine.swept_area_max_m2) / 2.0
+    avg_wind_speed = models.FloatField(null=True)   # m/s at 100m
+    weighted_x = models.FloatField(null=True)       # mean cos(dir)·v³
+    weighted_y = models.FloatField(null=True)       # mean sin(dir)·v³
+    air_density = models.FloatField(null=True)      # kg/m³
+    power_avg = models.FloatField(null=True)        # W/m²
 
-        rho = self.air_density
-        v = self.avg_wind_speed
-        p_watts = 0.5 * rho * v**3 * swept_area_m2
-        p_kw = p_watts / 1000.0
-        return min(p_kw, turbine.rated_power_max_kw)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["zone", "year"]
+        constraints = [
+            models.UniqueConstraint(fields=["zone", "year"], name="unique_zone_year")
+        ]
+
+    def __str__(self):
+        return f"Zone {self.zone_id} | {self.year}"
 
 
 # ---------------------------------------------------------
@@ -279,9 +401,147 @@ class WindTurbineType(models.Model):
     rated_power_min_kw = models.FloatField()
     rated_power_max_kw = models.FloatField()
 
+    # Power curve of a representative model at 1.225 kg/m³:
+    # [[wind speed m/s, output kW], ...] (see core/energy.py)
+    power_curve = models.JSONField(default=list, blank=True)
+
     class Meta:
         verbose_name = "Wind turbine type"
         verbose_name_plural = "Wind turbine types"
 
     def __str__(self):
         return f"{self.type_name} ({self.category})"
+
+    def curve(self) -> list:
+        """The power curve, or a generic one from swept area / rated power."""
+        if self.power_curve:
+            return self.power_curve
+        swept_area_m2 = (self.swept_area_min_m2 + self.swept_area_max_m2) / 2.0
+        return generic_power_curve(swept_area_m2, self.rated_power_max_kw)
+
+
+# ---------------------------------------------------------
+# REGION ENERGY CACHE MODEL
+# ---------------------------------------------------------
+
+class RegionEnergyCache(models.Model):
+    """
+    AEP / capacity factor of every leaf zone of a region for every turbine
+    type (see analysis/core/region_energy.py).
+
+    `digest` hashes the inputs – zone ids, the freshness of their wind and
+    air density metrics, the power curves – so the matrix is recomputed
+    only after one of them changed.
+    """
+
+    region = models.OneToOneField(
+        Region, on_delete=models.CASCADE, related_name="energy_cache"
+    )
+    digest = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Energy of Region {self.region_id}"
+
+
+# ---------------------------------------------------------
+# GRID METRIC STORE MODEL
+# ---------------------------------------------------------
+
+class GridMetricStore(models.Model):
+    """
+    Columnar copy of the leaf zones of a grid: one typed array per metric
+    packed in `data`, described by `layout` (see
+    analysis/core/metric_store.py).
+
+    Rewritten after every pipeline run, so a full-grid read is one row.
+    """
+
+    grid = models.OneToOneField(
+        RegionGrid, on_delete=models.CASCADE, related_name="metric_store"
+    )
+    layout = models.JSONField(default=dict)
+    data = models.BinaryField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Metric store of Grid {self.grid_id}"
+
+
+# ---------------------------------------------------------
+# PIPELINE JOB MODEL
+# ---------------------------------------------------------
+
+class PipelineJob(models.Model):
+    """
+    A queued run of the 8-step GEE pipeline for one RegionGrid.
+
+    Views and fetch_gee_data enqueue jobs; run_pipeline_worker processes
+    claim them with SELECT ... FOR UPDATE SKIP LOCKED, so several workers
+    can share the table. Lower priority values are served first.
+    """
+
+    PRIORITY_INTERACTIVE = 0   # user waiting on an HTTP request
+    PRIORITY_BULK = 10         # fetch_gee_data --enqueue
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    grid = models.ForeignKey(
+        RegionGrid, on_delete=models.CASCADE, related_name="jobs"
+    )
+    priority = models.IntegerField(default=PRIORITY_INTERACTIVE)
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_PENDING, "Pending"),
+            (STATUS_RUNNING, "Running"),
+            (STATUS_DONE, "Done"),
+            (STATUS_FAILED, "Failed"),
+        ],
+        default=STATUS_PENDING,
+    )
+
+    # Progress (step 0 → 8 of the pipeline)
+    step = models.IntegerField(default=0)
+    total_steps = models.IntegerField(default=8)
+    step_label = models.CharField(max_length=100, blank=True)
+    step_timings = models.JSONField(default=dict, blank=True)  # {step name: seconds}
+
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker between and during steps; a running job with
+    # an old heartbeat belongs to a dead worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Only pending rows are scanned by the claim query
+            models.Index(
+                fields=["priority", "created_at"],
+                condition=models.Q(status="pending"),
+                name="pipelinejob_pending_idx",
+            ),
+        ]
+        constraints = [
+            # At most one pending / running job per grid, even when two
+            # requests enqueue at the same time
+            models.UniqueConstraint(
+                fields=["grid"],
+                condition=models.Q(status__in=("pending", "running")),
+                name="pipelinejob_one_active_per_grid",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} for Grid {self.grid_id} ({self.status})"
@@ -1,4 +1,4 @@
-import requests
+from analysis.core.external_io import post_json
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
@@ -91,9 +91,7 @@ def get_grid_infrastructure(lat_min, lon_min, lat_max, lon_max):
 
     def fetch(query):
         try:
-            r = requests.post(OVERPASS_URL, data=query)
-            r.raise_for_status()
-            return r.json()
+            return post_json(OVERPASS_URL, query)
         except Exception:
             return {"elements": []}
 
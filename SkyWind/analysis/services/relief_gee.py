@@ -1,10 +1,12 @@
 # analysis/services/relief_gee.py
 import ee
 
-# We assume ee.Initialize(...) is already called in your project
-# (same way water_gee.py works)
+from analysis.core.gee_client import get_info, get_map_id, requires_ee
 
+# Earth Engine is initialized on first use (@requires_ee)
 
+
+@requires_ee
 def get_relief_tile_url(region):
     """
     Returns a tile URL for a continuous relief/topography layer.
@@ -42,7 +44,7 @@ def get_relief_tile_url(region):
     )
     
     # Get the computed min/max values
-    stats_dict = elevation_stats.getInfo()
+    stats_dict = get_info(elevation_stats)
     elev_min = stats_dict.get('elevation_min', 0)
     elev_max = stats_dict.get('elevation_max', 2000)
     
@@ -95,12 +97,13 @@ def get_relief_tile_url(region):
     final = styled.clip(geom)
 
     # Get tile URL
-    map_id = ee.data.getMapId({'image': final})
+    map_id = get_map_id({'image': final})
     tile_url = map_id['tile_fetcher'].url_format
 
     return tile_url
 
 
+@requires_ee
 def get_elevation_at_point(lat: float, lon: float) -> float:
     """
     Get elevation in meters at a specific point using DEM data.
@@ -127,7 +130,7 @@ def get_elevation_at_point(lat: float, lon: float) -> float:
     ).get('elevation')
     
     # Get the elevation value
-    elev_value = elevation.getInfo()
+    elev_value = get_info(elevation)
     
     # Handle missing data
     if elev_value is None:
@@ -136,6 +139,7 @@ def get_elevation_at_point(lat: float, lon: float) -> float:
     return round(float(elev_value), 2)
 
 
+@requires_ee
 def get_relief_points(
     lat_min: float, lon_min: float, lat_max: float, lon_max: float
 ) -> dict:
@@ -163,7 +167,7 @@ def get_relief_points(
     )
 
     # Earth Engine returns a FeatureCollection -> convert to dict
-    fc_dict = samples.getInfo()
+    fc_dict = get_info(samples)
     # fc_dict already looks like a GeoJSON FeatureCollection
 
     return fc_dict
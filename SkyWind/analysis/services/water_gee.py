@@ -1,5 +1,8 @@
 import ee
 
+from analysis.core.gee_client import get_info, requires_ee
+
+@requires_ee
 def get_water_polygons(lat_min, lon_min, lat_max, lon_max):
     # Same bbox logic as before
     region = ee.Geometry.Rectangle([lon_min, lat_min, lon_max, lat_max])
@@ -28,6 +31,6 @@ def get_water_polygons(lat_min, lon_min, lat_max, lon_max):
         maxPixels=1e9,
     )
 
-    return vectors.getInfo()
+    return get_info(vectors)
 
 
@@ -1,3 +1,965 @@
-from django.test import TestCase
+"""
+tests.py
+--------
 
-# Create your tests here.
+Query-count and latency budgets for every endpoint of analysis/urls.py
+and for the generates_zones / fetch_gee_data / rescore_zones commands,
+so N+1 regressions fail the build.
+
+Nothing leaves the process:
+
+    • the pipeline runs on the local raster backend (RASTER_BACKEND =
+      "local") over small synthetic tiles written to a temporary folder
+    • the services that call Earth Engine or Overpass directly (water,
+      relief tiles, elevation, power grid) are patched with canned answers
+
+Regions of several grid sizes are seeded and fully computed; an endpoint
+must stay within the same query budget for every size, so a query per
+zone shows up on the larger grids. Time budgets are wall-clock upper
+bounds with a wide margin; multiply them with SKYWIND_TIME_BUDGET_SCALE
+on slow machines.
+
+The NumPy engines are checked against the per-zone loops they replaced
+(plain unittest cases, no database); their timings are the benchmark_*
+scripts of tests/.
+
+    python manage.py test analysis
+"""
+
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import ee
+import numpy as np
+import requests
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from analysis.core import gee_service
+from analysis.core.energy import (
+    STANDARD_AIR_DENSITY,
+    energy_matrix,
+    generic_power_curve,
+    parse_curve,
+    weibull_frequencies,
+    zone_frequencies,
+)
+from analysis.core.freshness import DEFAULT_YEAR, LAND_COVER_YEAR, STATE_COMPLETE
+from analysis.core.gee_client import CircuitOpenError, GEEClient
+from analysis.core.gee_service import compute_gee_for_grid
+from analysis.core.geometry import compute_region_corners, generate_zone_grid
+from analysis.core.job_queue import claim_next_job, enqueue_grid_refresh, release_stale_jobs, run_job
+from analysis.core.power_curves import OFFSHORE_TURBINE_CURVE, ONSHORE_TURBINE_CURVE, SMALL_TURBINE_CURVE
+from analysis.core.scoring import (
+    DEFAULT_PARAMS, HARD_EXCLUSION_CLASSES, LAND_SUITABILITY_SCORES, params_from_dict, score,
+)
+from analysis.core.spatial import BBOX_FIELDS, bbox_tuple, corners_of
+from analysis.core.wind_distribution import (
+    WIND_HIST_BANDS,
+    WIND_HIST_BINS,
+    WIND_HIST_MAX,
+    bin_edges,
+    compact,
+    fit_weibull,
+    fraction_above,
+    histogram_matrix,
+    merge_histograms,
+)
+from analysis.core.zonal_stats import ZonalIndex, cell_bounds, zone_windows
+from analysis.models import PipelineJob, Region, RegionGrid, WindTurbineType, Zone
+
+
+# ---------------------------------------------------------
+# BUDGETS
+# ---------------------------------------------------------
+
+# Endpoint / command → (max queries, max seconds). Query budgets do not
+# depend on the grid size.
+BUDGETS = {
+    "region_details": (4, 1.0),
+    # + the savepoint guarding concurrent enqueues
+    "region_details_pending": (10, 1.0),
+    "region_zones": (2, 1.0),
+    "rank": (3, 1.0),
+    "rank_post": (3, 1.0),
+    "compute_region_reuse": (18, 2.0),
+    # + one per bulk_create batch of zones (several only on SQLite)
+    "compute_region_new": (38, 3.0),
+    "regions_at": (2, 1.0),
+    "zone_details": (2, 1.0),
+    "zone_history": (3, 1.0),
+    "zones_in_bbox": (2, 1.0),
+    # First call computes and stores the region's energy cache
+    "zone_powers": (14, 2.0),
+    "energy": (14, 2.0),
+    "energy_cached": (6, 1.0),
+    "water": (2, 1.0),
+    "grid": (2, 1.0),
+    "relief": (2, 1.0),
+    "elevation": (0, 1.0),
+    "job_status": (2, 1.0),
+    "gee_stats": (0, 1.0),
+}
+
+# Commands run over every seeded grid: (queries per grid + fixed, max seconds)
+COMMAND_BUDGETS = {
+    "generates_zones": (8, 4, 5.0),
+    "fetch_gee_data": (20, 10, 60.0),
+    "rescore_zones": (12, 4, 20.0),
+}
+
+TIME_SCALE = float(os.getenv("SKYWIND_TIME_BUDGET_SCALE", "1"))
+
+# Seeded regions: (center lat, center lon, side_km, zones_per_edge, max_depth)
+SIZES = {
+    "3x3": (45.20, 23.30, 6, 3, 0),
+    "10x10": (45.45, 23.70, 10, 10, 0),
+    "20x20": (45.70, 24.10, 20, 20, 0),
+    "adaptive 4x4": (45.25, 24.05, 8, 4, 1),
+}
+
+
+# ---------------------------------------------------------
+# OFFLINE RASTERS
+# ---------------------------------------------------------
+
+# One tile per layer covering every seeded region
+TILE_LAT_MAX = 46.0
+TILE_LON_MIN = 23.0
+TILE_LAT_SPAN = 1.0
+TILE_LON_SPAN = 1.5
+LON_PER_LAT = 1 / math.cos(math.radians(45.5))
+# Atmosphere / histogram years staged for multi-year (--years) runs
+CLIMATOLOGY_YEARS = (DEFAULT_YEAR - 1, DEFAULT_YEAR)
+
+
+def _write_tile(folder: Path, bands, res_lat, make):
+    """A (bands, rows, cols) NPY tile + sidecar; make(lat, lon) → array per band."""
+    res_lon = res_lat * LON_PER_LAT
+    rows = int(TILE_LAT_SPAN / res_lat)
+    cols = int(TILE_LON_SPAN / res_lon)
+    lat = TILE_LAT_MAX - (np.arange(rows)[:, None] + 0.5) * res_lat
+    lon = TILE_LON_MIN + (np.arange(cols)[None, :] + 0.5) * res_lon
+
+    folder.mkdir(parents=True, exist_ok=True)
+    np.save(folder / "tile.npy", np.stack([np.broadcast_to(a, (rows, cols)) for a in make(lat, lon)]))
+    with open(folder / "tile.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "bands": list(bands), "lat_max": TILE_LAT_MAX, "lon_min": TILE_LON_MIN,
+            "res_lat": res_lat, "res_lon": res_lon,
+        }, f)
+
+
+def write_synthetic_rasters(root: Path):
+    """Smooth terrain, striped land cover and a windier north-east."""
+    _write_tile(
+        root / "dem", ["elevation"], 0.002,
+        lambda lat, lon: [(400 + 300 * np.sin(lat * 40) * np.cos(lon * 30)).astype(np.float32)],
+    )
+    _write_tile(
+        root / "worldcover" / str(LAND_COVER_YEAR), ["Map"], 0.002,
+        lambda lat, lon: [np.choose((lon * 50).astype(int) % 3, [10, 30, 40]).astype(np.uint8)],
+    )
+
+    def atmosphere(lat, lon):
+        speed = 5 + 2 * (lat - 45) + (lon - 23)
+        return [
+            np.full_like(speed, 1.2), 0.6 * 1.2 * speed ** 3 * 1.9, speed,
+            np.full_like(speed, 1.0), np.full_like(speed, 0.5), np.full_like(speed, 9.5),
+        ]
+
+    for year in CLIMATOLOGY_YEARS:
+        _write_tile(
+            root / "era5" / str(year),
+            ["air_density", "power_density", "wind_speed", "weighted_x", "weighted_y", "temperature"],
+            0.05, lambda lat, lon: [a.astype(np.float32) for a in atmosphere(lat, lon)],
+        )
+
+    def histogram(lat, lon):
+        # Weibull k = 2 with the scale of the wind speed above
+        c = (5 + 2 * (lat - 45) + (lon - 23)) / 0.886
+        cdf = [1 - np.exp(-(v / c) ** 2) for v in range(WIND_HIST_BINS + 1)]
+        return [(8760 * (cdf[i + 1] - cdf[i])).astype(np.float32) for i in range(WIND_HIST_BINS)]
+
+    for year in CLIMATOLOGY_YEARS:
+        _write_tile(root / "era5_hist" / str(year), WIND_HIST_BANDS, 0.05, histogram)
+
+
+# ---------------------------------------------------------
+# BASE CASE
+# ---------------------------------------------------------
+
+class BudgetTestCase(TestCase):
+    """Seeds one computed region per entry of SIZES, on synthetic rasters."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.raster_dir = Path(tempfile.mkdtemp(prefix="skywind-rasters-"))
+        cls.addClassCleanup(shutil.rmtree, cls.raster_dir, ignore_errors=True)
+        write_synthetic_rasters(cls.raster_dir)
+        cls.enterClassContext(override_settings(
+            RASTER_BACKEND="local",
+            LOCAL_RASTER_DIR=str(cls.raster_dir),
+            GEE_CACHE_ENABLED=False,
+            GEE_CLIMATOLOGY_YEARS="",
+            GEE_PIPELINE_WORKERS=1,
+            GEE_METRIC_MAX_AGE_DAYS=0,
+            GEE_SNAP_TO_LATTICE=False,
+        ))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_wind_turbine_types", stdout=StringIO())
+        cls.turbine = WindTurbineType.objects.order_by("id").first()
+
+        cls.regions = {}
+        for name, (lat, lon, side_km, zpe, max_depth) in SIZES.items():
+            data = cls.post_compute(lat, lon, side_km, zpe, max_depth)
+            grid = RegionGrid.objects.get(pk=data["grid_id"])
+            compute_gee_for_grid(grid)
+            cls.regions[name] = (Region.objects.get(pk=data["region_id"]), grid)
+
+    @classmethod
+    def post_compute(cls, lat, lon, side_km, zpe, max_depth=0):
+        response = cls.client_class().post(
+            "/api/regions/compute/",
+            json.dumps({"lat": lat, "lon": lon, "side_km": side_km, "zones_per_edge": zpe, "max_depth": max_depth}),
+            content_type="application/json",
+        )
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    def assertWithinBudget(self, name, call, max_queries=None, max_seconds=None):
+        """Run call() and check its queries and wall time; returns its result."""
+        budget_queries, budget_seconds = BUDGETS.get(name, (None, None))
+        max_queries = budget_queries if max_queries is None else max_queries
+        max_seconds = (budget_seconds if max_seconds is None else max_seconds) * TIME_SCALE
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = call()
+            seconds = time.perf_counter() - start
+
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f"{name}: {len(queries)} queries (budget {max_queries}):\n"
+            + "\n".join(q["sql"][:200] for q in queries.captured_queries),
+        )
+        self.assertLessEqual(seconds, max_seconds, f"{name}: {seconds:.2f} s (budget {max_seconds:.2f} s)")
+        return result
+
+    def each_size(self):
+        """(name, region, grid) of every seeded size."""
+        for name, (region, grid) in self.regions.items():
+            yield name, region, grid
+
+    def get(self, name, url, status=200, **params):
+        response = self.assertWithinBudget(name, lambda: self.client.get(url, params))
+        self.assertEqual(response.status_code, status, response.content[:500])
+        return response
+
+
+# ---------------------------------------------------------
+# SEED
+# ---------------------------------------------------------
+
+class SeedTests(BudgetTestCase):
+
+    def test_seeded_grids_are_complete(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                self.assertTrue(grid.zones.exists())
+                self.assertEqual(set(grid.zones.values_list("data_state", flat=True)), {STATE_COMPLETE})
+                self.assertTrue(hasattr(grid, "metric_store"))
+
+    def test_zone_geometry_is_inline(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                for z in grid.zones.select_related("A", "B", "C", "D"):
+                    corners = [z.A, z.B, z.C, z.D]
+                    self.assertEqual(
+                        corners_of(z),
+                        {c: (p.lat, p.lon) for c, p in zip("ABCD", corners)},
+                    )
+                    self.assertEqual(
+                        (z.center_lat, z.center_lon),
+                        (sum(p.lat for p in corners) / 4, sum(p.lon for p in corners) / 4),
+                    )
+
+    def test_adaptive_grid_was_refined(self):
+        _, grid = self.regions["adaptive 4x4"]
+        self.assertTrue(grid.zones.filter(depth=1).exists())
+
+
+# ---------------------------------------------------------
+# REGION ENDPOINTS
+# ---------------------------------------------------------
+
+class RegionEndpointTests(BudgetTestCase):
+
+    def test_region_details(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                data = self.get("region_details", f"/api/regions/{region.id}/").json()
+                self.assertEqual(data["data_state"], STATE_COMPLETE)
+
+    def test_region_details_queues_pending_region(self):
+        data = self.post_compute(45.9, 23.2, 6, 5)
+        response = self.get("region_details_pending", f"/api/regions/{data['region_id']}/", status=202)
+        self.assertEqual(response.json()["status"], PipelineJob.STATUS_PENDING)
+
+    def test_region_zones(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                zones = self.get("region_zones", f"/api/regions/{region.id}/zones/").json()
+                self.assertEqual(len(zones), grid.leaf_zones().count())
+
+    def test_rank(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                data = self.get("rank", f"/api/regions/{region.id}/rank/", limit=5).json()
+                self.assertEqual(data["count"], grid.leaf_zones().count())
+
+    def test_rank_custom_weights(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                response = self.assertWithinBudget("rank_post", lambda: self.client.post(
+                    f"/api/regions/{region.id}/rank/",
+                    json.dumps({"wind_weight": 0.8, "terrain_weight": 0.2, "limit": 10}),
+                    content_type="application/json",
+                ))
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(response.json()["zones"]), 10)
+
+    def test_rank_rejects_bad_limit_and_body(self):
+        region, grid = self.regions["3x3"]
+        url = f"/api/regions/{region.id}/rank/"
+        self.assertEqual(self.client.get(url, {"limit": -3}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": 0}).status_code, 400)
+        response = self.client.post(url, json.dumps([1, 2]), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON object", response.json()["error"])
+
+    def test_compute_region_reuses_zones(self):
+        for name, (lat, lon, side_km, zpe, max_depth) in SIZES.items():
+            region, grid = self.regions[name]
+            with self.subTest(size=name):
+                data = self.assertWithinBudget(
+                    "compute_region_reuse", lambda: self.post_compute(lat, lon, side_km, zpe, max_depth),
+                )
+                self.assertEqual(data["grid_id"], grid.id)
+                self.assertEqual(len(data["zones"]), grid.leaf_zones().count())
+
+    def test_compute_region_creates_zones(self):
+        for i, zpe in enumerate((3, 10, 20)):
+            with self.subTest(zones_per_edge=zpe):
+                fields = Zone._meta.concrete_fields
+                batches = math.ceil(zpe * zpe / connection.ops.bulk_batch_size(fields, range(zpe * zpe)))
+                data = self.assertWithinBudget(
+                    "compute_region_new", lambda: self.post_compute(45.1 + 0.2 * i, 24.4, 10, zpe),
+                    max_queries=BUDGETS["compute_region_new"][0] + batches,
+                )
+                self.assertEqual(len(data["zones"]), zpe * zpe)
+
+    def test_regions_at(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                data = self.get("regions_at", "/api/regions/at/", lat=region.center.lat, lon=region.center.lon).json()
+                self.assertIn(region.id, [r["id"] for r in data["regions"]])
+
+    def test_failed_run_does_not_leave_a_stale_store(self):
+        region, grid = self.regions["3x3"]
+        zone = grid.leaf_zones().order_by("id").first()
+
+        def fail(zones, writes=None):
+            # The DEM step computed a new altitude (written by the flush
+            # after the failure), then potential fails
+            for z in zones:
+                if z.pk == zone.pk:
+                    z.min_alt = 1234.0
+            raise RuntimeError("potential failed")
+
+        with mock.patch("analysis.core.gee_service.compute_potential", side_effect=fail):
+            with self.assertRaises(RuntimeError):
+                compute_gee_for_grid(grid, force=True)
+
+        zones = self.client.get(f"/api/regions/{region.id}/zones/").json()
+        self.assertEqual(next(z["min_alt"] for z in zones if z["id"] == zone.id), 1234.0)
+
+    def test_multi_year_run_skips_single_year_atmosphere(self):
+        _, grid = self.regions["3x3"]
+        year = CLIMATOLOGY_YEARS[0]
+        with mock.patch("analysis.core.gee_service.region_raster", wraps=gee_service.region_raster) as raster:
+            compute_gee_for_grid(grid, years=[year], force=True)
+
+        # Only climatology reads the atmosphere, for the requested year
+        atmosphere = [c.args for c in raster.call_args_list if c.args[0] == "atmosphere"]
+        self.assertTrue(atmosphere)
+        self.assertEqual({args[2] for args in atmosphere}, {year})
+        for zone in grid.zones.all():
+            self.assertTrue(zone.freshness["wind"]["version"].endswith(f"y{year}"))
+
+    def test_zone_powers(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                zones = self.get(
+                    "zone_powers", f"/api/regions/{region.id}/zone-powers/", turbine_id=self.turbine.id,
+                ).json()
+                self.assertEqual(len(zones), grid.leaf_zones().count())
+
+    def test_energy(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                data = self.get("energy", f"/api/regions/{region.id}/energy/").json()
+                self.assertEqual(len(data["zones"]), grid.leaf_zones().count())
+                self.assertEqual(len(data["turbines"]), WindTurbineType.objects.count())
+                self.assertEqual(self.get("energy_cached", f"/api/regions/{region.id}/energy/").json(), data)
+
+    def test_water(self):
+        fake = {"type": "FeatureCollection", "features": []}
+        with mock.patch("analysis.services.water_gee.get_water_polygons", return_value=fake) as water:
+            for name, region, grid in self.each_size():
+                with self.subTest(size=name):
+                    self.assertEqual(self.get("water", f"/api/regions/{region.id}/water/").json(), fake)
+        self.assertEqual(water.call_count, len(SIZES))
+
+    def test_power_grid(self):
+        fake = {"lines": [], "substations": []}
+        with mock.patch("analysis.views.get_grid_infrastructure", return_value=fake):
+            for name, region, grid in self.each_size():
+                with self.subTest(size=name):
+                    self.assertEqual(self.get("grid", f"/api/regions/{region.id}/grid/").json(), fake)
+
+    def test_relief(self):
+        with mock.patch("analysis.services.relief_gee.get_relief_tile_url", return_value="https://tiles/{z}/{x}/{y}"):
+            for name, region, grid in self.each_size():
+                with self.subTest(size=name):
+                    self.get("relief", f"/api/regions/{region.id}/relief/")
+
+
+# ---------------------------------------------------------
+# ZONE ENDPOINTS
+# ---------------------------------------------------------
+
+class ZoneEndpointTests(BudgetTestCase):
+
+    def test_zone_details(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                zone = grid.leaf_zones().order_by("-id").first()
+                data = self.get("zone_details", f"/api/zones/{zone.id}/").json()
+                self.assertEqual(data["grid_id"], grid.id)
+
+    def test_zone_history(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                zone = grid.leaf_zones().order_by("-id").first()
+                self.get("zone_history", f"/api/zones/{zone.id}/history/", years="2021-2022")
+
+    def test_zones_in_bbox(self):
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                data = self.get(
+                    "zones_in_bbox", "/api/zones/in-bbox/",
+                    lat_min=grid.lat_min, lat_max=grid.lat_max, lon_min=grid.lon_min, lon_max=grid.lon_max,
+                ).json()
+                self.assertEqual(len(data["zones"]), grid.leaf_zones().count())
+
+    def test_elevation(self):
+        with mock.patch("analysis.services.relief_gee.get_elevation_at_point", return_value=512.0):
+            data = self.get("elevation", "/api/elevation/", lat=45.5, lon=23.5).json()
+        self.assertEqual(data["elevation"], 512.0)
+
+
+# ---------------------------------------------------------
+# JOBS / CLIENT STATS
+# ---------------------------------------------------------
+
+class JobEndpointTests(BudgetTestCase):
+
+    def test_job_status(self):
+        _, grid = self.regions["10x10"]
+        job = enqueue_grid_refresh(grid)
+        self.assertEqual(self.get("job_status", f"/api/jobs/{job.id}/").json()["job_id"], job.id)
+
+    def test_gee_stats(self):
+        self.get("gee_stats", "/api/gee/stats/")
+
+    def test_long_run_with_heartbeat_is_not_requeued(self):
+        _, grid = self.regions["3x3"]
+        enqueue_grid_refresh(grid)
+        job = claim_next_job("worker-a")
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        PipelineJob.objects.filter(pk=job.pk).update(started_at=an_hour_ago)
+        self.assertEqual(release_stale_jobs(timedelta(minutes=30)), 0)
+
+        PipelineJob.objects.filter(pk=job.pk).update(heartbeat_at=an_hour_ago)
+        self.assertEqual(release_stale_jobs(timedelta(minutes=30)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PipelineJob.STATUS_PENDING)
+
+    def test_requeued_job_keeps_its_new_run(self):
+        _, grid = self.regions["3x3"]
+        enqueue_grid_refresh(grid)
+        job = claim_next_job("worker-a")
+
+        def taken_over(*args, **kwargs):
+            # worker-a looks dead: its job is requeued and claimed again
+            PipelineJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            release_stale_jobs(timedelta(minutes=30))
+            claim_next_job("worker-b")
+            kwargs["heartbeat"]()
+            return {"wind": 1.0}
+
+        with mock.patch("analysis.core.gee_service.compute_gee_for_grid", side_effect=taken_over):
+            job = run_job(job)
+
+        self.assertEqual((job.status, job.worker, job.step_timings), (PipelineJob.STATUS_RUNNING, "worker-b", {}))
+
+
+    def test_sub_steps_report_their_main_step(self):
+        _, grid = self.regions["3x3"]
+        enqueue_grid_refresh(grid)
+        job = claim_next_job("worker-a")
+        compute = gee_service.compute_gee_for_grid
+        reported = []
+
+        def forced(grid, progress=None, heartbeat=None):
+            def report(number, label):
+                progress(number, label)
+                reported.append(PipelineJob.objects.values_list("step", "step_label").get(pk=job.pk))
+            return compute(grid, progress=report, heartbeat=heartbeat, force=True, years=list(CLIMATOLOGY_YEARS))
+
+        with mock.patch("analysis.core.gee_service.compute_gee_for_grid", side_effect=forced):
+            job = run_job(job)
+
+        self.assertEqual(job.status, PipelineJob.STATUS_DONE)
+        self.assertIn((5, "5b Wind distribution"), reported)
+        self.assertIn((6, f"6b Climatology {CLIMATOLOGY_YEARS[0]}-{CLIMATOLOGY_YEARS[-1]}"), reported)
+        self.assertEqual(len(set(reported)), len(reported))
+
+
+# ---------------------------------------------------------
+# MANAGEMENT COMMANDS
+# ---------------------------------------------------------
+
+class CommandTests(BudgetTestCase):
+
+    def run_command(self, name, *args):
+        per_grid, fixed, seconds = COMMAND_BUDGETS[name]
+        grids = RegionGrid.objects.count()
+        out = StringIO()
+        self.assertWithinBudget(
+            name, lambda: call_command(name, *args, stdout=out),
+            max_queries=per_grid * grids + fixed, max_seconds=seconds,
+        )
+        return out.getvalue()
+
+    def test_generates_zones(self):
+        output = self.run_command("generates_zones")
+        self.assertIn("Updated region corners", output)
+
+    def test_generates_zones_keeps_snapped_region_on_its_lattice(self):
+        response = self.client.post(
+            "/api/regions/compute/",
+            json.dumps({"lat": 45.55, "lon": 24.1, "side_km": 10, "zones_per_edge": 5, "snap": True}),
+            content_type="application/json",
+        )
+        region = Region.objects.get(pk=response.json()["region_id"])
+        zones = Zone.objects.filter(grid__region=region).aggregate(
+            lat_min=Min("lat_min"), lat_max=Max("lat_max"), lon_min=Min("lon_min"), lon_max=Max("lon_max"),
+        )
+
+        call_command("generates_zones", stdout=StringIO())
+        region.refresh_from_db()
+        self.assertEqual(bbox_tuple(region), tuple(zones[name] for name in BBOX_FIELDS))
+
+    def test_fetch_gee_data(self):
+        output = self.run_command("fetch_gee_data")
+        self.assertIn("All RegionGrids processed", output)
+        for name, region, grid in self.each_size():
+            with self.subTest(size=name):
+                self.assertEqual(set(grid.zones.values_list("data_state", flat=True)), {STATE_COMPLETE})
+
+    def test_fetch_gee_data_years_leaves_zones_complete(self):
+        region, grid = self.regions["3x3"]
+        years = f"{CLIMATOLOGY_YEARS[0]}-{CLIMATOLOGY_YEARS[-1]}"
+        call_command("fetch_gee_data", "--years", years, "--bbox", *map(str, bbox_tuple(grid)), stdout=StringIO())
+        self.assertEqual(set(grid.zones.values_list("data_state", flat=True)), {STATE_COMPLETE})
+
+        # Nothing is queued that would overwrite the climatology with one year
+        data = self.client.get(f"/api/regions/{region.id}/").json()
+        self.assertEqual(data["data_state"], STATE_COMPLETE)
+        zone = grid.zones.first()
+        self.assertEqual(self.client.get(f"/api/zones/{zone.id}/").json()["data_state"], STATE_COMPLETE)
+        self.assertFalse(PipelineJob.objects.filter(grid=grid).exists())
+
+    def test_rescore_zones(self):
+        self.run_command("rescore_zones")
+
+
+# ---------------------------------------------------------
+# ZONAL STATISTICS
+# ---------------------------------------------------------
+
+DEG_PER_KM = 0.009
+
+
+def pixel_grid(center_lat, center_lon, side_km, scale_m):
+    """Region corners, geo transform and shape, same layout as raster_snapshot.pixel_grid."""
+    corners = compute_region_corners(center_lat, center_lon, side_km)
+    lat_max = corners["A"][0]
+    lat_min = corners["B"][0]
+    lon_min = corners["C"][1]
+    lon_max = corners["A"][1]
+    res_lat = scale_m / 1000 * DEG_PER_KM
+    res_lon = res_lat / np.cos(np.radians(center_lat))
+    rows = int(np.ceil((lat_max - lat_min) / res_lat - 1e-9))
+    cols = int(np.ceil((lon_max - lon_min) / res_lon - 1e-9))
+    return corners, (lat_max, lon_min, res_lat, res_lon), (rows, cols)
+
+
+def zone_pixels(raster, windows):
+    """Valid pixels of every zone, one zone at a time."""
+    out = []
+    for r0, r1, c0, c1 in zip(*windows):
+        v = raster[r0:r1, c0:c1].ravel()
+        if v.dtype.kind == "f":
+            v = v[np.isfinite(v)]
+        out.append(v)
+    return out
+
+
+class ZonalStatsTests(unittest.TestCase):
+    """core/zonal_stats.py against a brute-force per-zone loop."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corners, cls.geo, cls.shape = pixel_grid(46.77, 23.62, 20, 30)
+
+    def windows(self, zones_per_edge):
+        c = self.corners
+        cells = generate_zone_grid(c["A"], c["B"], c["C"], c["D"], zones_per_edge)
+        return zone_windows(cell_bounds(cells), *self.geo, self.shape)
+
+    def test_constant_raster(self):
+        index = ZonalIndex(self.windows(10), self.shape)
+        const = np.full(self.shape, 412.5, dtype=np.float32)
+        np.testing.assert_allclose(index.mean(const), 412.5)
+        np.testing.assert_allclose(index.min(const), 412.5)
+        np.testing.assert_allclose(index.max(const), 412.5)
+        np.testing.assert_allclose(index.std(const), 0.0, atol=1e-6)
+
+    def test_zone_rows_run_north_to_south(self):
+        index = ZonalIndex(self.windows(10), self.shape)
+        rows, cols = self.shape
+        ramp = np.repeat(np.arange(rows, 0, -1, dtype=np.float32)[:, None], cols, axis=1)
+        means = index.mean(ramp).reshape(10, 10)
+        self.assertTrue(np.all(np.diff(means[:, 0]) < 0))
+        np.testing.assert_allclose(means, np.broadcast_to(means[:, :1], means.shape))
+
+    def test_matches_per_zone_loop(self):
+        rng = np.random.default_rng(7)
+        windows = self.windows(25)
+        index = ZonalIndex(windows, self.shape)
+
+        dem = (1500 + 40 * rng.standard_normal(self.shape)).astype(np.float32)
+        dem[rng.random(self.shape) < 0.05] = np.nan
+        ref = zone_pixels(dem, windows)
+        np.testing.assert_allclose(index.mean(dem), [v.mean() for v in ref], rtol=1e-6)
+        np.testing.assert_allclose(index.min(dem), [v.min() for v in ref])
+        np.testing.assert_allclose(index.max(dem), [v.max() for v in ref])
+        np.testing.assert_allclose(index.std(dem), [v.std() for v in ref], rtol=1e-4)
+        np.testing.assert_array_equal(index.count(dem), [v.size for v in ref])
+
+        # WorldCover classes + nodata (0)
+        classes = np.array([0, 10, 20, 30, 40, 50, 60, 80, 90], dtype=np.uint8)
+        lc = classes[rng.integers(0, len(classes), self.shape)]
+        expected = []
+        for v in zone_pixels(lc, windows):
+            c, n = np.unique(v[v != 0], return_counts=True)
+            expected.append({str(int(k)): int(m) for k, m in zip(c, n)})
+        self.assertEqual(index.histogram(lc), expected)
+
+    def test_zones_smaller_than_a_pixel_take_the_center_pixel(self):
+        corners, geo, shape = pixel_grid(46.77, 23.62, 20, 5000)
+        cells = generate_zone_grid(corners["A"], corners["B"], corners["C"], corners["D"], 20)
+        r0, r1, c0, c1 = zone_windows(cell_bounds(cells), *geo, shape)
+        self.assertTrue(np.all(r1 - r0 == 1) and np.all(c1 - c0 == 1))
+
+
+# ---------------------------------------------------------
+# EARTH ENGINE CLIENT
+# ---------------------------------------------------------
+
+def flaky(fail_times, error):
+    """Fake call failing `fail_times` times with `error`, then returning "ok"; and its call count."""
+    state = {"calls": 0}
+
+    def fn():
+        state["calls"] += 1
+        if state["calls"] <= fail_times:
+            raise error
+        return "ok"
+
+    return fn, state
+
+
+class GeeClientTests(unittest.TestCase):
+    """core/gee_client.py against fake Earth Engine calls."""
+
+    def test_transient_errors_are_retried(self):
+        client = GEEClient(rate=0, max_retries=3, base_delay=0.01, max_delay=0.05)
+        fn, state = flaky(2, ee.EEException("Too Many Requests: quota exceeded"))
+        self.assertEqual((client.call(fn), state["calls"]), ("ok", 3))
+        self.assertEqual(client.stats()["retries"], 2)
+
+        for error in (TimeoutError("read timed out"), ConnectionResetError("connection reset by peer")):
+            with self.subTest(error=type(error).__name__):
+                fn, state = flaky(1, error)
+                self.assertEqual((client.call(fn), state["calls"]), ("ok", 2))
+
+    def test_other_errors_are_raised_at_once(self):
+        client = GEEClient(rate=0, max_retries=3, base_delay=0.01, max_delay=0.05)
+        for error in (
+            FileNotFoundError("key.json"), PermissionError("key.json"), requests.HTTPError("403 Forbidden"),
+            ee.EEException("Image.select: Pattern 'x' did not match any bands."),
+        ):
+            with self.subTest(error=str(error)):
+                fn, state = flaky(10, error)
+                with self.assertRaises(type(error)):
+                    client.call(fn)
+                self.assertEqual(state["calls"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        client = GEEClient(rate=0, max_retries=3, base_delay=0.01, max_delay=0.05)
+        fn, state = flaky(10, ee.EEException("Internal error"))
+        with self.assertRaises(ee.EEException):
+            client.call(fn)
+        self.assertEqual(state["calls"], 4)
+
+    def test_circuit_breaker(self):
+        client = GEEClient(rate=0, max_retries=0, failure_threshold=3, reset_seconds=0.2)
+        fn, state = flaky(100, ee.EEException("Service unavailable"))
+        for _ in range(3):
+            with self.assertRaises(ee.EEException):
+                client.call(fn)
+        self.assertEqual(client.stats()["circuit"], "open")
+
+        # Fails fast while open, without calling fn
+        with self.assertRaises(CircuitOpenError):
+            client.call(fn)
+        self.assertEqual(state["calls"], 3)
+
+        # Half-open trial call closes it again
+        time.sleep(0.25)
+        self.assertEqual(client.call(flaky(0, None)[0]), "ok")
+        self.assertEqual(client.stats()["circuit"], "closed")
+
+    def test_rate_limit(self):
+        # 20/s with a burst of 5: 25 calls take about a second
+        client = GEEClient(rate=20, burst=5, max_retries=0)
+        start = time.perf_counter()
+        for _ in range(25):
+            client.call(lambda: None)
+        elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertLessEqual(elapsed, 1.3 * TIME_SCALE)
+
+    def test_concurrency_cap(self):
+        client = GEEClient(rate=0, max_concurrent=3, max_retries=0)
+        lock = threading.Lock()
+        peak = {"now": 0, "max": 0}
+
+        def slow():
+            with lock:
+                peak["now"] += 1
+                peak["max"] = max(peak["max"], peak["now"])
+            time.sleep(0.05)
+            with lock:
+                peak["now"] -= 1
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda _: client.call(slow), range(24)))
+        self.assertEqual(peak["max"], 3)
+        self.assertEqual((client.stats()["calls"], client.stats()["succeeded"]), (24, 24))
+
+
+# ---------------------------------------------------------
+# SCORING
+# ---------------------------------------------------------
+
+def loop_potential(power_avg, roughness, land_type, w_wind=0.7, w_terrain=0.3, scores=LAND_SUITABILITY_SCORES):
+    """The per-zone loop scoring used before (gee_service.compute_potential)."""
+    buildable, weighted = 0.0, 0.0
+    for label, pct in (land_type or {}).items():
+        fraction = pct / 100.0
+        if label not in HARD_EXCLUSION_CLASSES:
+            buildable += fraction
+            weighted += fraction * scores.get(label, 0.5)
+    s_land = (weighted / buildable if buildable > 0 else 0.0) * buildable
+
+    s_wind = min(1.25, (power_avg or 0.0) / 800)
+    s_terrain = 1 - min(1.0, (roughness or 0.0) / 50)
+    return round(100 * (w_wind * s_wind + w_terrain * s_terrain) * s_land, 1)
+
+
+def random_zone(rng):
+    labels = rng.sample(list(LAND_SUITABILITY_SCORES) + ["class_99"], rng.randint(0, 4))
+    weights = [rng.random() for _ in labels]
+    total = sum(weights) or 1
+    land = {label: round(100 * w / total, 1) for label, w in zip(labels, weights)}
+    return rng.uniform(0, 1500), rng.uniform(0, 80), land
+
+
+class ScoringTests(unittest.TestCase):
+    """
+    core/scoring.py against the per-zone scoring loop. Values may differ by
+    0.1 on rounding boundaries (land classes are summed in another order).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(7)
+        cls.zones = [random_zone(rng) for _ in range(5000)] + [(0.0, 0.0, {}), (900.0, 5.0, None), (None, None, {})]
+
+    def assertMatchesLoop(self, params=DEFAULT_PARAMS, **weights):
+        power, rough, land = zip(*self.zones)
+        got = score(power, rough, land, params)
+        expected = [loop_potential(*z, **weights) for z in self.zones]
+        np.testing.assert_allclose(got, expected, rtol=0, atol=0.1 + 1e-9)
+
+    def test_default_parameters(self):
+        self.assertMatchesLoop()
+
+    def test_custom_parameters(self):
+        params = params_from_dict({"wind_weight": 0.5, "terrain_weight": 0.5, "land_scores": {"Tree cover": 0.9}})
+        self.assertMatchesLoop(
+            params, w_wind=0.5, w_terrain=0.5, scores={**LAND_SUITABILITY_SCORES, "Tree cover": 0.9},
+        )
+
+    def test_rejects_bad_parameters(self):
+        for bad in (
+            {"wind_weight": -1}, {"nope": 1}, {"land_scores": {"Grassland": 2}}, {"wind_norm": 0},
+            {"hard_exclusions": "Built-up"}, {"hard_exclusions": [1]}, {"land_scores": [["Grassland", 0.5]]},
+        ):
+            with self.subTest(params=bad):
+                with self.assertRaises(ValueError):
+                    params_from_dict(bad)
+
+
+# ---------------------------------------------------------
+# WIND DISTRIBUTION
+# ---------------------------------------------------------
+
+def hourly_histogram(rng, k, c, hours=8760):
+    """What get_wind_histogram_image counts for one pixel and year."""
+    speeds = np.minimum(c * rng.weibull(k, hours), WIND_HIST_MAX - 1e-3)
+    return np.histogram(speeds, bin_edges())[0]
+
+
+class WindDistributionTests(unittest.TestCase):
+    """core/wind_distribution.py on hours drawn from known Weibull distributions."""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(3)
+        # Realistic sites; very heavy tails (k 1.3, c 12) lose variance to the
+        # 30 m/s clamp and fit k ~10% high
+        cls.cases = [(k, c) for k in (1.3, 1.8, 2.2, 3.0) for c in (4.0, 6.5, 9.0, 12.0) if (k, c) != (1.3, 12.0)]
+        cls.hists = np.array([hourly_histogram(rng, k, c) for k, c in cls.cases])
+
+    def test_fit_recovers_k_and_c(self):
+        k_fit, c_fit = fit_weibull(self.hists)
+        k, c = np.array(self.cases).T
+        np.testing.assert_allclose(k_fit, k, rtol=0.06)
+        np.testing.assert_allclose(c_fit, c, rtol=0.03)
+
+    def test_no_hours_or_no_spread_fit_nan(self):
+        k, c = fit_weibull([[0] * WIND_HIST_BINS, [0] * 5 + [100] + [0] * (WIND_HIST_BINS - 6)])
+        self.assertTrue(np.isnan(k).all() and np.isnan(c).all())
+
+    def test_histograms(self):
+        matrix = histogram_matrix([None, [], list(self.hists[0]), [1, 2, 3]])
+        self.assertEqual(matrix[[0, 1, 3]].sum(), 0)
+        self.assertEqual(matrix[2].sum(), self.hists[0].sum())
+        np.testing.assert_array_equal(merge_histograms([self.hists, self.hists]), 2 * self.hists)
+        self.assertEqual(compact(self.hists[0]), [int(h) for h in self.hists[0]])
+
+    def test_fraction_above(self):
+        expected = [np.exp(-(3.0 / c) ** k) for k, c in self.cases]
+        np.testing.assert_allclose(fraction_above(self.hists, 3.0), expected, rtol=0, atol=0.02)
+
+
+# ---------------------------------------------------------
+# ENERGY
+# ---------------------------------------------------------
+
+CURVES = [SMALL_TURBINE_CURVE, ONSHORE_TURBINE_CURVE, OFFSHORE_TURBINE_CURVE]
+
+
+def integrated_mean_kw(k, c, rho, curve, step=0.01):
+    """∫ P(v·(ρ/1.225)^⅓) · weibull_pdf(v) dv, one zone and turbine at a time."""
+    v_curve, kw = parse_curve(curve)
+    factor = (rho / STANDARD_AIR_DENSITY) ** (1 / 3)
+    total = 0.0
+    v = step / 2
+    while v < 30:
+        pdf = (k / c) * (v / c) ** (k - 1) * math.exp(-((v / c) ** k))
+        total += float(np.interp(v * factor, v_curve, kw, left=0.0, right=0.0)) * pdf * step
+        v += step
+    return total
+
+
+class EnergyTests(unittest.TestCase):
+    """core/energy.py against a numeric integration of the power curves over the Weibull density."""
+
+    def test_matches_numeric_integration(self):
+        rng = np.random.default_rng(11)
+        zones = [(rng.uniform(1.5, 3.0), rng.uniform(4.0, 10.0), rng.uniform(1.05, 1.25)) for _ in range(40)]
+        k, c, rho = (np.array(v) for v in zip(*zones))
+
+        got = energy_matrix(weibull_frequencies(k, c), rho, CURVES)
+        expected = np.array([[integrated_mean_kw(*z, curve) for curve in CURVES] for z in zones])
+        rated = np.array([parse_curve(curve)[1].max() for curve in CURVES])
+        # Within 1% of rated power
+        self.assertLess((np.abs(got["mean_kw"] - expected) / rated).max(), 0.01)
+        np.testing.assert_allclose(got["aep_mwh"], got["mean_kw"] * 8.76)
+        np.testing.assert_allclose(got["capacity_factor"], got["mean_kw"] / rated)
+
+    def test_frequency_fallbacks(self):
+        # Histogram, Weibull and Rayleigh (mean speed only)
+        freq = zone_frequencies([None, [10] * 30, []], [2.0, None, None], [7.0, None, None], [0, 0, 7.0])
+        np.testing.assert_allclose(freq.sum(axis=1), 1.0)
+        no_data = zone_frequencies([None], [None], [None], [0])
+        self.assertEqual(energy_matrix(no_data, [0], CURVES)["mean_kw"].sum(), 0)
+
+    def test_thinner_air_yields_less(self):
+        freq = weibull_frequencies([2.0], [7.0])
+        thin = energy_matrix(freq, [1.0], CURVES)["mean_kw"]
+        standard = energy_matrix(freq, [STANDARD_AIR_DENSITY], CURVES)["mean_kw"]
+        self.assertTrue((thin < standard).all())
+
+    def test_curves(self):
+        self.assertEqual(parse_curve(generic_power_curve(11000, 3500))[1].max(), 3500)
+        for bad in ([[1, 2]], [[1, -2], [3, 4]], [[5, 1], [5, 2]]):
+            with self.subTest(curve=bad):
+                with self.assertRaises(ValueError):
+                    parse_curve(bad)
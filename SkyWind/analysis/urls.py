@@ -5,17 +5,25 @@ urlpatterns = [
     # REGION
     path("regions/<int:region_id>/", views.get_region_details),
     path("regions/<int:region_id>/zones/", views.get_region_zones),
+    path("regions/<int:region_id>/rank/", views.rank_region_zones),
     path("regions/compute/", views.compute_region),
+    path("regions/at/", views.get_regions_at),
     # ZONE
     path("zones/<int:zone_id>/", views.get_zone_details),
+    path("zones/<int:zone_id>/history/", views.get_zone_history),
+    path("zones/in-bbox/", views.get_zones_in_bbox),
     # ZONE POWERS BY TURBINE
     path(
         "regions/<int:region_id>/zone-powers/",
         views.get_region_zone_powers,
         name="region_zone_powers",
     ),
+    path("regions/<int:region_id>/energy/", views.get_region_energy),
     path("regions/<int:region_id>/water/", views.get_water),
     path("regions/<int:region_id>/grid/", views.get_region_grid),
     path("regions/<int:region_id>/relief/", views.get_region_relief),
     path("elevation/", views.get_elevation),
+    # BACKGROUND JOBS
+    path("jobs/<int:job_id>/", views.get_job_status),
+    path("gee/stats/", views.get_gee_stats),
 ]
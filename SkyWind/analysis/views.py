@@ -1,11 +1,61 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
-from .models import Region, RegionGrid, Zone, Point, Infrastructure, WindTurbineType
-from analysis.core.gee_service import compute_gee_for_grid
+from .models import Region, RegionGrid, Zone, Point, Infrastructure, WindTurbineType, PipelineJob, ZoneMetricHistory
+from analysis.core.job_queue import enqueue_grid_refresh, job_to_dict
+from analysis.core.climatology import history_payload, parse_years
+from analysis.core import gee_client
+from analysis.core.metric_store import (
+    grid_columns, invalidate_store, land_percentages, region_columns, values, zone_rows,
+)
+from analysis.core.region_energy import region_energy
+from analysis.core.scoring import land_matrix, params_from_dict, score_arrays
+from analysis.core.freshness import (
+    STATE_COMPLETE, STATE_PENDING, combine_states, region_state,
+)
 from .core.geometry import compute_region_corners, generate_zone_grid
+from .core.global_lattice import parse_cell, snap_region, snapped_lattice
+from .core.lattice import create_grid_zones
+from .core.spatial import BBOX_FIELDS, bbox_of, bbox_tuple, containing, corners_of, intersecting, set_bbox
 import json
-from .services.relief_gee import get_relief_points
+
+import numpy as np
+
+
+# ------------------------------------------------------------
+# BACKGROUND JOBS
+# ------------------------------------------------------------
+def _pipeline_pending_response(grid, **extra):
+    """Queue an interactive pipeline run for `grid` and answer 202 Accepted."""
+    job = enqueue_grid_refresh(grid, priority=PipelineJob.PRIORITY_INTERACTIVE)
+    return JsonResponse({**extra, **job_to_dict(job)}, status=202)
+
+
+def _data_state_payload(grid, state):
+    """
+    data_state for a response; a partial result is served as is while a
+    refresh of its stale metrics is queued.
+    """
+    payload = {"data_state": state}
+    if state != STATE_COMPLETE:
+        job = enqueue_grid_refresh(grid, priority=PipelineJob.PRIORITY_INTERACTIVE)
+        payload["refresh_job"] = job_to_dict(job)
+    return payload
+
+
+def get_job_status(request, job_id):
+    try:
+        job = PipelineJob.objects.get(pk=job_id)
+    except PipelineJob.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    return JsonResponse(job_to_dict(job))
+
+
+def get_gee_stats(request):
+    """Earth Engine client counters of this process (calls, retries, circuit state...)."""
+    return JsonResponse(gee_client.stats())
 
 
 # ------------------------------------------------------------
@@ -21,13 +71,20 @@ def get_region_details(request, region_id):
 
     grid = r.grids.first()
 
-    # Auto-fetch GEE ONLY if region has no data yet
-    if grid and r.avg_temperature == 0:
-        compute_gee_for_grid(grid)
+    # Zone states are read from the stored column (no per-zone evaluation)
+    state = STATE_COMPLETE
+    if grid:
+        zone_states = grid.zones.values_list("data_state", flat=True).distinct()
+        state = combine_states(region_state(r), *zone_states)
+
+    # Auto-fetch GEE if region has no data yet (runs in a worker)
+    if grid and state == STATE_PENDING:
+        return _pipeline_pending_response(grid, region_id=r.id, data_state=state)
 
     return JsonResponse(
         {
             "id": r.id,
+            **(_data_state_payload(grid, state) if grid else {"data_state": state}),
             # geometry
             "center": {"lat": r.center.lat, "lon": r.center.lon},
             "A": {"lat": r.A.lat, "lon": r.A.lon},
@@ -47,34 +104,13 @@ def get_region_details(request, region_id):
 
 
 def get_region_zones(request, region_id):
-    zones = Zone.objects.filter(grid__region_id=region_id).select_related(
-        "A", "B", "C", "D"
-    )
-
-    result = []
-    for z in zones:
-        result.append(
-            {
-                "id": z.id,
-                "zone_index": z.zone_index,
-                "A": {"lat": z.A.lat, "lon": z.A.lon},
-                "B": {"lat": z.B.lat, "lon": z.B.lon},
-                "C": {"lat": z.C.lat, "lon": z.C.lon},
-                "D": {"lat": z.D.lat, "lon": z.D.lon},
-                "avg_wind_speed": z.avg_wind_speed,
-                "wind_direction": z.wind_direction,
-                "min_alt": z.min_alt,
-                "max_alt": z.max_alt,
-                "roughness": z.roughness,
-                "air_density": z.air_density,
-                "power_avg": z.power_avg,
-                "land_type": z.land_type,
-                "potential": z.potential,
-                "infrastructure_id": z.infrastructure.id if z.infrastructure else None,
-            }
-        )
-
-    return JsonResponse(result, safe=False)
+    """
+    Leaf zones of every grid of the region (adaptive grids also store the
+    zones they split), read from the grids' columnar metric stores (see
+    core/metric_store.py) instead of the Zone and Point rows.
+    """
+    columns = region_columns(region_id)
+    return JsonResponse(zone_rows(columns) if columns is not None else [], safe=False)
 
 
 # ------------------------------------------------------------
@@ -83,7 +119,7 @@ def get_region_zones(request, region_id):
 def get_zone_details(request, zone_id):
     try:
         z = Zone.objects.select_related(
-            "A", "B", "C", "D", "infrastructure", "grid", "grid__region"
+            "infrastructure", "grid", "grid__region"
         ).get(pk=zone_id)
     except Zone.DoesNotExist:
         return JsonResponse({"error": "Zone not found"}, status=404)
@@ -92,28 +128,32 @@ def get_zone_details(request, zone_id):
     region = z.grid.region
     grid = z.grid
 
-    if region.avg_temperature == 0 or z.avg_wind_speed == 0:
-        compute_gee_for_grid(grid)
+    # Stored column: judged against the years of the run that wrote it
+    state = z.data_state
+    if state == STATE_PENDING:
+        return _pipeline_pending_response(grid, zone_id=z.id, region_id=region.id, data_state=state)
 
-        # refresh object
-        z = Zone.objects.select_related(
-            "A", "B", "C", "D", "infrastructure", "grid", "grid__region"
-        ).get(pk=zone_id)
+    # A zone is partial while its region temperature / summary is stale
+    state = combine_states(state, region_state(region))
 
     return JsonResponse(
         {
             "id": z.id,
+            **_data_state_payload(grid, state),
             "zone_index": z.zone_index,
             "region_id": z.grid.region.id,
             "grid_id": z.grid.id,
+            "depth": z.depth,
+            "parent_id": z.parent_id,
             # geometry
-            "A": {"lat": z.A.lat, "lon": z.A.lon},
-            "B": {"lat": z.B.lat, "lon": z.B.lon},
-            "C": {"lat": z.C.lat, "lon": z.C.lon},
-            "D": {"lat": z.D.lat, "lon": z.D.lon},
+            **_corners_payload(z),
+            "center": {"lat": z.center_lat, "lon": z.center_lon},
             # wind
             "avg_wind_speed": z.avg_wind_speed,
             "wind_direction": z.wind_direction,
+            "wind_histogram": z.wind_histogram,
+            "weibull_k": z.weibull_k,
+            "weibull_c": z.weibull_c,
             # terrain
             "min_alt": z.min_alt,
             "max_alt": z.max_alt,
@@ -136,6 +176,193 @@ def get_zone_details(request, zone_id):
     )
 
 
+# ------------------------------------------------------------
+# CUSTOM RANKING (NO EARTH ENGINE, NO WRITES)
+# ------------------------------------------------------------
+@csrf_exempt
+def rank_region_zones(request, region_id):
+    """
+    Re-score and rank the zones of a region with caller-supplied weights.
+
+    POST JSON (every key optional, defaults = stored potentials):
+        {"wind_weight": 0.5, "terrain_weight": 0.5, "wind_norm": 800,
+         "wind_cap": 1.25, "roughness_norm": 50,
+         "land_scores": {"Tree cover": 0.8}, "hard_exclusions": [...],
+         "unknown_land_score": 0.5, "limit": 20}
+
+    GET ranks with the default parameters (?limit=20). Scores come from the
+    stored zone metrics (see scoring.py); nothing is written back.
+    """
+    if not Region.objects.filter(pk=region_id).exists():
+        return JsonResponse({"error": "Region not found"}, status=404)
+
+    try:
+        data = json.loads(request.body) if request.method == "POST" and request.body else {}
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Scoring parameters must be a JSON object"}, status=400)
+
+    try:
+        limit = data.pop("limit", request.GET.get("limit"))
+        limit = int(limit) if limit is not None else None
+    except (ValueError, TypeError):
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+    if limit is not None and limit < 1:
+        return JsonResponse({"error": "limit must be at least 1"}, status=400)
+
+    try:
+        params = params_from_dict(data)
+    except (ValueError, TypeError, AttributeError) as e:
+        return JsonResponse({"error": f"Invalid scoring parameters: {e}"}, status=400)
+
+    # Stored metrics from the grids' columnar stores (see core/metric_store.py)
+    columns = region_columns(region_id)
+    if columns is not None:
+        ids, indexes, power, roughness, stored = (
+            values(columns, name) for name in ("id", "zone_index", "power_avg", "roughness", "potential")
+        )
+        land, classes = land_percentages(columns)
+    else:
+        ids, indexes, power, roughness, stored = [], [], [], [], []
+        land, classes = land_matrix([])
+
+    parts = score_arrays(power, roughness, land, classes, params)
+    order = np.argsort(-parts["potential"], kind="stable")[:limit]
+
+    return JsonResponse({
+        "region_id": region_id,
+        "params": params.to_dict(),
+        "count": len(ids),
+        "zones": [
+            {
+                "rank": rank,
+                "id": ids[i],
+                "zone_index": indexes[i],
+                "potential": round(float(parts["potential"][i]), 1),
+                "stored_potential": stored[i],
+                "s_wind": round(float(parts["s_wind"][i]), 3),
+                "s_terrain": round(float(parts["s_terrain"][i]), 3),
+                "s_land": round(float(parts["s_land"][i]), 3),
+            }
+            for rank, i in enumerate(order, start=1)
+        ],
+    })
+
+
+def get_zone_history(request, zone_id):
+    """
+    Per-year metrics of a zone and their climatology, straight from
+    ZoneMetricHistory (never triggers a computation).
+
+    Optional ?years=2019-2022 (or 2019,2021) restricts the years.
+    """
+    if not Zone.objects.filter(pk=zone_id).exists():
+        return JsonResponse({"error": "Zone not found"}, status=404)
+
+    rows = ZoneMetricHistory.objects.filter(zone_id=zone_id)
+
+    years_param = request.GET.get("years")
+    if years_param:
+        try:
+            years = parse_years(years_param)
+        except ValueError:
+            return JsonResponse({"error": "Invalid years"}, status=400)
+        rows = rows.filter(year__in=years)
+
+    return JsonResponse({"zone_id": zone_id, **history_payload(rows)})
+
+
+# ------------------------------------------------------------
+# SPATIAL QUERIES (BOUNDING-BOX INDEXES, SEE core/spatial.py)
+# ------------------------------------------------------------
+def _bbox_payload(row):
+    return {name: row[name] for name in BBOX_FIELDS}
+
+
+def _corners_payload(zone):
+    """A-D of a zone from its inline box, without the corner Points."""
+    return {c: {"lat": lat, "lon": lon} for c, (lat, lon) in corners_of(zone).items()}
+
+
+def get_regions_at(request):
+    """
+    Regions whose area contains a coordinate.
+    Query params: lat, lon
+    """
+    try:
+        lat = float(request.GET.get("lat"))
+        lon = float(request.GET.get("lon"))
+    except (ValueError, TypeError):
+        return JsonResponse({"error": "lat and lon parameters are required"}, status=400)
+
+    rows = (
+        containing(Region.objects.all(), lat, lon)
+        .order_by("id")
+        .values("id", "center__lat", "center__lon", "rating", "avg_potential", "data_state", *BBOX_FIELDS)
+    )
+    return JsonResponse({
+        "lat": lat,
+        "lon": lon,
+        "regions": [
+            {
+                "id": row["id"],
+                "center": {"lat": row["center__lat"], "lon": row["center__lon"]},
+                "bbox": _bbox_payload(row),
+                "rating": row["rating"],
+                "avg_potential": row["avg_potential"],
+                "data_state": row["data_state"],
+            }
+            for row in rows
+        ],
+    })
+
+
+# Zones returned by one bounding-box query at most
+ZONES_IN_BBOX_LIMIT = 5000
+
+
+def get_zones_in_bbox(request):
+    """
+    Leaf zones of every grid intersecting a bounding box.
+    Query params: lat_min, lat_max, lon_min, lon_max, optional limit
+    """
+    try:
+        bbox = tuple(float(request.GET.get(name)) for name in BBOX_FIELDS)
+        limit = min(int(request.GET.get("limit", ZONES_IN_BBOX_LIMIT)), ZONES_IN_BBOX_LIMIT)
+    except (ValueError, TypeError):
+        return JsonResponse({"error": "lat_min, lat_max, lon_min and lon_max parameters are required"}, status=400)
+    if bbox[0] > bbox[1] or bbox[2] > bbox[3] or limit < 1:
+        return JsonResponse({"error": "Invalid bounding box"}, status=400)
+
+    rows = list(
+        intersecting(Zone.objects.filter(children__isnull=True), bbox)
+        .order_by("id")
+        .values(
+            "id", "grid_id", "grid__region_id", "zone_index", "depth",
+            "avg_wind_speed", "potential", "data_state", *BBOX_FIELDS,
+        )[:limit + 1]
+    )
+    return JsonResponse({
+        "bbox": dict(zip(BBOX_FIELDS, bbox)),
+        "truncated": len(rows) > limit,
+        "zones": [
+            {
+                "id": row["id"],
+                "grid_id": row["grid_id"],
+                "region_id": row["grid__region_id"],
+                "zone_index": row["zone_index"],
+                "depth": row["depth"],
+                "bbox": _bbox_payload(row),
+                "avg_wind_speed": row["avg_wind_speed"],
+                "potential": row["potential"],
+                "data_state": row["data_state"],
+            }
+            for row in rows[:limit]
+        ],
+    })
+
+
 # ----------------------------
 # POINT HELPERS
 # ----------------------------
@@ -158,8 +385,11 @@ def _get_or_reuse_point(lat, lon):
 # ----------------------------
 
 
-def _zones_match_expected(grid: RegionGrid) -> bool:
-    """Compare existing zone geometry with expected geometry."""
+def _expected_cells(grid: RegionGrid) -> list:
+    """Corners of the base zones of `grid`, in zone_index order."""
+    if grid.lattice_origin:
+        points, cells, _ = snapped_lattice(*parse_cell(grid.lattice_origin), grid.zones_per_edge)
+        return [[points[i][j] for i, j in cell.values()] for cell in cells]
 
     expected_corners = compute_region_corners(
         center_lat=grid.region.center.lat,
@@ -174,31 +404,28 @@ def _zones_match_expected(grid: RegionGrid) -> bool:
         D=expected_corners["D"],
         n=grid.zones_per_edge,
     )
+    return [list(cell.values()) for row in expected_grid for cell in row]
+
+
+def _zones_match_expected(grid: RegionGrid) -> bool:
+    """Compare existing zone geometry with expected geometry."""
 
-    zones = list(grid.zones.order_by("zone_index"))
+    # Base lattice only; refined children of adaptive grids are not compared.
+    # Zones are axis-aligned, so their bounding boxes (one query, no Point
+    # joins) determine their corners; a missing box counts as a mismatch
+    stored = np.array(
+        grid.zones.filter(depth=0).order_by("zone_index").values_list(*BBOX_FIELDS),
+        dtype=float,
+    )
     required = grid.zones_per_edge * grid.zones_per_edge
-    if len(zones) != required:
+    if len(stored) != required:
         return False
 
-    idx = 0
+    expected = np.array(
+        [[bbox_of(corners)[name] for name in BBOX_FIELDS] for corners in _expected_cells(grid)]
+    )
     tolerance = 1e-7  # Tolerance for floating point comparison
-    for row in expected_grid:
-        for cell in row:
-            z = zones[idx]
-            if (
-                abs(z.A.lat - cell["A"][0]) > tolerance
-                or abs(z.A.lon - cell["A"][1]) > tolerance
-                or abs(z.B.lat - cell["B"][0]) > tolerance
-                or abs(z.B.lon - cell["B"][1]) > tolerance
-                or abs(z.C.lat - cell["C"][0]) > tolerance
-                or abs(z.C.lon - cell["C"][1]) > tolerance
-                or abs(z.D.lat - cell["D"][0]) > tolerance
-                or abs(z.D.lon - cell["D"][1]) > tolerance
-            ):
-                return False
-            idx += 1
-
-    return True
+    return bool(np.all(np.abs(stored - expected) <= tolerance))
 
 
 # ----------------------------
@@ -207,46 +434,15 @@ def _zones_match_expected(grid: RegionGrid) -> bool:
 
 
 def _generate_zones_for_grid(grid: RegionGrid):
-    """Generate NEW zones using ALREADY computed region/grid corners."""
-
-    infra, _ = Infrastructure.objects.get_or_create(index=1)
-
-    A = grid.A
-    B = grid.B
-    C = grid.C
-    D = grid.D
-
-    zone_grid = generate_zone_grid(
-        A=(A.lat, A.lon),
-        B=(B.lat, B.lon),
-        C=(C.lat, C.lon),
-        D=(D.lat, D.lon),
-        n=grid.zones_per_edge,
-    )
-
-    created = []
-    zone_index = 1
-
-    for row in zone_grid:
-        for cell in row:
-            A_z = _get_or_reuse_point(*cell["A"])
-            B_z = _get_or_reuse_point(*cell["B"])
-            C_z = _get_or_reuse_point(*cell["C"])
-            D_z = _get_or_reuse_point(*cell["D"])
+    """
+    Generate NEW zones using ALREADY computed region/grid corners.
 
-            z = Zone.objects.create(
-                grid=grid,
-                A=A_z,
-                B=B_z,
-                C=C_z,
-                D=D_z,
-                infrastructure=infra,
-                zone_index=zone_index,
-            )
-            created.append(z)
-            zone_index += 1
+    The (n+1)² shared corner points are upserted in batches and the zones
+    bulk-created (see core/lattice.py): a few queries for any grid size.
+    """
 
-    return created
+    infra, _ = Infrastructure.objects.get_or_create(index=1)
+    return create_grid_zones(grid, infra)
 
 
 def _delete_grid_zones(grid: RegionGrid):
@@ -256,6 +452,7 @@ def _delete_grid_zones(grid: RegionGrid):
     This prevents conflicts when regions overlap at the same center.
     """
     grid.zones.all().delete()
+    invalidate_store(grid)
 
 
 # ----------------------------
@@ -274,16 +471,30 @@ def compute_region(request):
         lon = float(data["lon"])
         side_km = float(data["side_km"])
         zpe = int(data["zones_per_edge"])
+        # Optional adaptive refinement depth (0 = uniform grid)
+        max_depth = int(data.get("max_depth", 0))
+        if max_depth < 0 or zpe < 1 or side_km <= 0:
+            raise ValueError
+        # Optional snapping to the global lattice (see core/global_lattice.py)
+        snap = bool(data.get("snap", getattr(settings, "GEE_SNAP_TO_LATTICE", False)))
     except Exception:
         return JsonResponse({"error": "Invalid fields"}, status=400)
 
+    snapped = None
+    if snap:
+        # Center and size move to the nearest block of lattice cells, so
+        # overlapping regions share zones
+        snapped = snap_region(lat, lon, side_km, zpe)
+        lat, lon = snapped.center
+        side_km = snapped.side_km
+
     with transaction.atomic():
 
         # 1) CENTER POINT
         center_pt = _get_or_reuse_point(lat, lon)
 
         # 2) COMPUTE corners for this specific side_km
-        corners = compute_region_corners(lat, lon, side_km)
+        corners = snapped.corners if snapped else compute_region_corners(lat, lon, side_km)
 
         A = _get_or_reuse_point(*corners["A"])
         B = _get_or_reuse_point(*corners["B"])
@@ -292,19 +503,11 @@ def compute_region(request):
 
         # 3) REGION SELECTION LOGIC
         # Check if a region exists with this center AND this side_km
-        existing_region = None
-
-        # Get all regions at this center
-        regions_at_center = Region.objects.filter(center=center_pt).prefetch_related(
-            "grids"
+        # (first one with a grid of matching side_km)
+        existing_region = (
+            Region.objects.filter(center=center_pt, grids__side_km=side_km).order_by("id").first()
         )
 
-        for reg in regions_at_center:
-            # Check if this region has a grid with matching side_km
-            if reg.grids.filter(side_km=side_km).exists():
-                existing_region = reg
-                break
-
         if existing_region:
             # Reuse existing region with same center + side_km
             region = existing_region
@@ -317,11 +520,12 @@ def compute_region(request):
         region.B = B
         region.C = C
         region.D = D
+        set_bbox(region, [A, B, C, D])
         region.save()
 
         # 4) REGION GRID (get existing or create new)
         grid, grid_created = RegionGrid.objects.get_or_create(
-            region=region, side_km=side_km, zones_per_edge=zpe
+            region=region, side_km=side_km, zones_per_edge=zpe, max_depth=max_depth
         )
 
         # Update grid corners
@@ -329,6 +533,8 @@ def compute_region(request):
         grid.B = B
         grid.C = C
         grid.D = D
+        set_bbox(grid, [A, B, C, D])
+        grid.lattice_origin = snapped.origin if snapped else ""
         grid.save()
 
         # 5) ZONES – regenerate only when needed
@@ -338,8 +544,26 @@ def compute_region(request):
             # Delete old zones before creating new ones
             _delete_grid_zones(grid)
             zones = _generate_zones_for_grid(grid)
+            resp_zones = [
+                {
+                    "id": z.id,
+                    "index": z.zone_index,
+                    "depth": z.depth,
+                    **_corners_payload(z),
+                }
+                for z in zones
+            ]
         else:
-            zones = list(grid.zones.all())
+            # Reused leaves straight from the grid's columnar store
+            resp_zones = [
+                {
+                    "id": row["id"],
+                    "index": row["zone_index"],
+                    "depth": row["depth"],
+                    **{c: row[c] for c in "ABCD"},
+                }
+                for row in zone_rows(grid_columns(grid))
+            ]
 
     # ----------------------------
     # RESPONSE
@@ -352,23 +576,17 @@ def compute_region(request):
         "D": {"lat": region.D.lat, "lon": region.D.lon},
     }
 
-    resp_zones = [
-        {
-            "id": z.id,
-            "index": z.zone_index,
-            "A": {"lat": z.A.lat, "lon": z.A.lon},
-            "B": {"lat": z.B.lat, "lon": z.B.lon},
-            "C": {"lat": z.C.lat, "lon": z.C.lon},
-            "D": {"lat": z.D.lat, "lon": z.D.lon},
-        }
-        for z in zones
-    ]
-
     return JsonResponse(
         {
             "region_id": region.id,
+            "grid_id": grid.id,
+            "max_depth": grid.max_depth,
             "center": {"lat": lat, "lon": lon},
             "corners": resp_corners,
+            "lattice": (
+                {"origin": snapped.origin, "level": snapped.level, "side_km": snapped.side_km}
+                if snapped else None
+            ),
             "zones": resp_zones,
         }
     )
@@ -382,7 +600,8 @@ def compute_region(request):
 def get_region_zone_powers(request, region_id):
     """
     Returns all zones of a region with coordinates and achievable power (kW)
-    for a given turbine type.
+    for a given turbine type: the mean output over the year from its power
+    curve and the zone's wind distribution, with AEP and capacity factor.
 
     Query params:
         turbine_id: ID of WindTurbineType
@@ -411,11 +630,10 @@ def get_region_zone_powers(request, region_id):
             {
                 "id": z.id,
                 "zone_index": z.zone_index,
-                "A": {"lat": z.A.lat, "lon": z.A.lon},
-                "B": {"lat": z.B.lat, "lon": z.B.lon},
-                "C": {"lat": z.C.lat, "lon": z.C.lon},
-                "D": {"lat": z.D.lat, "lon": z.D.lon},
+                **_corners_payload(z),
                 "power_kw": power_kw,
+                "aep_mwh": item["aep_mwh"],
+                "capacity_factor": item["capacity_factor"],
                 "avg_wind_speed": z.avg_wind_speed,
                 "air_density": z.air_density,
             }
@@ -424,23 +642,82 @@ def get_region_zone_powers(request, region_id):
     return JsonResponse(result, safe=False)
 
 
+# ------------------------------------------------------------
+# REGION ENERGY (ALL ZONES × ALL TURBINE TYPES)
+# ------------------------------------------------------------
+def get_region_energy(request, region_id):
+    """
+    Annual energy production and capacity factor of every zone of a region
+    for every turbine type (see analysis/core/region_energy.py).
+
+    Returns per turbine the mean capacity factor, total AEP and best zone,
+    and per zone one value per turbine (in the order of "turbines").
+    """
+    try:
+        region = Region.objects.get(pk=region_id)
+    except Region.DoesNotExist:
+        return JsonResponse({"error": "Region not found"}, status=404)
+
+    energy = region_energy(region)
+    turbines = WindTurbineType.objects.in_bulk(energy["turbines"])
+    indexes = dict(Zone.objects.filter(pk__in=energy["zones"]).values_list("id", "zone_index"))
+
+    aep = np.array(energy["aep_mwh"]).reshape(len(energy["zones"]), len(energy["turbines"]))
+    cf = np.array(energy["capacity_factor"]).reshape(aep.shape)
+
+    summary = []
+    for t, turbine_id in enumerate(energy["turbines"]):
+        turbine = turbines[turbine_id]
+        best = int(aep[:, t].argmax()) if len(aep) else None
+        summary.append(
+            {
+                "id": turbine_id,
+                "type_name": turbine.type_name,
+                "category": turbine.category,
+                "rated_kw": max(p for _, p in turbine.curve()),
+                "mean_capacity_factor": round(float(cf[:, t].mean()), 4) if len(cf) else 0.0,
+                "total_aep_mwh": round(float(aep[:, t].sum()), 1),
+                "best_zone_id": energy["zones"][best] if best is not None else None,
+            }
+        )
+
+    return JsonResponse(
+        {
+            "region_id": region.id,
+            "turbines": summary,
+            "zones": [
+                {
+                    "id": zone_id,
+                    "zone_index": indexes.get(zone_id),
+                    "aep_mwh": energy["aep_mwh"][i],
+                    "capacity_factor": energy["capacity_factor"][i],
+                }
+                for i, zone_id in enumerate(energy["zones"])
+            ],
+        }
+    )
+
+
 from django.http import JsonResponse
 from analysis.models import Region
-from analysis.services.water_gee import get_water_polygons
 
 
 def get_water(request, region_id):
+    from analysis.services.water_gee import get_water_polygons
+
     try:
-        region = Region.objects.select_related("A", "B", "C", "D").get(id=region_id)
+        region = Region.objects.get(id=region_id)
     except Region.DoesNotExist:
         return JsonResponse({"error": "Region not found"}, status=404)
 
-    # Create bounding coords
-    lats = [region.A.lat, region.B.lat, region.C.lat, region.D.lat]
-    lons = [region.A.lon, region.B.lon, region.C.lon, region.D.lon]
+    # Bounding coords (stored with the corners)
+    bbox = bbox_tuple(region)
+    if bbox is None:
+        return JsonResponse({"error": "Region has no corners"}, status=400)
+    lat_min, lat_max, lon_min, lon_max = bbox
 
     try:
-        water_fc = get_water_polygons(min(lats), min(lons), max(lats), max(lons))
+        water_fc = get_water_polygons(lat_min, lon_min, lat_max, lon_max)
     except Exception as e:
         # Always return VALID JSON so React doesn't die
         return JsonResponse(
@@ -461,11 +738,11 @@ def get_region_grid(request, region_id):
     except Region.DoesNotExist:
         return JsonResponse({"error": "Region not found"}, status=404)
 
-    # Compute region bounding box
-    lat_min = min(r.A.lat, r.B.lat, r.C.lat, r.D.lat)
-    lat_max = max(r.A.lat, r.B.lat, r.C.lat, r.D.lat)
-    lon_min = min(r.A.lon, r.B.lon, r.C.lon, r.D.lon)
-    lon_max = max(r.A.lon, r.B.lon, r.C.lon, r.D.lon)
+    # Region bounding box (stored with the corners)
+    bbox = bbox_tuple(r)
+    if bbox is None:
+        return JsonResponse({"error": "Region has no corners"}, status=400)
+    lat_min, lat_max, lon_min, lon_max = bbox
 
     grid = get_grid_infrastructure(lat_min, lon_min, lat_max, lon_max)
 
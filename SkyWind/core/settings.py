@@ -124,6 +124,106 @@ CORS_ALLOW_HEADERS = ["*"]
 CORS_ALLOW_METHODS = ["*"]
 
 
+# ----------------------------------------------------------------------
+# EXTERNAL I/O (Earth Engine + Overpass) – see analysis/core/external_io.py
+# ----------------------------------------------------------------------
+# live   : call Google / Overpass directly
+# record : call them and save every response to EXTERNAL_IO_DIR
+# replay : serve saved responses only (offline benchmarks)
+EXTERNAL_IO_MODE = os.getenv("EXTERNAL_IO_MODE", "live")
+EXTERNAL_IO_DIR = os.getenv("EXTERNAL_IO_DIR", os.path.join(BASE_DIR, "recordings"))
+EXTERNAL_IO_REPLAY_LATENCY_MS = float(os.getenv("EXTERNAL_IO_REPLAY_LATENCY_MS", "0"))
+
+
+# ----------------------------------------------------------------------
+# EARTH ENGINE REDUCTION CACHE – see analysis/core/reduction_cache.py
+# ----------------------------------------------------------------------
+GEE_CACHE_ENABLED = os.getenv("GEE_CACHE_ENABLED", "1") == "1"
+GEE_CACHE_PATH = os.getenv("GEE_CACHE_PATH", os.path.join(BASE_DIR, "cache", "gee_reductions.sqlite3"))
+GEE_CACHE_MAX_BYTES = int(os.getenv("GEE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+# ----------------------------------------------------------------------
+# REGION RASTER SNAPSHOTS – see analysis/core/raster_snapshot.py
+# ----------------------------------------------------------------------
+# When enabled, the pipeline downloads each region's rasters once and
+# computes zone statistics locally instead of per-zone reductions.
+GEE_SNAPSHOTS_ENABLED = os.getenv("GEE_SNAPSHOTS_ENABLED", "0") == "1"
+GEE_SNAPSHOT_DIR = os.getenv("GEE_SNAPSHOT_DIR", os.path.join(BASE_DIR, "cache", "snapshots"))
+
+# ----------------------------------------------------------------------
+# RASTER BACKEND – see analysis/core/local_rasters.py
+# ----------------------------------------------------------------------
+# gee   : Earth Engine (per-zone reductions or region snapshots)
+# local : staged DEM / WorldCover / ERA5 tiles in LOCAL_RASTER_DIR, no
+#         Earth Engine at all (fill it with `manage.py stage_local_rasters`)
+RASTER_BACKEND = os.getenv("RASTER_BACKEND", "gee")
+LOCAL_RASTER_DIR = os.getenv("LOCAL_RASTER_DIR", os.path.join(BASE_DIR, "rasters"))
+
+# ----------------------------------------------------------------------
+# MULTI-YEAR CLIMATOLOGY – see analysis/core/climatology.py
+# ----------------------------------------------------------------------
+# e.g. "2019-2023" or "2018,2020,2022"; empty = single year (2022)
+GEE_CLIMATOLOGY_YEARS = os.getenv("GEE_CLIMATOLOGY_YEARS", "")
+
+# ----------------------------------------------------------------------
+# PIPELINE CONCURRENCY – see analysis/core/pipeline.py
+# ----------------------------------------------------------------------
+# Threads used to run independent pipeline steps at the same time;
+# 1 runs the steps one after another
+GEE_PIPELINE_WORKERS = int(os.getenv("GEE_PIPELINE_WORKERS", "4"))
+
+# Rows per UPDATE statement when pipeline results are written back
+# (one transaction per grid, see analysis/core/freshness.py)
+GEE_DB_BATCH_SIZE = int(os.getenv("GEE_DB_BATCH_SIZE", "500"))
+
+# ----------------------------------------------------------------------
+# REQUEST PLANNER – see analysis/core/request_planner.py
+# ----------------------------------------------------------------------
+# Upper bound on zone polygons per reduceRegions request; small grids are
+# packed together up to this size, larger grids are split into shards
+GEE_MAX_ZONES_PER_REQUEST = int(os.getenv("GEE_MAX_ZONES_PER_REQUEST", "2500"))
+
+# ----------------------------------------------------------------------
+# EARTH ENGINE CLIENT – see analysis/core/gee_client.py
+# ----------------------------------------------------------------------
+GEE_PROJECT = os.getenv("GEE_PROJECT", "rospin1")
+# Initialize Earth Engine in the background when a WSGI worker boots,
+# instead of on the first request that needs it
+GEE_WARMUP_ON_BOOT = os.getenv("GEE_WARMUP_ON_BOOT", "0") == "1"
+# Per process: divide the project quota by the number of worker processes
+GEE_RATE_LIMIT_PER_SEC = float(os.getenv("GEE_RATE_LIMIT_PER_SEC", "10"))
+GEE_RATE_LIMIT_BURST = int(os.getenv("GEE_RATE_LIMIT_BURST", "20"))
+GEE_MAX_CONCURRENT_REQUESTS = int(os.getenv("GEE_MAX_CONCURRENT_REQUESTS", "8"))
+# Transient errors: exponential backoff with full jitter
+GEE_MAX_RETRIES = int(os.getenv("GEE_MAX_RETRIES", "5"))
+GEE_RETRY_BASE_DELAY = float(os.getenv("GEE_RETRY_BASE_DELAY", "1.0"))
+GEE_RETRY_MAX_DELAY = float(os.getenv("GEE_RETRY_MAX_DELAY", "60"))
+# Fail fast after this many consecutive transient failures, for this long
+GEE_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("GEE_CIRCUIT_FAILURE_THRESHOLD", "5"))
+GEE_CIRCUIT_RESET_SECONDS = float(os.getenv("GEE_CIRCUIT_RESET_SECONDS", "60"))
+
+# ----------------------------------------------------------------------
+# METRIC FRESHNESS – see analysis/core/freshness.py
+# ----------------------------------------------------------------------
+# Zone / region metrics older than this are refreshed; 0 = never expire
+GEE_METRIC_MAX_AGE_DAYS = float(os.getenv("GEE_METRIC_MAX_AGE_DAYS", "0"))
+
+# ----------------------------------------------------------------------
+# GLOBAL ZONE LATTICE – see analysis/core/global_lattice.py
+# ----------------------------------------------------------------------
+# Default of compute_region's "snap": regions snap to a worldwide lattice
+# of zone cells, so overlapping regions share zones and their metrics
+GEE_SNAP_TO_LATTICE = os.getenv("GEE_SNAP_TO_LATTICE", "0") == "1"
+
+# ----------------------------------------------------------------------
+# ADAPTIVE GRIDS – see analysis/core/quadtree.py
+# ----------------------------------------------------------------------
+# Zones of grids with max_depth > 0 are split in 4 when their potential
+# (0-100) or wind speed (m/s) reaches these values; 0 disables either
+GEE_REFINE_POTENTIAL_THRESHOLD = float(os.getenv("GEE_REFINE_POTENTIAL_THRESHOLD", "40"))
+GEE_REFINE_WIND_THRESHOLD = float(os.getenv("GEE_REFINE_WIND_THRESHOLD", "0"))
+
 # ----------------------------------------------------------------------
 # DEFAULT PRIMARY KEY
 # ----------------------------------------------------------------------
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Optional Earth Engine warm-up at worker boot (GEE_WARMUP_ON_BOOT); runs in
+# a background thread so the worker starts serving immediately
+from django.conf import settings  # noqa: E402
+
+if settings.GEE_WARMUP_ON_BOOT:
+    from analysis.core.gee_client import warm_up  # noqa: E402
+
+    warm_up()
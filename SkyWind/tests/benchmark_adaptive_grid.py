@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Compare an adaptive (quadtree) grid with the uniform grid of the same
+finest resolution: zones computed, Earth Engine calls, wall time, and
+whether the adaptive leaves find the uniform grid's hotspots.
+
+Both grids are built over the area of an existing RegionGrid, in a
+scratch Region that is deleted afterwards (pipeline steps run on worker
+threads with their own connections, so a rolled-back transaction would
+hide the zones from them):
+
+    python tests/benchmark_adaptive_grid.py 1 --base 5 --depth 2
+    RASTER_BACKEND=local python tests/benchmark_adaptive_grid.py 1 --base 10 --depth 2
+
+Hotspots are the uniform zones scoring at least the refinement threshold
+(GEE_REFINE_POTENTIAL_THRESHOLD); a hotspot is found when an adaptive
+leaf of the finest depth covers its center.
+"""
+import django
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+
+from analysis.core import gee_client
+from analysis.core.gee_service import compute_gee_for_grid
+from analysis.core.lattice import create_grid_zones
+from analysis.core.quadtree import refinement_thresholds
+from analysis.core.spatial import set_bbox
+from analysis.models import Infrastructure, Region, RegionGrid
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("grid_id", type=int, help="RegionGrid whose region and side_km are used")
+parser.add_argument("--base", type=int, default=5, help="zones_per_edge of the adaptive base lattice")
+parser.add_argument("--depth", type=int, default=2, help="max_depth of the adaptive grid")
+args = parser.parse_args()
+
+source = RegionGrid.objects.select_related("region", "A", "B", "C", "D").get(pk=args.grid_id)
+fine = args.base * 2 ** args.depth
+
+
+def build(region, n, max_depth):
+    grid = RegionGrid(
+        region=region, side_km=source.side_km, zones_per_edge=n,
+        max_depth=max_depth, A=source.A, B=source.B, C=source.C, D=source.D,
+    )
+    set_bbox(grid, [source.A, source.B, source.C, source.D])
+    grid.save()
+    infra, _ = Infrastructure.objects.get_or_create(index=1)
+    create_grid_zones(grid, infra)
+    return grid
+
+
+def run(label, n, max_depth):
+    region = Region.objects.create(center=source.region.center, A=source.A, B=source.B, C=source.C, D=source.D)
+    scratch.append(region)
+    calls = gee_client.stats()["calls"]
+    start = time.perf_counter()
+    grid = build(region, n, max_depth)
+    compute_gee_for_grid(grid, force=True)
+    elapsed = time.perf_counter() - start
+    zones = list(grid.zones.all())
+    leaves = list(grid.leaf_zones())
+    print(f"{label:<28} {len(zones):6d} zones computed  {len(leaves):6d} leaves  "
+          f"{gee_client.stats()['calls'] - calls:5d} EE calls  {elapsed:7.2f} s")
+    return zones, leaves
+
+
+def contains(z, lat, lon):
+    return z.lat_min <= lat <= z.lat_max and z.lon_min <= lon <= z.lon_max
+
+
+print("=" * 70)
+print(f"ADAPTIVE GRID BENCHMARK — Region {source.region_id}, {source.side_km} km, "
+      f"{args.base}×{args.base} depth {args.depth} vs {fine}×{fine}")
+print("=" * 70)
+
+scratch = []
+try:
+    _, uniform = run(f"uniform {fine}×{fine}", fine, 0)
+    _, adaptive = run(f"adaptive {args.base}×{args.base} d{args.depth}", args.base, args.depth)
+
+    threshold, _ = refinement_thresholds()
+    hotspots = [z for z in uniform if z.potential >= threshold]
+    finest = [z for z in adaptive if z.depth == args.depth]
+    found = sum(1 for h in hotspots if any(contains(z, *h.center) for z in finest))
+    print(f"\nHotspots (potential ≥ {threshold:g}): {len(hotspots)}, "
+          f"found at full resolution: {found} ({found / max(1, len(hotspots)):.0%})")
+finally:
+    for region in scratch:
+        region.delete()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Compare the database write-back of one full pipeline refresh done zone by
+zone (save_stamped per zone and step, as the pipeline steps used to) with
+the WriteBuffer path (freshness.py): queries and wall time per grid size.
+
+Only the writes are measured – the zone values are made up, nothing is
+fetched. Each grid is built in a scratch Region that is deleted
+afterwards:
+
+    python tests/benchmark_db_writeback.py
+    python tests/benchmark_db_writeback.py --sizes 10 50 100
+"""
+import django
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+import random
+
+from django.db import connection
+
+from analysis.core.freshness import WriteBuffer, bulk_save_stamped, save_stamped
+from analysis.core.gee_service import (
+    AIR_DENSITY_FIELDS,
+    DEM_FIELDS,
+    LAND_COVER_FIELDS,
+    POTENTIAL_FIELDS,
+    POWER_DENSITY_FIELDS,
+    REGION_SUMMARY_FIELDS,
+    WIND_DISTRIBUTION_FIELDS,
+    WIND_FIELDS,
+)
+from analysis.core.geometry import compute_region_corners
+from analysis.core.lattice import create_grid_zones
+from analysis.models import Infrastructure, Point, Region, RegionGrid
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 100], help="zones_per_edge values")
+parser.add_argument("--side-km", type=float, default=20.0)
+args = parser.parse_args()
+
+# (freshness metric, fields) of the per-step pipeline, in step order
+STEPS = [
+    ("wind", WIND_FIELDS),
+    ("terrain", DEM_FIELDS),
+    ("air_density", AIR_DENSITY_FIELDS),
+    ("power_density", POWER_DENSITY_FIELDS),
+    ("land_cover", LAND_COVER_FIELDS),
+    ("wind_distribution", WIND_DISTRIBUTION_FIELDS),
+    ("potential", POTENTIAL_FIELDS),
+]
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting statements (no logging limit)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def fill(zones):
+    """Results as the steps would leave them on the instances."""
+    for z in zones:
+        z.avg_wind_speed, z.wind_direction = random.uniform(4, 10), random.uniform(0, 360)
+        z.min_alt, z.max_alt, z.roughness = 100.0, random.uniform(100, 600), random.uniform(0, 30)
+        z.air_density, z.power_avg = 1.2, random.uniform(100, 900)
+        z.land_type = {"Grassland": 60.0, "Cropland": 40.0}
+        z.wind_histogram = [random.randint(0, 600) for _ in range(30)]
+        z.weibull_k, z.weibull_c = 2.0, 8.0
+        z.potential = random.uniform(0, 100)
+
+
+def per_zone(region, zones):
+    """The previous write-back: one UPDATE per zone and step."""
+    for metric, fields in STEPS:
+        for z in zones:
+            save_stamped(z, [metric], fields)
+    save_stamped(region, ["temperature"], ["avg_temperature"])
+    save_stamped(region, ["summary"])
+
+
+def buffered(region, zones):
+    writes = WriteBuffer()
+    for metric, fields in STEPS:
+        bulk_save_stamped(zones, [metric], fields, writes=writes)
+    bulk_save_stamped([region], ["temperature"], ["avg_temperature"], writes=writes)
+    bulk_save_stamped([region], ["summary"], REGION_SUMMARY_FIELDS, writes=writes)
+    writes.flush()
+
+
+def run(method, n, lat):
+    first_point = (Point.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+    corners = {
+        k: Point.objects.get_or_create(lat=round(v[0], 9), lon=round(v[1], 9))[0]
+        for k, v in compute_region_corners(lat, 10.0, args.side_km).items()
+    }
+    region = Region.objects.create(center=corners["A"], **corners)
+    grid = RegionGrid.objects.create(region=region, side_km=args.side_km, zones_per_edge=n, **corners)
+    infra, _ = Infrastructure.objects.get_or_create(index=1)
+
+    try:
+        zones = list(create_grid_zones(grid, infra))
+        fill(zones)
+
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            method(region, zones)
+            elapsed = time.perf_counter() - start
+
+        stored = grid.zones.filter(data_state="complete").count()
+        return queries.count, elapsed, stored
+    finally:
+        region.delete()
+        Point.objects.filter(id__gte=first_point).delete()
+
+
+print("=" * 72)
+print("DB WRITE-BACK — per-zone save_stamped vs. WriteBuffer")
+print("=" * 72)
+print(f"{'grid':>9} {'zones':>7}   {'loop queries':>12} {'loop s':>8}   {'buffer queries':>14} {'buffer s':>8}")
+
+lat = -70.0
+for n in args.sizes:
+    lat += 0.5
+    loop = run(per_zone, n, lat)
+    buf = run(buffered, n, lat)
+    assert loop[2] == buf[2] == n * n, (loop, buf)
+    print(f"{f'{n}×{n}':>9} {n * n:>7}   {loop[0]:>12} {loop[1]:>8.2f}   {buf[0]:>14} {buf[1]:>8.3f}")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Time the AEP / capacity-factor matrix of analysis/core/energy.py on large
+batches of zones. It is checked against a numeric integration of the
+power curves over the Weibull density in analysis/tests.py (EnergyTests).
+
+Pure NumPy – needs neither Django nor Earth Engine:
+
+    python tests/benchmark_energy.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.core.energy import energy_matrix, weibull_frequencies
+from analysis.core.power_curves import (
+    OFFSHORE_TURBINE_CURVE,
+    ONSHORE_TURBINE_CURVE,
+    SMALL_TURBINE_CURVE,
+)
+
+
+CURVES = [SMALL_TURBINE_CURVE, ONSHORE_TURBINE_CURVE, OFFSHORE_TURBINE_CURVE]
+
+print("=" * 70)
+print("ENERGY — AEP matrix (timing)")
+print("=" * 70)
+
+rng = np.random.default_rng(11)
+for n in (1_000, 10_000, 100_000):
+    kk, cc = rng.uniform(1.5, 3.0, n), rng.uniform(4.0, 10.0, n)
+    freq = weibull_frequencies(kk, cc)
+    start = time.perf_counter()
+    energy_matrix(freq, rng.uniform(1.05, 1.25, n), CURVES)
+    print(f"  {n:>7} zones × {len(CURVES)} turbines: {(time.perf_counter() - start) * 1000:8.1f} ms")
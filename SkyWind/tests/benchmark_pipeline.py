@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark the GEE pipeline and the read endpoints for one RegionGrid.
+
+Run it against recorded responses to get reproducible, offline numbers:
+
+    # 1) record once (needs Earth Engine credentials + network)
+    EXTERNAL_IO_MODE=record python tests/benchmark_pipeline.py 1
+
+    # 2) replay anywhere, optionally with simulated network latency
+    EXTERNAL_IO_MODE=replay EXTERNAL_IO_REPLAY_LATENCY_MS=300 \\
+        python tests/benchmark_pipeline.py 1 --runs 5
+
+    # 3) sequential vs. concurrent step graph (GEE_PIPELINE_WORKERS)
+    EXTERNAL_IO_MODE=replay EXTERNAL_IO_REPLAY_LATENCY_MS=300 \\
+        python tests/benchmark_pipeline.py 1 --per-step --workers 1 4
+"""
+import django
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('/app')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+
+from django.conf import settings
+from django.test import Client, override_settings
+
+from analysis.core.gee_service import compute_gee_for_grid
+from analysis.models import RegionGrid
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("grid_id", type=int)
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--per-step", action="store_true", help="Benchmark the per-step pipeline")
+parser.add_argument("--workers", type=int, nargs="+", help="GEE_PIPELINE_WORKERS values to compare")
+args = parser.parse_args()
+
+grid = RegionGrid.objects.select_related("region").get(pk=args.grid_id)
+region_id = grid.region_id
+
+print("=" * 70)
+print(f"PIPELINE BENCHMARK — Grid {grid.id} ({grid.zones_per_edge}×{grid.zones_per_edge}), "
+      f"mode={settings.EXTERNAL_IO_MODE}")
+print("=" * 70)
+
+
+def bench(label, fn):
+    times = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    print(f"{label:<40} median {statistics.median(times) * 1000:9.1f} ms   "
+          f"min {min(times) * 1000:9.1f} ms")
+
+
+for workers in args.workers or [settings.GEE_PIPELINE_WORKERS]:
+    timings = {}
+
+    def run_pipeline():
+        with override_settings(GEE_PIPELINE_WORKERS=workers):
+            timings.update(compute_gee_for_grid(grid, combined=not args.per_step, force=True))
+
+    bench(f"compute_gee_for_grid ({workers} workers)", run_pipeline)
+    print("    last run: " + ", ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in timings.items()))
+
+client = Client()
+for url in [
+    f"/api/regions/{region_id}/",
+    f"/api/regions/{region_id}/zones/",
+    f"/api/regions/{region_id}/grid/",
+    f"/api/regions/{region_id}/water/",
+    f"/api/regions/{region_id}/relief/",
+]:
+    bench(f"GET {url}", lambda url=url: client.get(url))
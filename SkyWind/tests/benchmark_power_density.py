@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Compare the two formulations of the wind power density image on one grid:
+
+    • legacy – per-hour surface_coll.filterDate(...).first() inside map()
+    • join   – one ee.Join.saveFirst on system:time_start (gee_data.py)
+
+Both are reduced over the grid's zones at 1km (same as the pipeline),
+bypassing the reduction cache, and timed end to end; the script then
+reports the largest per-zone difference.
+
+    python tests/benchmark_power_density.py 1 --runs 3 --year 2022
+"""
+import django
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('/app')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+
+import ee
+
+from analysis.core.gee_client import ensure_initialized
+from analysis.core.gee_data import ERA5_HOURLY, ERA5_LAND_HOURLY, get_wind_power_density_image
+from analysis.core.gee_service import build_zone_feature_collection
+from analysis.models import RegionGrid
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("grid_id", type=int)
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--year", type=int, default=2022)
+args = parser.parse_args()
+
+ensure_initialized()
+
+
+def legacy_power_density_image(year):
+    """The formulation get_wind_power_density_image used before the join."""
+    wind_coll = (
+        ee.ImageCollection(ERA5_HOURLY)
+        .filterDate(f'{year}-01-01', f'{year}-12-31')
+        .select(['u_component_of_wind_100m', 'v_component_of_wind_100m'])
+    )
+    surface_coll = (
+        ee.ImageCollection(ERA5_LAND_HOURLY)
+        .filterDate(f'{year}-01-01', f'{year}-12-31')
+        .select(['surface_pressure', 'temperature_2m'])
+    )
+
+    def per_hour(wind_img):
+        time_start = wind_img.get('system:time_start')
+        surface_img = surface_coll.filterDate(
+            ee.Date(time_start),
+            ee.Date(time_start).advance(1, 'hour')
+        ).first()
+
+        u = wind_img.select('u_component_of_wind_100m')
+        v = wind_img.select('v_component_of_wind_100m')
+        T = surface_img.select('temperature_2m')
+        P = surface_img.select('surface_pressure')
+
+        speed = u.pow(2).add(v.pow(2)).sqrt()
+        rho = P.divide(T.multiply(287.05))
+        return rho.multiply(speed.pow(3)).multiply(0.5).rename('power_density')
+
+    return wind_coll.map(per_hour).mean().rename('power_density')
+
+
+grid = RegionGrid.objects.get(pk=args.grid_id)
+zones = list(grid.zones.select_related("A", "B", "C", "D"))
+fc, _ = build_zone_feature_collection(zones)
+
+print("=" * 70)
+print(f"POWER DENSITY BENCHMARK — Grid {grid.id} ({len(zones)} zones), year {args.year}")
+print("=" * 70)
+
+
+def run(label, image_fn):
+    times = []
+    values = None
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        reduced = image_fn(args.year).reduceRegions(fc, ee.Reducer.mean(), scale=1000).getInfo()
+        times.append(time.perf_counter() - start)
+        values = {
+            int(f["properties"]["zone_id"]): f["properties"].get("mean")
+            for f in reduced["features"]
+        }
+    print(f"{label:<8} median {statistics.median(times):7.2f}s   "
+          f"min {min(times):7.2f}s   max {max(times):7.2f}s")
+    return values, statistics.median(times)
+
+
+legacy, t_legacy = run("legacy", legacy_power_density_image)
+joined, t_join = run("join", get_wind_power_density_image)
+
+diffs = [
+    abs(legacy[zid] - joined[zid])
+    for zid in legacy
+    if legacy[zid] is not None and joined.get(zid) is not None
+]
+missing = sum(1 for zid in legacy if joined.get(zid) is None) + sum(1 for zid in joined if legacy.get(zid) is None)
+
+print("-" * 70)
+print(f"Speed-up:            {t_legacy / t_join:.2f}×")
+print(f"Max |Δ| per zone:    {max(diffs) if diffs else float('nan'):.6f} W/m²")
+print(f"Zones missing a value in one formulation: {missing}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Time analysis/core/scoring.py against the original per-zone scoring loop
+on large batches of random zones. The two are checked against each other
+in analysis/tests.py (ScoringTests).
+
+Pure NumPy – needs neither Django nor Earth Engine:
+
+    python tests/benchmark_scoring.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.core.scoring import (
+    HARD_EXCLUSION_CLASSES,
+    LAND_SUITABILITY_SCORES,
+    score,
+)
+
+
+def reference(power_avg, roughness, land_type, w_wind=0.7, w_terrain=0.3, scores=LAND_SUITABILITY_SCORES):
+    """The per-zone loop scoring used before (gee_service.compute_potential)."""
+    buildable, weighted = 0.0, 0.0
+    for label, pct in (land_type or {}).items():
+        fraction = pct / 100.0
+        if label not in HARD_EXCLUSION_CLASSES:
+            buildable += fraction
+            weighted += fraction * scores.get(label, 0.5)
+    s_land = (weighted / buildable if buildable > 0 else 0.0) * buildable
+
+    s_wind = min(1.25, (power_avg or 0.0) / 800)
+    s_terrain = 1 - min(1.0, (roughness or 0.0) / 50)
+    return round(100 * (w_wind * s_wind + w_terrain * s_terrain) * s_land, 1)
+
+
+def random_zone(rng):
+    labels = rng.sample(list(LAND_SUITABILITY_SCORES) + ["class_99"], rng.randint(0, 4))
+    weights = [rng.random() for _ in labels]
+    total = sum(weights) or 1
+    land = {label: round(100 * w / total, 1) for label, w in zip(labels, weights)}
+    return rng.uniform(0, 1500), rng.uniform(0, 80), land
+
+
+print("=" * 70)
+print("SCORING — vectorized vs. per-zone loop (timing)")
+print("=" * 70)
+
+rng = random.Random(7)
+for n in (1_000, 10_000, 100_000):
+    batch = [random_zone(rng) for _ in range(n)]
+    p, r, l = zip(*batch)
+
+    start = time.perf_counter()
+    [reference(*z) for z in batch]
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score(p, r, l)
+    vec = time.perf_counter() - start
+    print(f"  {n:>7} zones: loop {loop * 1000:8.1f} ms   vectorized {vec * 1000:8.1f} ms")
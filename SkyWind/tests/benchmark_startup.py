@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Measure Django startup cost, each sample in a fresh interpreter:
+
+    • setup + URLconf  – django.setup() and importing every view (what a
+                         WSGI worker / `manage.py check` pays at boot)
+    • manage.py check  – a full management command
+    • + import ee      – what startup cost when views pulled in gee_data
+    • + ee.Initialize  – ... plus the authentication round trip
+                         (only with --with-init; needs credentials or
+                         EXTERNAL_IO_MODE=replay)
+
+The first line also reports whether the `ee` package got imported during
+startup – it should not be, Earth Engine is initialized on first use.
+
+    python tests/benchmark_startup.py --runs 5
+    python tests/benchmark_startup.py --runs 5 --with-init
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--runs", type=int, default=5)
+parser.add_argument("--with-init", action="store_true", help="Also time ee.Initialize")
+args = parser.parse_args()
+
+env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")}
+env["PYTHONPATH"] = os.pathsep.join(p for p in [ROOT, env.get("PYTHONPATH", "")] if p)
+
+SETUP = """
+import sys, time, json
+t0 = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+t1 = time.perf_counter()
+out = {"setup": t1 - t0, "ee_imported": "ee" in sys.modules}
+if EXTRA >= 1:
+    import ee
+    out["import_ee"] = time.perf_counter() - t1
+if EXTRA >= 2:
+    t2 = time.perf_counter()
+    from analysis.core.gee_client import ensure_initialized
+    ensure_initialized()
+    out["init_ee"] = time.perf_counter() - t2
+print(json.dumps(out))
+"""
+
+
+def sample(extra):
+    code = SETUP.replace("EXTRA", str(extra))
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def wall(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def line(label, values):
+    print(f"{label:<28} median {statistics.median(values) * 1000:8.0f} ms   min {min(values) * 1000:8.0f} ms")
+
+
+print("=" * 70)
+print(f"STARTUP BENCHMARK — {env['DJANGO_SETTINGS_MODULE']}, {args.runs} runs")
+print("=" * 70)
+
+extra = 2 if args.with_init else 1
+samples = [sample(extra) for _ in range(args.runs)]
+
+print(f"ee imported during startup: {'yes ❌' if any(s['ee_imported'] for s in samples) else 'no ✅'}")
+line("setup + URLconf", [s["setup"] for s in samples])
+line("manage.py check", [wall([sys.executable, "manage.py", "check"]) for _ in range(args.runs)])
+line("+ import ee (old startup)", [s["setup"] + s["import_ee"] for s in samples])
+if args.with_init:
+    line("+ ee.Initialize (old)", [s["setup"] + s["import_ee"] + s["init_ee"] for s in samples])
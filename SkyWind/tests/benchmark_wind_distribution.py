@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Time the Weibull fit of analysis/core/wind_distribution.py on large
+batches of hourly wind-speed histograms. The fit is checked against known
+distributions in analysis/tests.py (WindDistributionTests).
+
+Pure NumPy – needs neither Django nor Earth Engine:
+
+    python tests/benchmark_wind_distribution.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.core.wind_distribution import WIND_HIST_MAX, bin_edges, fit_weibull
+
+
+def hourly_histogram(rng, k, c, hours=8760):
+    """What get_wind_histogram_image counts for one pixel and year."""
+    speeds = np.minimum(c * rng.weibull(k, hours), WIND_HIST_MAX - 1e-3)
+    return np.histogram(speeds, bin_edges())[0]
+
+
+print("=" * 70)
+print("WIND DISTRIBUTION — Weibull fit from hourly histograms (timing)")
+print("=" * 70)
+
+rng = np.random.default_rng(3)
+cases = [(k, c) for k in (1.3, 1.8, 2.2, 3.0) for c in (4.0, 6.5, 9.0, 12.0)]
+hists = np.array([hourly_histogram(rng, k, c) for k, c in cases])
+
+for n in (1_000, 10_000, 100_000):
+    batch = np.tile(hists, (n // len(hists) + 1, 1))[:n]
+    start = time.perf_counter()
+    fit_weibull(batch)
+    print(f"  {n:>7} zones: fit {(time.perf_counter() - start) * 1000:8.1f} ms")
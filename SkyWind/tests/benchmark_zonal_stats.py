@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Time analysis/core/zonal_stats.py (mean + min + max + stdDev) on large
+grids. Its results are checked against a per-zone loop in
+analysis/tests.py (ZonalStatsTests).
+
+Pure NumPy – needs neither Django nor Earth Engine:
+
+    python tests/benchmark_zonal_stats.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.core.geometry import compute_region_corners, generate_zone_grid
+from analysis.core.zonal_stats import cell_bounds, zone_windows, ZonalIndex
+
+
+DEG_PER_KM = 0.009
+
+
+def region_raster(center_lat, center_lon, side_km, scale_m):
+    """Pixel grid over the region, same layout as raster_snapshot.pixel_grid."""
+    corners = compute_region_corners(center_lat, center_lon, side_km)
+    lat_max = corners["A"][0]
+    lat_min = corners["B"][0]
+    lon_min = corners["C"][1]
+    lon_max = corners["A"][1]
+    res_lat = scale_m / 1000 * DEG_PER_KM
+    res_lon = res_lat / np.cos(np.radians(center_lat))
+    rows = int(np.ceil((lat_max - lat_min) / res_lat - 1e-9))
+    cols = int(np.ceil((lon_max - lon_min) / res_lon - 1e-9))
+    return corners, (lat_max, lon_min, res_lat, res_lon), (rows, cols)
+
+
+print("=" * 70)
+print("ZONAL STATS — timing (mean + min + max + stdDev)")
+print("=" * 70)
+
+rng = np.random.default_rng(7)
+
+for side_km, scale_m, n in [(20, 30, 100), (50, 30, 200), (20, 10, 100)]:
+    corners, geo, shape = region_raster(46.77, 23.62, side_km, scale_m)
+    cells = generate_zone_grid(corners["A"], corners["B"], corners["C"], corners["D"], n)
+    bounds = cell_bounds(cells)
+    raster = rng.standard_normal(shape).astype(np.float32)
+
+    def run():
+        index = ZonalIndex(zone_windows(bounds, *geo, shape), shape)
+        index.mean_std(raster)
+        index.min(raster)
+        index.max(raster)
+
+    times = []
+    for _ in range(4):
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+    elapsed = min(times[1:])  # first run pays NumPy warm-up
+
+    print(f"  {side_km:>3} km @ {scale_m:>2}m ({shape[0]}×{shape[1]} px), {n}×{n} zones: {elapsed:8.1f} ms")
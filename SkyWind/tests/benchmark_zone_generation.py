@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Compare zone generation cell by cell (4 Point get_or_create + 1 INSERT per
+zone, as compute_region used to) with the bulk lattice path
+(core/lattice.py): queries and wall time per grid size.
+
+Each grid is built in a scratch Region at an unused location, so both
+paths create every point; the scratch zones and points are deleted
+afterwards:
+
+    python tests/benchmark_zone_generation.py
+    python tests/benchmark_zone_generation.py --sizes 10 50 100 --loop-max 50
+
+Sizes above --loop-max (default 100) are run with the bulk path only.
+"""
+import django
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+
+from django.db import connection, transaction
+
+from analysis.core.geometry import compute_region_corners, generate_zone_grid
+from analysis.core.lattice import create_grid_zones
+from analysis.models import Infrastructure, Point, Region, RegionGrid, Zone
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 100], help="zones_per_edge values")
+parser.add_argument("--loop-max", type=int, default=100, help="largest size also run cell by cell")
+parser.add_argument("--side-km", type=float, default=20.0)
+args = parser.parse_args()
+
+
+def point(lat, lon):
+    return Point.objects.get_or_create(lat=round(lat, 9), lon=round(lon, 9))[0]
+
+
+def loop_zones(grid, infra):
+    """The previous per-cell generation."""
+    cells = generate_zone_grid(*[(p.lat, p.lon) for p in (grid.A, grid.B, grid.C, grid.D)], grid.zones_per_edge)
+    for i, cell in enumerate([c for row in cells for c in row], start=1):
+        Zone.objects.create(grid=grid, infrastructure=infra, zone_index=i,
+                            **{k: point(*cell[k]) for k in "ABCD"})
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting statements (no logging limit)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run(method, n, lat):
+    first_point = (Point.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+    corners = {k: point(*v) for k, v in compute_region_corners(lat, 10.0, args.side_km).items()}
+    region = Region.objects.create(center=point(lat, 10.0), **corners)
+    grid = RegionGrid.objects.create(region=region, side_km=args.side_km, zones_per_edge=n, **corners)
+    infra, _ = Infrastructure.objects.get_or_create(index=1)
+
+    try:
+        before = Point.objects.count()
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            with transaction.atomic():
+                method(grid, infra)
+            elapsed = time.perf_counter() - start
+
+        return queries.count, elapsed, grid.zones.count(), Point.objects.count() - before
+    finally:
+        region.delete()
+        Point.objects.filter(id__gte=first_point).delete()
+
+
+print("=" * 78)
+print("ZONE GENERATION — cell by cell vs. bulk lattice")
+print("=" * 78)
+print(f"{'grid':>9} {'zones':>7}   {'loop queries':>12} {'points':>7} {'loop s':>8}   "
+      f"{'bulk queries':>12} {'points':>7} {'bulk s':>8}")
+
+# Far from any real region (and from each other) so every point is new
+lat = -80.0
+for n in args.sizes:
+    lat += 0.5
+    bulk = run(create_grid_zones, n, lat)
+    if n <= args.loop_max:
+        lat += 0.5
+        loop = run(loop_zones, n, lat)
+        loop_cols = f"{loop[0]:>12} {loop[3]:>7} {loop[1]:>8.2f}"
+    else:
+        loop_cols = f"{'-':>12} {'-':>7} {'-':>8}"
+    print(f"{f'{n}×{n}':>9} {bulk[2]:>7}   {loop_cols}   {bulk[0]:>12} {bulk[3]:>7} {bulk[1]:>8.2f}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Compare a full zone listing of one region read from the Zone / Point
+rows (as get_region_zones used to) with the columnar metric stores
+(core/metric_store.py): queries, wall time and response size.
+
+    python tests/benchmark_zone_reads.py 1
+    python tests/benchmark_zone_reads.py 1 --runs 10
+
+Stores missing or outdated are built once before timing.
+"""
+import django
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import argparse
+
+from django.db import connection
+from django.http import JsonResponse
+
+from analysis.core.metric_store import region_columns, zone_rows
+from analysis.models import GridMetricStore, Zone
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("region_id", type=int)
+parser.add_argument("--runs", type=int, default=5)
+args = parser.parse_args()
+
+
+def rows_from_zones(region_id):
+    """The previous get_region_zones body."""
+    zones = Zone.objects.filter(grid__region_id=region_id, children__isnull=True).select_related(
+        "A", "B", "C", "D"
+    )
+    return [
+        {
+            "id": z.id,
+            "zone_index": z.zone_index,
+            "A": {"lat": z.A.lat, "lon": z.A.lon},
+            "B": {"lat": z.B.lat, "lon": z.B.lon},
+            "C": {"lat": z.C.lat, "lon": z.C.lon},
+            "D": {"lat": z.D.lat, "lon": z.D.lon},
+            "avg_wind_speed": z.avg_wind_speed,
+            "wind_direction": z.wind_direction,
+            "weibull_k": z.weibull_k,
+            "weibull_c": z.weibull_c,
+            "min_alt": z.min_alt,
+            "max_alt": z.max_alt,
+            "roughness": z.roughness,
+            "air_density": z.air_density,
+            "power_avg": z.power_avg,
+            "land_type": z.land_type,
+            "potential": z.potential,
+            "data_state": z.data_state,
+            "depth": z.depth,
+            "parent_id": z.parent_id,
+            "infrastructure_id": z.infrastructure_id,
+        }
+        for z in zones
+    ]
+
+
+def rows_from_store(region_id):
+    return zone_rows(region_columns(region_id))
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting statements (no logging limit)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(read):
+    times, queries, size = [], 0, 0
+    for _ in range(args.runs):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = JsonResponse(read(args.region_id), safe=False)
+            times.append(time.perf_counter() - start)
+        queries, size = counter.count, len(response.content)
+    return statistics.median(times), queries, size
+
+
+# Build the stores first so only reads are timed
+region_columns(args.region_id)
+stored = GridMetricStore.objects.filter(grid__region_id=args.region_id)
+blob = sum(len(s.data) for s in stored)
+
+print("=" * 70)
+print(f"ZONE LISTING — Region {args.region_id}, median of {args.runs} runs")
+print("=" * 70)
+for label, read in (("Zone rows", rows_from_zones), ("metric store", rows_from_store)):
+    seconds, queries, size = measure(read)
+    print(f"  {label:<13} {seconds * 1000:8.1f} ms  {queries:>3} queries  {size / 1e6:6.2f} MB JSON")
+print(f"  store blobs: {blob / 1e6:.2f} MB in {stored.count()} row(s)")
@@ -10,8 +10,11 @@ django.setup()
 
 import ee
 from analysis.models import Zone
+from analysis.core.gee_client import ensure_initialized
 from analysis.core.gee_data import get_landcover_image, WORLD_COVER_CLASSES
 
+ensure_initialized()
+
 # Test with one empty zone and one filled zone
 empty_zone = Zone.objects.filter(land_type='').first()
 filled_zone = Zone.objects.exclude(land_type='').first()
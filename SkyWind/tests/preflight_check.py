@@ -67,8 +67,8 @@ else:
 # Check 5: Earth Engine initialization
 print("\n5️⃣  Checking Earth Engine...")
 try:
-    import ee
-    ee.Initialize(project='rospin1')
+    from analysis.core.gee_client import ensure_initialized
+    ensure_initialized()
     success.append("✅ Earth Engine initialized successfully")
 except Exception as e:
     errors.append(f"❌ Earth Engine error: {e}")